@@ -0,0 +1,328 @@
+"""
+性能計測スイート。
+
+    python bench.py                                 # 計測して bench_results.json に保存する
+    python bench.py --save-baseline                 # 結果を基準値として bench_baseline.json にも保存する
+    python bench.py --check                         # bench_baseline.json と比較する
+    python bench.py --check --baseline other.json   # 別の基準値と比較する
+
+計測値はマシンに依存するため、基準値はリポジトリに置かず、変更前の手元のマシンで --save-baseline して作る。
+--check を付けた場合は基準値と比較して、許容範囲 (--tolerance) を超えて悪化した項目や、
+基準値にあるのに計測されなかった項目があれば終了コード1で終わる。
+
+ゲームロジックの計測は画面なしで動く。起動時間とシーンごとのフレーム時間は pyxel のウィンドウが必要なため、
+別プロセスで計測し、ウィンドウを作れない環境では結果の skipped に記録する。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src.settings import *
+from src.Engine import *
+from src.Batch import CardTable, resolve_battles, simulate_random_games
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, "bench_baseline.json")  # 手元のマシンで --save-baseline して作る基準値
+APP_PREFIXES = ("startup.", "frame.")   # pyxel のウィンドウが必要な計測の項目名
+
+# 別プロセスで実行する、起動時間とフレーム時間の計測スクリプト (アセットの相対パスに合わせて src で実行する)
+APP_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, "..")
+import pyxel
+from src.App import App
+from src.Font import FONTS
+imported = time.perf_counter()
+app = App(run=False, start_time=start)
+constructed = time.perf_counter()
+# 最初のフレーム (タイトル画面) を描画するまでの時間
+app.update()
+app.draw()
+pyxel.flip()
+first_frame = app.first_frame_time
+app.loader.finish()
+loaded = time.perf_counter()
+for name in FONTS.files:
+    try:
+        FONTS.get(name)
+    except Exception:
+        pass
+fonts = time.perf_counter()
+
+frames = {}
+for name in ("title", "game", "result"):
+    scene = app.scene[name]
+    update_times, draw_times = [], []
+    for _ in range(FRAMES):
+        t0 = time.perf_counter()
+        scene.update()
+        t1 = time.perf_counter()
+        pyxel.cls(0)
+        scene.draw()
+        t2 = time.perf_counter()
+        update_times.append(t1 - t0)
+        draw_times.append(t2 - t1)
+        pyxel.flip()
+    frames[name] = {"update": update_times, "draw": draw_times}
+
+print(json.dumps({
+    "import": imported - start,
+    "app_init": constructed - imported,
+    "first_frame": first_frame,
+    "assets": loaded - start - first_frame,
+    "fonts": fonts - loaded,
+    "frames": frames,
+}))
+"""
+
+
+def metric(value, unit, higher_is_better):
+    """計測結果1件を表す辞書を作る。"""
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def bench_app(frames):
+    """
+    起動時間と、シーンごとの update()/draw() の平均時間と99パーセンタイルを計測する。
+
+    Args:
+        frames (int): シーンごとに計測するフレーム数。
+
+    Returns:
+        dict: 計測結果。pyxel のウィンドウを作れない場合は空。
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", f"FRAMES = {frames}\n" + APP_PROBE],
+        cwd=os.path.join(ROOT, "src"), capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if proc.returncode != 0:
+        reason = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        print(f"app benchmarks skipped: {reason}", file=sys.stderr)
+        return {}
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    results = {
+        "startup.process_total": metric(total, "s", False),
+        "startup.import": metric(probe["import"], "s", False),
+        "startup.app_init": metric(probe["app_init"], "s", False),
+        "startup.first_frame": metric(probe["first_frame"], "s", False),
+        "startup.assets": metric(probe["assets"], "s", False),
+        "startup.fonts": metric(probe["fonts"], "s", False),
+    }
+    for name, times in probe["frames"].items():
+        for kind in ("update", "draw"):
+            samples = np.array(times[kind]) * 1000
+            results[f"frame.{name}.{kind}.mean"] = metric(float(samples.mean()), "ms", False)
+            results[f"frame.{name}.{kind}.p99"] = metric(float(np.percentile(samples, 99)), "ms", False)
+    return results
+
+
+def bench_battle(seconds):
+    """
+    GameScene._battle と同じ処理 (効果解決から勝敗判定まで) の1秒あたりの解決回数を計測する。
+
+    Args:
+        seconds (float): 計測時間の目安。
+
+    Returns:
+        dict: 計測結果。
+    """
+    game = new_game(seed=0)
+    start_phase(game)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            select_phase(game, 0, 0)
+            resolve_turn(game)
+            # 勝敗が決まらないようにライフを戻して同じ対戦を続ける
+            for player in game.players:
+                player.life = INITIAL_LIFE
+                player.deck.recycle(player.graveyard)
+                player.graveyard.clear()
+            game.phase = "start"
+            start_phase(game)
+        count += 1000
+    elapsed = time.perf_counter() - start
+    return {"battle.engine": metric(count / elapsed, "battles/s", True)}
+
+
+def bench_batch_battle(n_games=100000, repeat=20):
+    """
+    Batch.resolve_battles による戦闘の1秒あたりの解決回数を計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    table = CardTable.from_cards(MASTER_CARDS)
+    rng = np.random.default_rng(0)
+    card1 = rng.integers(0, len(table), n_games)
+    card2 = rng.integers(0, len(table), n_games)
+    life = np.full(n_games, INITIAL_LIFE)
+    resolve_battles(table, card1, card2, 0, 0, life, life)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        resolve_battles(table, card1, card2, 0, 0, life, life)
+    elapsed = time.perf_counter() - start
+    return {"battle.batch": metric(n_games * repeat / elapsed, "battles/s", True)}
+
+
+def bench_games(seconds):
+    """
+    ランダム戦略同士の対戦を最後まで行う場合の、1秒あたりの試合数を計測する。
+
+    Args:
+        seconds (float): 計測時間の目安。
+
+    Returns:
+        dict: 計測結果。
+    """
+    rng = random.Random(0)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            play_match(random_strategy, random_strategy, rng)
+        count += 100
+    engine_rate = count / (time.perf_counter() - start)
+
+    table = CardTable.from_cards(MASTER_CARDS)
+    start = time.perf_counter()
+    simulate_random_games(table, 100000, np.random.default_rng(0))
+    batch_rate = 100000 / (time.perf_counter() - start)
+    return {
+        "games.engine": metric(engine_rate, "games/s", True),
+        "games.batch": metric(batch_rate, "games/s", True),
+    }
+
+
+def best_of(repeat, func, *args):
+    """
+    計測を複数回繰り返し、項目ごとに最も良い値を返す (他の処理によるばらつきを抑えるため)。
+
+    Args:
+        repeat (int): 繰り返す回数。
+        func (Callable): 計測結果の辞書を返す関数。
+        *args: func に渡す引数。
+
+    Returns:
+        dict: 項目ごとに最も良い計測結果。
+    """
+    best = {}
+    for _ in range(repeat):
+        for name, result in func(*args).items():
+            current = best.get(name)
+            if (current is None
+                    or (result["higher_is_better"] and result["value"] > current["value"])
+                    or (not result["higher_is_better"] and result["value"] < current["value"])):
+                best[name] = result
+    return best
+
+
+def compare(results, baseline, tolerance, skipped=()):
+    """
+    基準値と比較し、許容範囲を超えて悪化した項目を返す。
+    基準値にあるのに今回計測されなかった項目も、計測を省いた部分 (skipped) のものでなければ悪化として扱う。
+
+    Args:
+        results (dict): 今回の計測結果。
+        baseline (dict): 基準値の計測結果。
+        tolerance (float): 許容する悪化の割合 (0.1 なら10%)。
+        skipped (Iterable[str], optional): 計測を省いた部分 ("app")。
+
+    Returns:
+        list[str]: 悪化した項目の説明。
+    """
+    regressions = []
+    for name, base in baseline.items():
+        if name in results:
+            continue
+        if "app" in skipped and name.startswith(APP_PREFIXES):
+            print(f"{name:<32} skipped")
+            continue
+        print(f"{name:<32} {base['value']:>14.4f} -> {'missing':>14} {base['unit']:<10}          REGRESSION")
+        regressions.append(name)
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        ratio = current["value"] / base["value"]
+        if current["higher_is_better"]:
+            worse = ratio < 1 - tolerance
+        else:
+            worse = ratio > 1 + tolerance
+        marker = "REGRESSION" if worse else "ok"
+        print(f"{name:<32} {base['value']:>14.4f} -> {current['value']:>14.4f} "
+              f"{current['unit']:<10} ({ratio:6.2f}x) {marker}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="性能計測スイート")
+    parser.add_argument("--output", default="bench_results.json", help="計測結果の保存先")
+    parser.add_argument("--check", action="store_true", help="基準値と比較し、悪化していれば終了コード1で終わる")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="--check で比較する基準値のファイル")
+    parser.add_argument("--save-baseline", action="store_true", help="結果を bench_baseline.json にも保存する")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="許容する悪化の割合")
+    parser.add_argument("--seconds", type=float, default=2.0, help="各計測の時間の目安")
+    parser.add_argument("--frames", type=int, default=300, help="シーンごとに計測するフレーム数")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測を繰り返す回数 (最も良い値を採用)")
+    parser.add_argument("--no-app", action="store_true", help="pyxel のウィンドウが必要な計測を行わない")
+    args = parser.parse_args()
+    if args.check and not os.path.exists(args.baseline):
+        # 計測に時間がかかるため、比較できないことは計測の前に知らせる
+        parser.error(f"baseline not found: {args.baseline} (run with --save-baseline first)")
+
+    results = {}
+    skipped = []
+    if not args.no_app:
+        app_results = bench_app(args.frames)
+        if not app_results:
+            skipped.append("app")
+        results.update(app_results)
+    results.update(best_of(args.repeat, bench_battle, args.seconds))
+    results.update(best_of(args.repeat, bench_batch_battle))
+    results.update(best_of(args.repeat, bench_games, args.seconds))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "results": results,
+        "skipped": skipped,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:<32} {result['value']:>14.4f} {result['unit']}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        if baseline.get("machine") != report["machine"] or baseline.get("python") != report["python"]:
+            print(f"warning: baseline was recorded on {baseline.get('machine')} / Python {baseline.get('python')}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance, skipped)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}",
+                  file=sys.stderr)
+            sys.exit(1)
@@ -6,11 +6,58 @@
 # version: 0.0.0
 
 
-from rich.traceback import install
-install(show_locals=True)  # 例外発生時のローカル変数を表示
+import time
+START_TIME = time.perf_counter()   # 起動した時刻 (最初のフレームまでの時間の計測に使う)
 
+import sys
 
+
+def excepthook(exc_type, exc_value, tb):
+    """
+    例外発生時に、ローカル変数つきの見やすいトレースバックを表示する。
+    rich の読み込みは重いため、起動時ではなく例外が起きたときに初めて読み込む。
+    """
+    from rich.traceback import Traceback
+    from rich.console import Console
+    Console(stderr=True).print(Traceback.from_exception(exc_type, exc_value, tb, show_locals=True))
+
+
+sys.excepthook = excepthook
+
+import argparse
+from src.settings import TURBO_SPEED, RENDER_EVERY, NETWORK_PORT, REPORT_STARTUP
 from src.App import App
 
 if __name__ == "__main__":
-    App()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    # 引数にリプレイファイルを指定すると、そのリプレイを再生する
+    parser.add_argument("replay", nargs="?", default=None, help="再生するリプレイファイル")
+    parser.add_argument("--speed", type=float, default=TURBO_SPEED, help="ロジックを実時間の何倍の速さで進めるか (ターボモード)")
+    parser.add_argument("--render-every", type=int, default=RENDER_EVERY, help="何フレームに1回描画するか")
+    parser.add_argument("--ai-vs-ai", action="store_true", help="プレイヤー1もAIが操作し、対戦を繰り返す")
+    parser.add_argument("--headless", type=int, default=0, metavar="GAMES",
+                        help="ウィンドウを作らずに、AI同士で指定した数の試合を描画なしで進める")
+    parser.add_argument("--seed", type=int, default=None, help="AI同士の対戦の試合の列を再現するためのシード")
+    parser.add_argument("--report-startup", action="store_true", default=REPORT_STARTUP,
+                        help="起動から最初のフレームを描画するまでの時間を標準エラー出力に表示する")
+    parser.add_argument("--connect", default=None, metavar="HOST",
+                        help="対戦サーバ (python -m src.Network serve) に接続して対戦する")
+    parser.add_argument("--port", type=int, default=NETWORK_PORT, help="対戦サーバのポート番号")
+    parser.add_argument("--vs-server-ai", action="store_true", help="他のクライアントを待たずに、サーバのAIと対戦する")
+    args = parser.parse_args()
+
+    if args.headless:
+        app = App(start_time=START_TIME, ai_vs_ai=True, headless=True, seed=args.seed)
+        started = time.perf_counter()
+        winners = app.run_headless(args.headless)
+        elapsed = time.perf_counter() - started
+        print(f"{len(winners)} games, {app.ticks} ticks in {elapsed:.2f} s "
+              f"(P1 {winners.count(0)} / P2 {winners.count(1)} / draw {winners.count(None)})")
+    elif args.connect is not None:
+        from src.Network import OPPONENT_AI, OPPONENT_PLAYER
+        App(start_time=START_TIME, network=(args.connect, args.port,
+                                            OPPONENT_AI if args.vs_server_ai else OPPONENT_PLAYER),
+            report_startup=args.report_startup)
+    else:
+        App(args.replay, start_time=START_TIME, speed=args.speed, render_every=args.render_every,
+            ai_vs_ai=args.ai_vs_ai, seed=args.seed, report_startup=args.report_startup)
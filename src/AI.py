@@ -0,0 +1,75 @@
+import random
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.MCTS import MCTSAgent
+
+
+def attack_strategy(game, player_index, rng=random):
+    """
+    手札の中で攻撃力が最も高いカードを選ぶ戦略。同じ攻撃力ならスピードが速い方を選ぶ。
+
+    Args:
+        game (GameData): ゲームデータ。
+        player_index (int): 選択するプレイヤーの番号。
+        rng (random.Random, optional): 乱数生成器 (この戦略では使わない)。
+
+    Returns:
+        int: 選んだ手札の位置。
+    """
+    hand = game.players[player_index].hand
+    return max(range(len(hand)), key=lambda i: (hand[i].attack, hand[i].speed))
+
+
+def greedy_strategy(game, player_index, rng=random):
+    """
+    相手が手札から一様ランダムに選ぶと仮定し、(与ダメージ - 被ダメージ) の期待値が最大のカードを選ぶ戦略。
+
+    Args:
+        game (GameData): ゲームデータ。
+        player_index (int): 選択するプレイヤーの番号。
+        rng (random.Random, optional): 乱数生成器 (この戦略では使わない)。
+
+    Returns:
+        int: 選んだ手札の位置。
+    """
+    me = game.players[player_index]
+    opponent = game.players[1 - player_index]
+
+    def score(card):
+        total = 0
+        for other in opponent.hand:
+            total += lookup_damage(card, other, me.soul_point, game.cards)
+            total -= lookup_damage(other, card, opponent.soul_point, game.cards)
+        return total
+
+    return max(range(len(me.hand)), key=lambda i: score(me.hand[i]))
+
+
+def _stateless(strategy):
+    """状態を持たない戦略を、毎回同じ関数を返す戦略の生成関数にする。"""
+    return lambda seed=None: strategy
+
+
+# 名前で指定できる戦略の一覧 (トーナメントなどで使う)
+# 探索木や乱数を持つ戦略は席ごと・プロセスごとに別のものを使うよう、戦略そのものではなく生成関数を登録する
+STRATEGIES = {
+    "random": _stateless(random_strategy),
+    "attack": _stateless(attack_strategy),
+    "greedy": _stateless(greedy_strategy),
+    "mcts": lambda seed=None: MCTSAgent(iterations=200, seed=seed),
+}
+
+
+def create_strategy(name, seed=None):
+    """
+    名前で指定した戦略を新しく作る。1つの席 (対戦の片方のプレイヤー) ごとに1つ作って使う。
+
+    Args:
+        name (str): 戦略名 (STRATEGIES のキー)。
+        seed (int, optional): 戦略が持つ乱数のシード。
+
+    Returns:
+        Callable: (game, player_index, rng) を受け取り手札の位置を返す戦略。
+    """
+    return STRATEGIES[name](seed)
@@ -1,25 +1,169 @@
+import random
+import sys
+import time
 import pyxel
 from src.settings import *
 from src.Scene import *
+from src.Assets import AssetLoader
+from src.Profiler import PROFILER
+from src.Scheduler import FixedStepClock
+
+
+class Scenes(dict):
+    """
+    シーン名 → シーンの辞書。シーンは最初に参照されたときに作られる。
+    ゲームシーンは対戦エンジンや AI など重いモジュールを読み込むため、タイトル画面の表示を待たせないよう、
+    遷移するときまで import も含めて遅らせる。
+    """
+
+    def __init__(self, factories):
+        """
+        Args:
+            factories (dict[str, Callable[[], Scene]]): シーン名 → シーンを作る関数。
+        """
+        super().__init__()
+        self.factories = factories
+
+    def __missing__(self, name):
+        scene = self[name] = self.factories[name]()
+        return scene
+
 
 class App:
-    def __init__(self):
-        pyxel.init(width=WINDOW_WIDTH, height=WINDOW_HEIGHT, fps=FPS, title=TITLE)
-        pyxel.load("../assets/my_resource.pyxres")
-        self.scene = dict()
-        self.scene["title"] = TitleScene(self)
-        self.scene["game"] = GameScene(self)
-        self.scene["result"] = ResultScene(self)
-        
-        self.current_scene = self.scene["game"]
-        
-        pyxel.mouse(True)
-        
-        pyxel.run(self.update, self.draw)
-        
-    def update(self):
+    def __init__(self, replay_path=None, run=True, start_time=None, speed=TURBO_SPEED,
+                 render_every=RENDER_EVERY, ai_vs_ai=False, headless=False, seed=None, network=None,
+                 report_startup=REPORT_STARTUP):
+        """
+        Args:
+            replay_path (str, optional): 指定した場合、対戦の代わりにこのリプレイファイルを再生する。
+            run (bool, optional): False の場合は初期化だけ行い、メインループを開始しない (計測用)。
+            start_time (float, optional): 起動した時刻 (time.perf_counter の値)。最初のフレームまでの時間の計測に使う。
+                省略時は App を作り始めた時刻。
+            speed (float, optional): ロジックを実時間の何倍の速さで進めるか (ターボモード)。
+            render_every (int, optional): 何フレームに1回描画するか。
+            ai_vs_ai (bool, optional): True の場合、プレイヤー1もAIが操作し、決着するたびに次の対戦を始める。
+            headless (bool, optional): True の場合、ウィンドウを作らずに描画なしで動かす (run_headless で進める)。
+            seed (int, optional): AI同士の対戦で、各試合のシードを作る乱数のシード。指定すると同じ試合の列を再現できる。
+            network (tuple[str, int, int], optional): 対戦サーバに接続して対戦する場合の (ホスト名, ポート番号, 相手の種類)。
+            report_startup (bool, optional): 起動から最初のフレームを描画するまでの時間を標準エラー出力に表示するかどうか。
+        """
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.first_frame_time = None    # 起動から最初のフレームを描画し終えるまでの時間 (秒)
+        self.report_startup = report_startup
+        self.headless = headless
+        self.ai_vs_ai = ai_vs_ai
+        self.turbo = speed != 1 or headless
+        self.render_every = render_every
+        self.clock = FixedStepClock(speed=speed)
+        self.ticks = 0          # 進めたロジックの tick 数
+        self.frames = 0         # update が呼ばれた回数
+        self.winners = []       # AI同士の対戦で決着した試合の勝者
+        self.rng = random.Random(seed)
+
+        if not headless:
+            pyxel.init(width=WINDOW_WIDTH, height=WINDOW_HEIGHT, fps=FPS, title=TITLE)
+        # リソースファイルとフォントは、最初のフレームを表示してから少しずつ読み込む (描画しない場合は不要)
+        self.loader = AssetLoader()
+        if not headless:
+            self.loader.start()
+
+        self.replay_path = replay_path
+        self.network = network
+        self.scene = Scenes({
+            "title": lambda: TitleScene(self),
+            "game": self._create_game_scene,
+            "result": lambda: ResultScene(self),
+        })
+        # リプレイの再生とAI同士の対戦ではタイトル画面を挟まない
+        self.current_scene = self.scene["title" if replay_path is None and not ai_vs_ai else "game"]
+
+        if not headless:
+            pyxel.mouse(True)
+
+        if run and not headless:
+            pyxel.run(self.update, self.draw)
+
+    def _create_game_scene(self):
+        """ゲームシーン (リプレイファイルの指定があればリプレイの再生シーン、サーバの指定があれば通信対戦のシーン) を作る。"""
+        if self.network is not None:
+            from src.NetworkScene import NetworkScene
+            return NetworkScene(self, *self.network)
+        from src.GameScene import GameScene, ReplayScene
+        # 高速に進める場合は、戦闘演出を待たず、AIの探索も時間ではなく回数で区切る (結果を再現できる)
+        options = dict(turbo=True) if self.headless else {}
+        if self.replay_path is not None:
+            from src.Replay import Replay
+            return ReplayScene(self, Replay.load(self.replay_path), **options)
+        if self.turbo:
+            options["ai_iterations"] = AI_TICK_ITERATIONS
+        if self.ai_vs_ai:
+            from src.AI import create_strategy
+            from src.Engine import new_game
+            options["game"] = new_game(seed=self.rng.getrandbits(64))
+            options["player1"] = create_strategy(AI_VS_AI_STRATEGY, options["game"].seed)
+        return GameScene(self, **options)
+
+    def tick(self):
+        """ロジックを1 tick 進める。AI同士の対戦では、決着したら次の対戦を始める。"""
         self.current_scene.update()
-    
+        self.ticks += 1
+        if self.ai_vs_ai and self.current_scene is self.scene.get("result"):
+            self.winners.append(self.scene["game"].game.winner)
+            del self.scene["game"]
+            self.current_scene = self.scene["game"]
+
+    def run_headless(self, games=1, max_ticks=None):
+        """
+        描画せずに、できるだけ速くロジックを進める (QA の耐久テスト用)。
+
+        Args:
+            games (int, optional): AI同士の対戦で、この数の試合が決着するまで進める。
+            max_ticks (int, optional): 進める tick 数の上限。
+
+        Returns:
+            list[int | None]: 決着した試合の勝者。
+        """
+        target = len(self.winners) + games
+        start = self.ticks
+        while len(self.winners) < target and (max_ticks is None or self.ticks - start < max_ticks):
+            self.tick()
+        return self.winners
+
+    def update(self):
+        if not self.loader.done:
+            self.loader.step()
+        self.frames += 1
+        # ターボモードでは、実時間に応じた数の tick をまとめて進める
+        count = self.clock.ticks() if self.turbo else 1
+        if not PROFILER.enabled:
+            for _ in range(count):
+                self.tick()
+            return
+
+        # プロファイラが有効な場合は、シーンの update を計測し、F1/F2キーを受け付ける
+        PROFILER.begin_frame()
+        with PROFILER.section(f"{type(self.current_scene).__name__}.update"):
+            for _ in range(count):
+                self.tick()
+        if pyxel.btnp(pyxel.KEY_F1):
+            PROFILER.show_overlay = not PROFILER.show_overlay
+        if pyxel.btnp(pyxel.KEY_F2):
+            PROFILER.export_chrome_trace(PROFILE_TRACE_FILE)
+
     def draw(self):
+        # 描画を間引く場合は、前に描画した画面をそのまま残す
+        if self.first_frame_time is not None and self.frames % self.render_every:
+            return
         pyxel.cls(0)
-        self.current_scene.draw()
\ No newline at end of file
+        if not PROFILER.enabled:
+            self.current_scene.draw()
+        else:
+            with PROFILER.section(f"{type(self.current_scene).__name__}.draw"):
+                self.current_scene.draw()
+            PROFILER.end_frame()
+            PROFILER.draw_overlay()
+
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.start_time
+            if self.report_startup:
+                print(f"first frame: {self.first_frame_time * 1000:.1f} ms", file=sys.stderr)
@@ -0,0 +1,85 @@
+import threading
+import time
+import pyxel
+from src.settings import *
+from src.Font import FONTS
+
+
+class AssetLoader:
+    """
+    起動時に必要なアセット (リソースファイルとフォント) を、タイトル画面の表示中に少しずつ読み込む。
+
+    ファイルの読み出しはバックグラウンドのスレッドで行い、OSのファイルキャッシュに載せておく。
+    pyxel の関数はメインスレッドからしか呼べないため、pyxel.load と pyxel.Font の生成は
+    step でメインスレッドで行い、1フレームあたり ASSET_LOAD_BUDGET 秒に収まる分だけを読み込む。
+    """
+
+    def __init__(self, resource_file=RESOURCE_FILE, fonts=FONTS):
+        """
+        Args:
+            resource_file (str, optional): pyxel のリソースファイルのパス。
+            fonts (FontRegistry, optional): 前もって読み込むフォントの置き場所。
+        """
+        self.resource_file = resource_file
+        self.fonts = fonts
+        self.resource_loaded = False
+        self._resource_read = threading.Event()    # リソースファイルを読み出し終えたか
+        self._total = 0
+
+    def start(self):
+        """バックグラウンドでのファイルの読み出しを始める。"""
+        def read_resource():
+            try:
+                with open(self.resource_file, "rb") as f:
+                    while f.read(1 << 20):
+                        pass
+            except OSError:
+                # 存在しないファイルは、pyxel.load が例外を出す
+                pass
+            self._resource_read.set()
+
+        threading.Thread(target=read_resource, daemon=True).start()
+        self.fonts.prefetch()
+        self._total = 1 + len(self.fonts._pending)
+
+    @property
+    def remaining(self):
+        """まだ読み込んでいないアセットの数。"""
+        return (0 if self.resource_loaded else 1) + len(self.fonts._pending)
+
+    @property
+    def progress(self):
+        """読み込みの進み具合 (0.0〜1.0)。"""
+        return 1.0 - self.remaining / self._total if self._total else 1.0
+
+    @property
+    def done(self):
+        """全てのアセットを読み込み終えたかどうか。"""
+        return self.remaining == 0
+
+    def step(self, budget=ASSET_LOAD_BUDGET):
+        """
+        アセットを時間の予算に収まる分だけ読み込む。毎フレーム呼び出すことを想定している。
+        リソースファイルは、バックグラウンドでの読み出しが終わっていれば最初に読み込む。
+
+        Args:
+            budget (float, optional): 使ってよい時間 (秒)。
+        """
+        start = time.perf_counter()
+        loaded = False
+        if not self.resource_loaded and (self._resource_read.is_set() or not self.fonts._pending):
+            # フォントが全て読み込み済みなら、読み出しの完了を待たずにリソースを読み込む
+            self._load_resource()
+            loaded = True
+        self.fonts.warm_step(budget - (time.perf_counter() - start), force=not loaded)
+
+    def finish(self):
+        """残りのアセットをすぐに全て読み込む (ゲームを始める直前などに使う)。"""
+        if not self.resource_loaded:
+            self._load_resource()
+        while self.fonts.warm_step():
+            pass
+
+    def _load_resource(self):
+        pyxel.load(self.resource_file)
+        self.resource_loaded = True
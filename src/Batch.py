@@ -0,0 +1,270 @@
+import numpy as np
+from dataclasses import dataclass, field
+from src.settings import *
+from src.DataClass import *
+
+
+# 勝者を表すコード (0: プレイヤー1, 1: プレイヤー2)
+ONGOING = -1    # まだ決着がついていない
+DRAW = 2        # 両者のライフが同時に0以下になり、スピードも同じ
+
+
+@dataclass
+class CardTable:
+    """
+    カードのステータスを列ごとのNumPy配列として保持する (struct-of-arrays)。
+    各配列の添字は元のカードリストでの位置に対応する。
+    """
+    id: np.ndarray          # カードの種類を識別する番号
+    attack: np.ndarray      # 攻撃力
+    defense: np.ndarray     # 防御力
+    speed: np.ndarray       # スピード
+    soul_gain: np.ndarray = None    # 出したときの魂の数の増加量 (契約の穢れた魂。契約がなければ0)
+    _damage: list = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.soul_gain is None:
+            self.soul_gain = np.zeros(len(self.id), dtype=np.int32)
+        self._damage = [None] * (MAX_SOUL_POINT + 1)
+
+    @classmethod
+    def from_cards(cls, cards):
+        """
+        カードのリストから列形式のテーブルを生成する。
+
+        Args:
+            cards (list[Card]): 元になるカードのリスト。
+
+        Returns:
+            CardTable: 生成したテーブル。
+        """
+        return cls(
+            id=np.array([card.id for card in cards], dtype=np.int32),
+            attack=np.array([card.attack for card in cards], dtype=np.int32),
+            defense=np.array([card.defense for card in cards], dtype=np.int32),
+            speed=np.array([card.speed for card in cards], dtype=np.int32),
+            soul_gain=np.array([0 if card.contract is None else card.contract.soul for card in cards],
+                               dtype=np.int32),
+        )
+
+    def __len__(self):
+        return len(self.id)
+
+    def damage_table(self, soul_point=0):
+        """
+        魂の数に対応する、全てのカードの組み合わせの最終ダメージを事前計算した表を返す。
+        表は魂の数ごとに、その魂の数で初めて呼ばれたときに生成する (使わない魂の数の分は作らない)。
+
+        Args:
+            soul_point (int, optional): 攻撃側プレイヤーの魂の数 (MAX_SOUL_POINT 以下)。
+
+        Returns:
+            np.ndarray: [攻撃側の位置, 防御側の位置] で引ける最終ダメージの表。
+        """
+        damage = self._damage[soul_point]
+        if damage is None:
+            n = len(self)
+            damage = self._damage[soul_point] = batch_damage(self, np.arange(n)[:, None], np.arange(n)[None, :],
+                                                             soul_point)
+        return damage
+
+    def lookup_damage(self, attacker, defender, soul_point):
+        """
+        N組のカードの最終ダメージを、魂の数ごとの表から引く。
+
+        Args:
+            attacker (np.ndarray): 攻撃側カードのテーブル上の位置。
+            defender (np.ndarray): 防御側カードのテーブル上の位置。
+            soul_point (np.ndarray | int): 攻撃側プレイヤーの魂の数 (MAX_SOUL_POINT 以下)。
+
+        Returns:
+            np.ndarray: 最終ダメージ (int32)。
+        """
+        if np.ndim(soul_point) == 0:
+            return self.damage_table(int(soul_point))[attacker, defender]
+        damage = np.empty(attacker.shape, dtype=np.int32)
+        for value in np.unique(soul_point):
+            rows = soul_point == value
+            damage[rows] = self.damage_table(int(value))[attacker[rows], defender[rows]]
+        return damage
+
+
+@dataclass
+class BattleResult:
+    """N試合分の戦闘結果。各配列の添字は試合番号に対応する。"""
+    damage1: np.ndarray     # プレイヤー1がプレイヤー2に与えたダメージ
+    damage2: np.ndarray     # プレイヤー2がプレイヤー1に与えたダメージ
+    life1: np.ndarray       # 戦闘後のプレイヤー1のライフ
+    life2: np.ndarray       # 戦闘後のプレイヤー2のライフ
+    winner: np.ndarray      # 勝者 (0, 1, DRAW, 決着していなければ ONGOING)
+
+
+def batch_damage(table, attacker, defender, soul_point):
+    """
+    N組のカードについて最終ダメージをまとめて計算する。
+    計算式は Matchup.calc_damage と同じ。
+
+    Args:
+        table (CardTable): カードのテーブル。
+        attacker (np.ndarray): 攻撃側カードのテーブル上の位置。
+        defender (np.ndarray): 防御側カードのテーブル上の位置。
+        soul_point (np.ndarray | int): 攻撃側プレイヤーの魂の数。
+
+    Returns:
+        np.ndarray: 最終ダメージ (int32)。
+    """
+    base_damage = table.attack[attacker] - table.defense[defender]
+    damage = base_damage * (1 + np.asarray(soul_point) * 0.1)
+    return np.maximum(0, damage).astype(np.int32)
+
+
+def resolve_battles(table, card1, card2, soul1, soul2, life1, life2):
+    """
+    N試合分の戦闘を1回の呼び出しでまとめて解決する。
+
+    Args:
+        table (CardTable): カードのテーブル。
+        card1 (np.ndarray): プレイヤー1が選んだカードのテーブル上の位置。
+        card2 (np.ndarray): プレイヤー2が選んだカードのテーブル上の位置。
+        soul1 (np.ndarray | int): プレイヤー1の魂の数。
+        soul2 (np.ndarray | int): プレイヤー2の魂の数。
+        life1 (np.ndarray | int): 戦闘前のプレイヤー1のライフ。
+        life2 (np.ndarray | int): 戦闘前のプレイヤー2のライフ。
+
+    Returns:
+        BattleResult: ダメージ、戦闘後のライフ、勝者。
+    """
+    card1 = np.asarray(card1)
+    card2 = np.asarray(card2)
+    if np.max(soul1) <= MAX_SOUL_POINT and np.max(soul2) <= MAX_SOUL_POINT:
+        # 魂の数が表の範囲内なら事前計算した表を引くだけで済む
+        damage1 = table.lookup_damage(card1, card2, soul1)
+        damage2 = table.lookup_damage(card2, card1, soul2)
+    else:
+        damage1 = batch_damage(table, card1, card2, soul1)
+        damage2 = batch_damage(table, card2, card1, soul2)
+    new_life1 = life1 - damage2
+    new_life2 = life2 - damage1
+
+    # 勝敗判定: 両者のライフが同時に0以下になった場合はスピードが速い方の勝ち
+    dead1 = new_life1 <= 0
+    dead2 = new_life2 <= 0
+    speed1 = table.speed[card1]
+    speed2 = table.speed[card2]
+    winner = np.full(card1.shape, ONGOING, dtype=np.int8)
+    winner[dead2 & ~dead1] = 0
+    winner[dead1 & ~dead2] = 1
+    both = dead1 & dead2
+    winner[both & (speed1 > speed2)] = 0
+    winner[both & (speed1 < speed2)] = 1
+    winner[both & (speed1 == speed2)] = DRAW
+
+    return BattleResult(damage1, damage2, new_life1, new_life2, winner)
+
+
+def _draw_cards(deck, hand, rows, rng):
+    """
+    指定した試合の山札から1枚ずつ、残り枚数に応じた重みで引く。山札が空の試合は墓地を山札に戻してから引く。
+
+    Args:
+        deck (np.ndarray): [試合, カードの位置] の山札の残り枚数。引いた分が減らされる。
+        hand (np.ndarray): [試合, 手札の枠] の手札 (カードの位置)。補充する枠には len(table) を入れておく。
+        rows (np.ndarray): 引く試合の番号。
+        rng (np.random.Generator): 乱数生成器。
+
+    Returns:
+        np.ndarray: 引いたカードの位置。
+    """
+    n_cards = deck.shape[1]
+    counts = deck[rows]
+    total = counts.sum(axis=1)
+    empty = total == 0
+    if empty.any():
+        # 山札の構成 (各カード DECK_COPIES 枚) から手札を除いたものが墓地
+        held = np.zeros((int(empty.sum()), n_cards + 1), dtype=deck.dtype)
+        np.add.at(held, (np.arange(len(held))[:, None], hand[rows[empty]]), 1)
+        counts[empty] = DECK_COPIES - held[:, :n_cards]
+        total = counts.sum(axis=1)
+    r = rng.integers(0, total)
+    drawn = (counts.cumsum(axis=1) > r[:, None]).argmax(axis=1)
+    counts[np.arange(len(rows)), drawn] -= 1
+    deck[rows] = counts
+    return drawn
+
+
+def simulate_random_games(table, n_games, rng=None, max_turns=MAX_TURNS, turn_log=None):
+    """
+    両プレイヤーが手札からランダムにカードを選ぶ対戦をN試合同時にシミュレートする。
+    手札はテーブル上の位置の配列、山札は試合ごとの各カードの残り枚数として持ち、
+    Engine と同じく使ったカードの枠に山札から1枚補充する (山札が空なら墓地を戻す)。
+    魂の数は Engine と同じく戦闘の後に出したカードの分だけ増やし、次のターンからダメージに反映する。
+    契約のうち魂の数の増加以外 (利益、代償、2ターン以上の持続) はシミュレートしない。
+
+    Args:
+        table (CardTable): カードプールのテーブル。各プレイヤーの山札には各カードを DECK_COPIES 枚ずつ入れる。
+        n_games (int): 試合数。
+        rng (np.random.Generator, optional): 乱数生成器。
+        max_turns (int, optional): このターン数を超えた試合は引き分けとして打ち切る。
+        turn_log (list, optional): 指定した場合、ターンごとに (試合番号, カード1, カード2, 魂の数1, 魂の数2, 戦闘結果)
+            を追加する (統計の集計用。カードはテーブル上の位置、魂の数は戦闘の時点のもの)。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 各試合の勝者と決着までのターン数。
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    n_cards = len(table)
+    all_games = np.arange(n_games)
+    deck1 = np.full((n_games, n_cards), DECK_COPIES, dtype=np.int32)
+    deck2 = np.full((n_games, n_cards), DECK_COPIES, dtype=np.int32)
+    hand1 = np.full((n_games, HAND_SIZE), n_cards, dtype=np.int64)
+    hand2 = np.full((n_games, HAND_SIZE), n_cards, dtype=np.int64)
+    for slot in range(HAND_SIZE):
+        hand1[:, slot] = _draw_cards(deck1, hand1, all_games, rng)
+        hand2[:, slot] = _draw_cards(deck2, hand2, all_games, rng)
+    life1 = np.full(n_games, INITIAL_LIFE, dtype=np.int32)
+    life2 = np.full(n_games, INITIAL_LIFE, dtype=np.int32)
+    soul1 = np.zeros(n_games, dtype=np.int32)
+    soul2 = np.zeros(n_games, dtype=np.int32)
+    gains = table.soul_gain.any()
+    winner = np.full(n_games, ONGOING, dtype=np.int8)
+    turns = np.zeros(n_games, dtype=np.int32)
+
+    active = all_games
+    turn = 1
+    while len(active) and turn <= max_turns:
+        n = len(active)
+        slot1 = rng.integers(0, HAND_SIZE, size=n)
+        slot2 = rng.integers(0, HAND_SIZE, size=n)
+        card1 = hand1[active, slot1]
+        card2 = hand2[active, slot2]
+        before1, before2 = soul1[active], soul2[active]
+        if gains:
+            result = resolve_battles(
+                table, card1, card2, before1, before2, life1[active], life2[active])
+            soul1[active] = np.maximum(0, before1 + table.soul_gain[card1])
+            soul2[active] = np.maximum(0, before2 + table.soul_gain[card2])
+        else:
+            # 魂の数が増えるカードがなければ魂の数は0のままなので、1枚の表だけを引く
+            result = resolve_battles(
+                table, card1, card2, 0, 0, life1[active], life2[active])
+        life1[active] = result.life1
+        life2[active] = result.life2
+        if turn_log is not None:
+            turn_log.append((active, card1, card2, before1, before2, result))
+
+        finished = result.winner != ONGOING
+        winner[active[finished]] = result.winner[finished]
+        turns[active[finished]] = turn
+        active, slot1, slot2 = active[~finished], slot1[~finished], slot2[~finished]
+
+        # 使ったカードを墓地に送り、山札から1枚補充する
+        hand1[active, slot1] = n_cards
+        hand2[active, slot2] = n_cards
+        hand1[active, slot1] = _draw_cards(deck1, hand1, active, rng)
+        hand2[active, slot2] = _draw_cards(deck2, hand2, active, rng)
+        turn += 1
+
+    winner[active] = DRAW
+    turns[active] = max_turns
+    return winner, turns
@@ -0,0 +1,116 @@
+import pyxel
+from src.settings import *
+from src.DataClass import *
+from src.Profiler import profiled
+
+
+class CardAtlas:
+    """
+    カードの絵柄 (枠、イラスト、名前、爵位、ATK/DEF/SPD) を1枚の画像 (アトラス) にまとめて描いておく。
+    画面に出すときはアトラスから1回の blt で転送するだけで、毎フレーム文字を描き直さない。
+
+    カードプールの各カードの絵柄は build でまとめて描く。修正値を持つカード (DataClass.CardInstance) の絵柄は、
+    初めて表示するときに空き枠 (CARD_ATLAS_SPARE 枚分) に描き、枠が足りなくなったら古いものから描き直して使う。
+    """
+
+    def __init__(self, cards=MASTER_CARDS, font=None, art=None, spare=CARD_ATLAS_SPARE):
+        """
+        Args:
+            cards (list[Card], optional): カードプール。
+            font (pyxel.Font, optional): 名前とステータスの描画に使うフォント。
+            art (pyxel.Image, optional): カードのイラストを置いた画像。省略時はイメージバンク CARD_ART_BANK。
+            spare (int, optional): 修正値を持つカードのために空けておく枠の数。
+        """
+        self.cards = cards
+        self.font = font
+        self.art = art
+        self.columns = max(1, WINDOW_WIDTH // CARD_WIDTH)
+        self.capacity = len(cards) + spare
+        rows = (self.capacity + self.columns - 1) // self.columns
+        self.image = pyxel.Image(self.columns * CARD_WIDTH, rows * CARD_HEIGHT)
+        self.slots = {}         # 絵柄のキー → アトラス上の位置 (u, v)
+        self.art_index = {card.id: i for i, card in enumerate(cards)}  # id → イラストの並び順
+        self._spare = [self._uv(i) for i in range(len(cards), self.capacity)]   # 修正値を持つカード用の枠
+        self._spare_keys = [None] * spare   # 枠ごとに描いてある絵柄のキー
+        self._next_spare = 0
+        self.compose_count = 0  # 絵柄を描いた回数 (確認用)
+
+    def _uv(self, slot):
+        return (slot % self.columns) * CARD_WIDTH, (slot // self.columns) * CARD_HEIGHT
+
+    @staticmethod
+    def key(card):
+        """絵柄のキー。修正値を持たないカードは id、持つカードは修正後のステータスも含める。"""
+        if not card.modified:
+            return card.id
+        return (card.id, card.attack, card.defense, card.speed)
+
+    def build(self):
+        """カードプールの全てのカードの絵柄を描く。"""
+        for i, card in enumerate(self.cards):
+            u, v = self._uv(i)
+            self._compose(card, u, v)
+            self.slots[card.id] = (u, v)
+
+    def uv(self, card):
+        """
+        カードの絵柄のアトラス上の位置を返す。まだ描いていない絵柄ならここで描く。
+
+        Args:
+            card (Card | CardInstance): カード。
+
+        Returns:
+            tuple[int, int]: アトラス上の左上の座標。
+        """
+        key = self.key(card)
+        uv = self.slots.get(key)
+        if uv is not None:
+            return uv
+        if not card.modified and card.id in self.art_index:
+            uv = self._uv(self.art_index[card.id])
+        elif self._spare:
+            # 空き枠を順に使い回す (一番古い絵柄を追い出す)
+            i = self._next_spare
+            self._next_spare = (i + 1) % len(self._spare)
+            self.slots.pop(self._spare_keys[i], None)
+            self._spare_keys[i] = key
+            uv = self._spare[i]
+        else:
+            raise ValueError(f"no atlas slot for {card!r}")
+        self._compose(card, *uv)
+        self.slots[key] = uv
+        return uv
+
+    def draw(self, card, x, y):
+        """
+        カードの絵柄を画面に描画する (1回の blt)。
+
+        Args:
+            card (Card | CardInstance): カード。
+            x (int): 描画先のX座標。
+            y (int): 描画先のY座標。
+        """
+        u, v = self.uv(card)
+        pyxel.blt(x, y, self.image, u, v, CARD_WIDTH, CARD_HEIGHT, 0)
+
+    @profiled("CardAtlas._compose")
+    def _compose(self, card, u, v, color=10):
+        """アトラスの (u, v) にカードの絵柄を描く。"""
+        image = self.image
+        image.rect(u, v, CARD_WIDTH, CARD_HEIGHT, 0)
+        image.rectb(u, v, CARD_WIDTH, CARD_HEIGHT, color)
+        # イラスト (イメージバンクにカードプールの順に並べてある)
+        art = self.art if self.art is not None else pyxel.images[CARD_ART_BANK]
+        index = self.art_index.get(card.id, 0)
+        per_row = max(1, art.width // CARD_ART_WIDTH)
+        image.blt(u + 1, v + 19, art, (index % per_row) * CARD_ART_WIDTH, (index // per_row) * CARD_ART_HEIGHT,
+                  CARD_ART_WIDTH, CARD_ART_HEIGHT, 0)
+        # 名前、爵位、ステータス (修正値を持つステータスは色を変える)
+        image.text(u + 1, v + 1, card.name, color, self.font)
+        image.text(u + 1, v + 10, " ".join(card.title), color, self.font)
+        base = card.base
+        stat_color = [color if getattr(card, stat) == getattr(base, stat) else 11 for stat in CARD_STATS]
+        image.text(u + 1, v + 43, f"ATK:{card.attack}", stat_color[0], self.font)
+        image.text(u + 26, v + 43, f"DEF:{card.defense}", stat_color[1], self.font)
+        image.text(u + 1, v + 53, f"SPD:{card.speed}", stat_color[2], self.font)
+        self.compose_count += 1
@@ -0,0 +1,314 @@
+import argparse
+import csv
+import json
+import mmap
+import os
+import random
+
+import numpy as np
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+CARD_FILE = os.path.join(ASSETS_DIR, "cards.csv")               # 編集用のカードデータ
+DEBUG_CARD_FILE = os.path.join(ASSETS_DIR, "debug_cards.csv")   # デバッグ用のカードデータ
+
+TITLE_SEPARATOR = "|"   # CSV で複数の爵位を1つの列に書くときの区切り文字
+CONTRACT_FIELDS = ("benefit", "cost", "soul", "duration")   # 契約の列 (CSV では省略でき、空なら契約なし)
+CONTRACT_DEFAULTS = (0, 0, 0, 1)                            # 契約の列の一部だけを書いたときの残りの値
+
+# コンパイル済みのバイナリ形式
+#   ヘッダ: マジック(4バイト) バージョン(4バイト) カード数(4バイト) 文字列表の位置(4バイト)
+#   以降、カード1枚ごとに RECORD の固定長レコードが並び、その後ろに名前と爵位の UTF-8 文字列が続く
+#   契約のないカードは契約の持続ターン数を0にする
+BINARY_MAGIC = b"GGCD"
+BINARY_VERSION = 2  # 2: 契約の列を追加した
+HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("count", "<u4"), ("strings", "<u4")])
+RECORD = np.dtype([
+    ("id", "<i4"),
+    ("attack", "<i4"),
+    ("defense", "<i4"),
+    ("speed", "<i4"),
+    ("name_offset", "<u4"),
+    ("name_length", "<u2"),
+    ("title_offset", "<u4"),
+    ("title_length", "<u2"),
+    ("benefit", "<i4"),
+    ("cost", "<i4"),
+    ("soul", "<i4"),
+    ("duration", "<u2"),
+])
+STATS = ("attack", "defense", "speed")
+
+
+def _contract(values):
+    """
+    契約の列の値 (列名 → 値) から (benefit, cost, soul, duration) を作る。
+
+    Args:
+        values (dict[str, str | int]): 書かれている契約の列だけを含む辞書。
+
+    Returns:
+        tuple[int, int, int, int] | None: 契約。列が1つも書かれていなければ None。
+    """
+    if not values:
+        return None
+    unknown = set(values) - set(CONTRACT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown contract fields: {sorted(unknown)}")
+    return tuple(int(values.get(name, default)) for name, default in zip(CONTRACT_FIELDS, CONTRACT_DEFAULTS))
+
+
+class CardDatabase:
+    """
+    カードプールを列形式で保持し、id・爵位・ステータスの範囲で引けるようにしたデータベース。
+    CSV/JSON から読み込むほか、コンパイル済みのバイナリをメモリマップして読み込める。
+    Card オブジェクトは必要になったときに作り、同じカードには常に同じオブジェクトを返す。
+    """
+
+    def __init__(self, records, strings, card_factory):
+        """
+        Args:
+            records (np.ndarray): RECORD 型の配列。
+            strings (bytes | memoryview): 名前と爵位の文字列表。
+            card_factory (Callable): (id, name, title, attack, defense, speed, contract) から Card を作る関数。
+                contract は契約がなければ None、あれば (benefit, cost, soul, duration) のタプル。
+        """
+        self.records = records
+        self.strings = strings
+        self.card_factory = card_factory
+        self._cards = {}            # 行番号 → 生成済みの Card
+        self._title_index = None    # 爵位 → 行番号の配列 (初回の検索時に作る)
+        self._sorted = {}           # ステータス名 → 値の昇順に並べた行番号
+
+        # id → 行番号 (存在しない id は -1)
+        ids = records["id"]
+        size = int(ids.max()) + 1 if len(ids) else 0
+        self._row_of_id = np.full(size, -1, dtype=np.int64)
+        self._row_of_id[ids] = np.arange(len(ids))
+
+    @classmethod
+    def from_rows(cls, rows, card_factory):
+        """
+        (id, name, title の並び, attack, defense, speed[, contract]) の並びからデータベースを作る。
+        contract は省略するか None なら契約なし、あれば (benefit, cost, soul, duration)。
+
+        Args:
+            rows (Iterable[tuple]): カードのデータ。
+            card_factory (Callable): Card を作る関数。
+
+        Returns:
+            CardDatabase: 作成したデータベース。
+        """
+        rows = list(rows)
+        records = np.zeros(len(rows), dtype=RECORD)
+        strings = bytearray()
+        for i, (card_id, name, title, attack, defense, speed, *contract) in enumerate(rows):
+            contract = contract[0] if contract and contract[0] is not None else (0, 0, 0, 0)
+            if contract[3] < 0 or (contract[3] == 0 and any(contract)):
+                raise ValueError(f"invalid contract duration for card {card_id}: {contract[3]}")
+            name_bytes = name.encode()
+            title_bytes = TITLE_SEPARATOR.join(title).encode()
+            records[i] = (card_id, attack, defense, speed,
+                          len(strings), len(name_bytes),
+                          len(strings) + len(name_bytes), len(title_bytes), *contract)
+            strings += name_bytes + title_bytes
+        return cls(records, bytes(strings), card_factory)
+
+    @classmethod
+    def from_csv(cls, path, card_factory):
+        """
+        CSV ファイル (id,name,title,attack,defense,speed[,benefit,cost,soul,duration]) から読み込む。
+        爵位は | で区切る。契約の列は省略でき、行の契約の列が全て空ならそのカードは契約なしになる。
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [(int(row["id"]), row["name"], row["title"].split(TITLE_SEPARATOR),
+                     int(row["attack"]), int(row["defense"]), int(row["speed"]),
+                     _contract({name: row.get(name) for name in CONTRACT_FIELDS if row.get(name)}))
+                    for row in csv.DictReader(f)]
+        return cls.from_rows(rows, card_factory)
+
+    @classmethod
+    def from_json(cls, path, card_factory):
+        """JSON ファイル (Card と同じキーを持つオブジェクトの配列。契約は contract キーのオブジェクト) から読み込む。"""
+        with open(path, encoding="utf-8") as f:
+            rows = [(c["id"], c["name"], c["title"], c["attack"], c["defense"], c["speed"],
+                     _contract(c.get("contract") or {}))
+                    for c in json.load(f)]
+        return cls.from_rows(rows, card_factory)
+
+    @classmethod
+    def open_compiled(cls, path, card_factory):
+        """
+        コンパイル済みのバイナリをメモリマップして読み込む。
+        レコードはファイルの内容をそのまま参照するため、カードの枚数が多くても読み込みはすぐに終わる。
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(data, dtype=HEADER, count=1)[0]
+        if header["magic"] != BINARY_MAGIC or header["version"] != BINARY_VERSION:
+            raise ValueError(f"{path} is not a compiled card database")
+        records = np.frombuffer(data, dtype=RECORD, count=int(header["count"]), offset=HEADER.itemsize)
+        strings = memoryview(data)[int(header["strings"]):]
+        return cls(records, strings, card_factory)
+
+    @classmethod
+    def load(cls, path, card_factory):
+        """
+        拡張子に応じてカードデータを読み込む。
+        CSV/JSON の隣に同名の .bin があり、元のファイルより新しければそちらをメモリマップして使う
+        (古い形式の .bin なら元のファイルを読む)。
+
+        Args:
+            path (str): カードデータのパス (.csv, .json, .bin)。
+            card_factory (Callable): Card を作る関数。
+
+        Returns:
+            CardDatabase: 読み込んだデータベース。
+        """
+        base, ext = os.path.splitext(path)
+        compiled = base + ".bin"
+        if ext == ".bin":
+            return cls.open_compiled(compiled, card_factory)
+        if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+            try:
+                return cls.open_compiled(compiled, card_factory)
+            except ValueError:
+                pass    # 形式の古いバイナリは使わない (コンパイルし直すまで元のファイルを読む)
+        if ext == ".json":
+            return cls.from_json(path, card_factory)
+        return cls.from_csv(path, card_factory)
+
+    def compile(self, path):
+        """
+        メモリマップで読み込めるバイナリ形式で保存する。
+
+        Args:
+            path (str): 保存先のパス。
+        """
+        header = np.zeros(1, dtype=HEADER)
+        header[0] = (BINARY_MAGIC, BINARY_VERSION, len(self.records),
+                     HEADER.itemsize + self.records.nbytes)
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(np.ascontiguousarray(self.records).tobytes())
+            f.write(bytes(self.strings))
+
+    def __len__(self):
+        return len(self.records)
+
+    def _string(self, offset, length):
+        return bytes(self.strings[offset:offset + length]).decode()
+
+    def _card(self, row):
+        """行番号の Card を返す。初めて使う行なら作成する。"""
+        card = self._cards.get(row)
+        if card is None:
+            r = self.records[row]
+            title = self._string(int(r["title_offset"]), int(r["title_length"]))
+            contract = None
+            if r["duration"]:
+                contract = tuple(int(r[name]) for name in CONTRACT_FIELDS)
+            card = self.card_factory(
+                int(r["id"]),
+                self._string(int(r["name_offset"]), int(r["name_length"])),
+                tuple(title.split(TITLE_SEPARATOR)) if title else (),
+                int(r["attack"]), int(r["defense"]), int(r["speed"]), contract)
+            self._cards[row] = card
+        return card
+
+    def cards(self):
+        """全てのカードをファイルの順に返す。"""
+        return [self._card(row) for row in range(len(self.records))]
+
+    def get(self, card_id):
+        """
+        id でカードを引く。
+
+        Args:
+            card_id (int): カードの id。
+
+        Returns:
+            Card | None: カード。存在しなければ None。
+        """
+        if not 0 <= card_id < len(self._row_of_id):
+            return None
+        row = int(self._row_of_id[card_id])
+        return None if row < 0 else self._card(row)
+
+    def by_title(self, title):
+        """
+        爵位でカードを引く。
+
+        Args:
+            title (str): 爵位 ("king", "Duke" など)。
+
+        Returns:
+            list[Card]: その爵位を持つカード。
+        """
+        if self._title_index is None:
+            index = {}
+            for row, r in enumerate(self.records):
+                text = self._string(int(r["title_offset"]), int(r["title_length"]))
+                for t in text.split(TITLE_SEPARATOR) if text else []:
+                    index.setdefault(t, []).append(row)
+            self._title_index = {t: np.array(rows) for t, rows in index.items()}
+        return [self._card(int(row)) for row in self._title_index.get(title, ())]
+
+    def _rows_in_range(self, stat, low, high):
+        """ステータスが low 以上 high 以下の行番号を、値でソートした索引から二分探索で求める。"""
+        order = self._sorted.get(stat)
+        if order is None:
+            order = self._sorted[stat] = np.argsort(self.records[stat], kind="stable")
+        values = self.records[stat][order]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        end = len(values) if high is None else np.searchsorted(values, high, side="right")
+        return order[start:end]
+
+    def filter(self, **ranges):
+        """
+        ステータスの範囲でカードを絞り込む。
+
+            db.filter(attack=(3, None), speed=(None, 65))   # 攻撃力3以上かつスピード65以下
+
+        Args:
+            **ranges: ステータス名 (attack, defense, speed) → (下限, 上限)。None は制限なし。
+
+        Returns:
+            list[Card]: 条件に合うカード (ファイルの順)。
+        """
+        rows = None
+        for stat, (low, high) in ranges.items():
+            if stat not in STATS:
+                raise ValueError(f"unknown stat: {stat}")
+            matched = self._rows_in_range(stat, low, high)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if rows is None:
+            rows = np.arange(len(self.records))
+        return [self._card(int(row)) for row in np.sort(rows)]
+
+    def sample(self, k, rng=random):
+        """
+        カードを k 枚、重複ありでランダムに選ぶ。
+
+        Args:
+            k (int): 枚数。
+            rng (random.Random, optional): 乱数生成器。
+
+        Returns:
+            list[Card]: 選んだカード。
+        """
+        n = len(self.records)
+        return [self._card(rng.randrange(n)) for _ in range(k)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="カードデータをメモリマップ用のバイナリにコンパイルする")
+    parser.add_argument("sources", nargs="*", default=[CARD_FILE, DEBUG_CARD_FILE])
+    args = parser.parse_args()
+
+    for source in args.sources:
+        base, ext = os.path.splitext(source)
+        loader = CardDatabase.from_json if ext == ".json" else CardDatabase.from_csv
+        database = loader(source, lambda *fields: fields)
+        database.compile(base + ".bin")
+        print(f"{source} -> {base}.bin ({len(database)} cards)")
@@ -1,17 +1,140 @@
 from src.settings import *
+from src.CardDB import CardDatabase, CARD_FILE, DEBUG_CARD_FILE
+from src.Effects import LingeringEffects
+import random
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Contract:
+    benefit: int = 0        # 利益 (自分のライフの回復量)
+    cost: int = 0           # 代償 (自分のライフの減少量)
+    soul: int = 0           # 穢れた魂の増加量
+    duration: int = 1       # 契約の効果が続くターン数 (1ならそのターンだけ)
+
+
+@dataclass(frozen=True, slots=True)
 class Card:
+    """
+    カードの定義 (変更不可)。同じ種類のカードは、カードプール・山札・手札・墓地のどこでも同じオブジェクトを共有する。
+    バフなどでステータスを変えるときは、定義を書き換えずに CardInstance で修正値を重ねる。
+    """
     id: int                 # カードの種類を識別する番号
     name: str               # カードの名前
-    title: List[str]        # 爵位
+    title: Tuple[str, ...]  # 爵位
     attack: int             # 攻撃力
     defense: int            # 防御力
     speed: int              # スピード
-    # TODO: 契約(利益、代償、穢れた魂の増加量)
+    contract: Optional[Contract] = None  # 契約 (利益、代償、穢れた魂の増加量)
+
+    modified = False        # 修正値を持つかどうか (定義は持たない。CardInstance と区別せずに確認するため)
+
+    @property
+    def base(self):
+        """修正値を重ねる前のカードの定義 (定義自身)。"""
+        return self
+
+
+CARD_STATS = ("attack", "defense", "speed")     # CardInstance で修正できるステータス
+
+
+class CardInstance:
+    """
+    カードの定義に、ステータスの修正値を重ねたカード1枚。Card と同じ属性で読める。
+
+    定義への参照と、修正値 (ステータス名 → 加算する値) の疎な辞書だけを持ち、修正値がなければ辞書も持たない。
+    修正後のステータスは最初に読まれたときに計算し、修正値が変わるまで使い回す。
+    修正値を持つカードのダメージはマッチアップ表を使わずに計算する (Matchup.lookup_damage)。
+    """
+    __slots__ = ("base", "_modifiers", "_stats")
+
+    def __init__(self, base, modifiers=None):
+        """
+        Args:
+            base (Card | CardInstance): カードの定義 (CardInstance を渡した場合はその定義を使う)。
+            modifiers (dict[str, int], optional): ステータス名 ("attack", "defense", "speed") → 加算する値。
+        """
+        self.base = base.base
+        self._modifiers = None
+        self._stats = None      # 修正後の (攻撃力, 防御力, スピード)。修正値が変わったら None に戻す
+        for stat, amount in (modifiers or {}).items():
+            self.modify(stat, amount)
+
+    @property
+    def id(self):
+        return self.base.id
+
+    @property
+    def name(self):
+        return self.base.name
+
+    @property
+    def title(self):
+        return self.base.title
+
+    @property
+    def contract(self):
+        return self.base.contract
+
+    @property
+    def attack(self):
+        """修正後の攻撃力。"""
+        return (self._stats or self._compute())[0]
+
+    @property
+    def defense(self):
+        """修正後の防御力。"""
+        return (self._stats or self._compute())[1]
+
+    @property
+    def speed(self):
+        """修正後のスピード。"""
+        return (self._stats or self._compute())[2]
+
+    @property
+    def modified(self):
+        """修正値を持つかどうか。"""
+        return self._modifiers is not None
+
+    @property
+    def modifiers(self):
+        """修正値 (ステータス名 → 加算する値) の複製。"""
+        return dict(self._modifiers or {})
+
+    def modify(self, stat, amount):
+        """
+        ステータスに修正値を加える。合計が0になった修正値は取り除く。
+
+        Args:
+            stat (str): ステータス名 ("attack", "defense", "speed")。
+            amount (int): 加算する値 (マイナスなら減らす)。
+        """
+        if stat not in CARD_STATS:
+            raise ValueError(f"unknown stat: {stat}")
+        modifiers = self._modifiers or {}
+        total = modifiers.get(stat, 0) + amount
+        if total:
+            modifiers[stat] = total
+        else:
+            modifiers.pop(stat, None)
+        self._modifiers = modifiers or None
+        self._stats = None
+
+    def clear(self):
+        """全ての修正値を取り除く。"""
+        self._modifiers = None
+        self._stats = None
+
+    def _compute(self):
+        base, modifiers = self.base, self._modifiers or {}
+        self._stats = (base.attack + modifiers.get("attack", 0),
+                       base.defense + modifiers.get("defense", 0),
+                       base.speed + modifiers.get("speed", 0))
+        return self._stats
+
+    def __repr__(self):
+        return f"CardInstance({self.base.name}, modifiers={self._modifiers or {}})"
 
 
 @dataclass
@@ -19,7 +142,7 @@ class Player:
     name: str               # プレイヤーの名前
     life: int = 15          # プレイヤーの体力
     hand: List[Card] = field(default_factory=list)      # プレイヤーの手札
-    deck: List[Card] = field(default_factory=list)      # プレイヤーのデッキ
+    deck: "Deck" = None     # プレイヤーの山札 (Deck.Deck)
     graveyard: List[Card] = field(default_factory=list)  # 使用済みのカード
     field_card: Card = None
     soul_point: int = 0
@@ -34,24 +157,23 @@ class GameData:
             Player(name="Player 2"),
         ]
     )
-    log: List[str] = field(default_factory=list)
-
-
-MASTER_CARDS = [
-    Card(1, "バエル", ["king"], 1, 5, 72),
-    Card(2, "アガレス", ["Duke"], 2, 4, 71),
-    Card(3, "ウェサゴ", ["Prince"], 3, 3, 70),
-    Card(4, "ガミジン", ["Marquess"], 4, 2, 69),
-    Card(5, "マルバス", ["President"], 5, 1, 68),
-    Card(6, "ウァレフォル", ["Duke"], 1, 1, 67),
-    Card(7, "アモン", ["Marquess"], 2, 2, 66),
-    Card(8, "バルバトス", ["Duke"], 3, 3, 65),
-    Card(9, "パイモン", ["king"], 4, 4, 64),
-    Card(10, "ブエル", ["President"], 5, 5, 63),
-]
-
-
-DEBUG_CARDS = [
-    Card(0, "Daemon", ["Debug"], 0, 0, 0),
-    Card(99, "デーモンコア", ["Debug"], 99, 99, 99),
-]
+    log: List[tuple] = field(default_factory=list)  # 対戦の記録 (ターン, フェーズ, 種類, 内容) (GameLog.GameLogger が追加する)
+    phase: str = "start"    # 現在のフェーズ (Engine.PHASES のいずれか、決着後は "result")
+    winner: Optional[int] = None  # 勝者のプレイヤー番号 (引き分け・未決着なら None)
+    seed: Optional[int] = None    # 乱数のシード (リプレイで対戦を再現するのに使う)
+    rng: Optional[random.Random] = field(default=None, repr=False, compare=False)  # ゲームが持つ唯一の乱数列
+    lingering: LingeringEffects = field(default_factory=LingeringEffects)  # 持続中の効果 (Effects.add_lingering で登録する)
+    cards: List[Card] = field(default_factory=lambda: MASTER_CARDS, repr=False, compare=False)  # カードプール (ダメージの計算に使う)
+
+
+def card_from_record(card_id, name, title, attack, defense, speed, contract=None):
+    """CardDB のレコードから Card を作る (契約は (benefit, cost, soul, duration) のタプルで受け取る)。"""
+    return Card(card_id, name, title, attack, defense, speed, None if contract is None else Contract(*contract))
+
+
+# カードプールは assets のカードデータから読み込む (CardDB.CardDatabase で id・爵位・ステータスの範囲から引ける)
+CARD_DB = CardDatabase.load(CARD_FILE, card_from_record)
+MASTER_CARDS = CARD_DB.cards()
+
+DEBUG_CARD_DB = CardDatabase.load(DEBUG_CARD_FILE, card_from_record)
+DEBUG_CARDS = DEBUG_CARD_DB.cards()
@@ -0,0 +1,131 @@
+import random
+from src.settings import *
+from src.DataClass import *
+
+
+class Deck:
+    """
+    プレイヤーごとの有限の山札。
+
+    山札は配列の先頭 size 枚として持ち、引くたびに残りの中から1枚を選んで末尾と入れ替える
+    (遅延 Fisher–Yates シャッフル)。最初にまとめてシャッフルしないため、生成もドローも O(1) で済む。
+    残りのカードはカードプールの位置ごとの枚数 (多重集合) としても保持し、ドローと墓地の戻しで差分だけ更新する。
+    そのため、山札をコピーせずに各カードを引く確率や期待値を求められる。
+    """
+
+    def __init__(self, card_ids, cards=MASTER_CARDS):
+        """
+        Args:
+            card_ids (Iterable[int]): 山札に入れるカードのid (同じidを複数入れてよい)。
+            cards (list[Card], optional): カードプール。ダメージ表の参照やidからの変換に使う。
+        """
+        self.cards = cards
+        self.slot = {card.id: i for i, card in enumerate(cards)}  # id → カードプール上の位置
+        by_id = {card.id: card for card in cards}
+        self.pile = [by_id[card_id] for card_id in card_ids]
+        self.size = len(self.pile)      # 山札の残り枚数 (pile の先頭 size 枚が山札)
+        self.counts = [0] * len(cards)  # カードプールの位置ごとの残り枚数
+        for card in self.pile:
+            self.counts[self.slot[card.id]] += 1
+        self.composition = tuple(self.counts)  # 山札の構成 (手札・場・墓地も含めた全体の枚数)
+
+    @classmethod
+    def standard(cls, cards=MASTER_CARDS, copies=DECK_COPIES):
+        """
+        カードプールの各カードを同じ枚数ずつ入れた山札を作る。
+
+        Args:
+            cards (list[Card], optional): カードプール。
+            copies (int, optional): 1種類あたりの枚数。
+
+        Returns:
+            Deck: 作成した山札。
+        """
+        return cls.from_counts([copies] * len(cards), cards)
+
+    @classmethod
+    def from_counts(cls, counts, cards=MASTER_CARDS):
+        """
+        カードプールの位置ごとの枚数から山札を作る。
+
+        Args:
+            counts (Iterable[int]): カードプールの位置ごとの枚数。
+            cards (list[Card], optional): カードプール。
+
+        Returns:
+            Deck: 作成した山札。
+        """
+        return cls([card.id for card, count in zip(cards, counts) for _ in range(count)], cards)
+
+    def __len__(self):
+        return self.size
+
+    def draw(self, rng=random):
+        """
+        山札からランダムに1枚引く。
+
+        Args:
+            rng (random.Random, optional): 乱数生成器。
+
+        Returns:
+            Card | None: 引いたカード。山札が空なら None。
+        """
+        if self.size == 0:
+            return None
+        pile = self.pile
+        last = self.size - 1
+        i = rng.randrange(self.size)
+        pile[i], pile[last] = pile[last], pile[i]
+        card = pile[last]
+        self.size = last
+        self.counts[self.slot[card.id]] -= 1
+        return card
+
+    def recycle(self, cards):
+        """
+        カード (墓地など) を山札に戻す。戻したカードは次のドローから引かれうる。
+
+        Args:
+            cards (Iterable[Card]): 山札に戻すカード。
+        """
+        pile = self.pile
+        for card in cards:
+            if self.size < len(pile):
+                pile[self.size] = card
+            else:
+                pile.append(card)
+            self.size += 1
+            self.counts[self.slot[card.id]] += 1
+
+    def count(self, card_id):
+        """山札に残っている、指定したidのカードの枚数を返す。"""
+        return self.counts[self.slot[card_id]]
+
+    def probability(self, card_id):
+        """次のドローで指定したidのカードを引く確率を返す。"""
+        return self.counts[self.slot[card_id]] / self.size if self.size else 0.0
+
+    def probabilities(self):
+        """次のドローでカードプールの各カードを引く確率を、カードプールの順に返す。"""
+        size = self.size
+        return [count / size for count in self.counts] if size else [0.0] * len(self.counts)
+
+    def expected(self, values):
+        """
+        次に引くカードについての期待値を求める。
+
+        Args:
+            values (Sequence[float]): カードプールの順に並べた各カードの値。
+
+        Returns:
+            float: 期待値。山札が空なら 0。
+        """
+        if not self.size:
+            return 0.0
+        return sum(count * value for count, value in zip(self.counts, values)) / self.size
+
+    def copy(self):
+        """同じ内容の山札を作る (ドローの順序は引き継がない)。"""
+        deck = Deck.from_counts(self.counts, self.cards)
+        deck.composition = self.composition
+        return deck
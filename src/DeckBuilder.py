@@ -0,0 +1,260 @@
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.AI import create_strategy
+from src.Tournament import chunk_seed
+
+
+MAX_COPIES = 2 * DECK_COPIES                    # 1種類のカードを山札に入れられる枚数の上限
+
+# 評価に使う相手 (戦略名, 山札の構成)。構成が None なら各カード DECK_COPIES 枚
+REFERENCE_OPPONENTS = (("greedy", None), ("random", None))
+
+
+@dataclass
+class Fitness:
+    """ある山札の構成の評価 (シミュレーションした試合の集計)。"""
+    games: int = 0      # 試合数
+    wins: int = 0       # 勝利数
+    draws: int = 0      # 引き分けの数
+
+    def merge(self, other):
+        """別の集計をこの集計に足し合わせる。"""
+        self.games += other.games
+        self.wins += other.wins
+        self.draws += other.draws
+
+    @property
+    def score(self):
+        """勝ちを1、引き分けを0.5とした平均得点。"""
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.0
+
+
+def evaluate_chunk(deck, strategy, opponents, n_games, seed, cards=MASTER_CARDS):
+    """
+    山札の構成を、相手の一覧と順番に n_games 試合対戦させて評価する。ワーカープロセスで呼び出される。
+
+    Args:
+        deck (tuple[int, ...]): 評価する山札の構成 (カードプールの位置ごとの枚数)。プレイヤー1が使う。
+        strategy (str): 評価する山札を使う戦略名 (STRATEGIES のキー)。
+        opponents (tuple[tuple[str, tuple | None], ...]): 相手の (戦略名, 山札の構成) の一覧。
+        n_games (int): 試合数。
+        seed (int): このチャンク用のシード。
+        cards (list[Card], optional): カードプール。構成はこのカードプールの位置ごとの枚数として読む。
+
+    Returns:
+        Fitness: このチャンクの集計。
+    """
+    rng = random.Random(seed)
+    fitness = Fitness()
+    player = create_strategy(strategy, rng.getrandbits(64))
+    opponent_strategies = [create_strategy(name, rng.getrandbits(64)) for name, _ in opponents]
+    for i in range(n_games):
+        _, opponent_deck = opponents[i % len(opponents)]
+        game = new_game(cards=cards, seed=rng.getrandbits(64), decks=(deck, opponent_deck))
+        play_match(player, opponent_strategies[i % len(opponents)], rng, game)
+        fitness.games += 1
+        if game.winner == 0:
+            fitness.wins += 1
+        elif game.winner is None:
+            fitness.draws += 1
+    return fitness
+
+
+class DeckBuilder:
+    """
+    遺伝的アルゴリズムで強い山札の構成を探す。
+
+    山札の構成はカードプールの位置ごとの枚数のタプルで表す。評価 (対戦のシミュレーション) が最も重いため、
+    構成ごとの集計をキャッシュし、同じ構成は二度とシミュレーションしない。
+    世代をまたいで生き残った構成は、キャッシュ済みの試合に足りない分だけ追加でシミュレーションする。
+    """
+
+    def __init__(self, cards=MASTER_CARDS, strategy="greedy", opponents=REFERENCE_OPPONENTS,
+                 deck_size=None, max_copies=MAX_COPIES, seed=0):
+        """
+        Args:
+            cards (list[Card], optional): カードプール。
+            strategy (str, optional): 評価する山札を使う戦略名。
+            opponents (tuple, optional): 相手の (戦略名, 山札の構成) の一覧。
+            deck_size (int, optional): 山札の枚数。省略時はカードプールの各カードを DECK_COPIES 枚ずつ入れた枚数。
+            max_copies (int, optional): 1種類のカードを入れられる枚数の上限。
+            seed (int, optional): 探索と評価のシード。
+        """
+        self.cards = cards
+        self.strategy = strategy
+        self.opponents = tuple(opponents)
+        self.deck_size = DECK_COPIES * len(cards) if deck_size is None else deck_size
+        self.max_copies = max_copies
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.cache = {}         # 構成 → Fitness
+        self._chunks = {}       # 構成 → 評価に使ったチャンクの数 (次のチャンクのシードに使う)
+        self._index = {}        # 構成 → キャッシュに登録した順番 (シードの生成に使う)
+
+    def random_deck(self):
+        """上限を守りながらランダムに山札の構成を作る。"""
+        counts = [0] * len(self.cards)
+        for _ in range(self.deck_size):
+            slot = self.rng.choice([i for i, c in enumerate(counts) if c < self.max_copies])
+            counts[slot] += 1
+        return tuple(counts)
+
+    def mutate(self, deck):
+        """1枚を別のカードに入れ替える。"""
+        counts = list(deck)
+        source = self.rng.choice([i for i, c in enumerate(counts) if c > 0])
+        target = self.rng.choice([i for i, c in enumerate(counts) if c < self.max_copies and i != source])
+        counts[source] -= 1
+        counts[target] += 1
+        return tuple(counts)
+
+    def crossover(self, deck1, deck2):
+        """2つの構成の各カードの枚数をランダムに受け継ぎ、枚数が山札の枚数になるよう調整する。"""
+        counts = [self.rng.choice(pair) for pair in zip(deck1, deck2)]
+        while sum(counts) > self.deck_size:
+            counts[self.rng.choice([i for i, c in enumerate(counts) if c > 0])] -= 1
+        while sum(counts) < self.deck_size:
+            counts[self.rng.choice([i for i, c in enumerate(counts) if c < self.max_copies])] += 1
+        return tuple(counts)
+
+    def evaluate(self, decks, n_games, workers=None, chunk_size=200):
+        """
+        各構成の試合数が n_games になるまで、足りない分だけプロセスプールでシミュレーションする。
+
+        Args:
+            decks (Iterable[tuple[int, ...]]): 評価する構成。
+            n_games (int): 構成1つあたりに必要な試合数。
+            workers (int, optional): ワーカープロセス数。省略時はCPUのコア数。
+            chunk_size (int, optional): 1チャンクあたりの試合数。
+
+        Returns:
+            int: 新しくシミュレーションした試合数。
+        """
+        jobs = []
+        for deck in dict.fromkeys(decks):
+            fitness = self.cache.setdefault(deck, Fitness())
+            index = self._index.setdefault(deck, len(self._index))
+            missing = n_games - fitness.games
+            while missing > 0:
+                size = min(chunk_size, missing)
+                chunk = self._chunks.get(deck, 0)
+                self._chunks[deck] = chunk + 1
+                jobs.append((deck, size, chunk_seed(self.seed, index, chunk)))
+                missing -= size
+        if not jobs:
+            return 0
+
+        simulated = 0
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = {executor.submit(evaluate_chunk, deck, self.strategy, self.opponents, size, seed,
+                                       self.cards): deck
+                       for deck, size, seed in jobs}
+            for future in as_completed(futures):
+                result = future.result()
+                self.cache[futures[future]].merge(result)
+                simulated += result.games
+        return simulated
+
+    def run(self, generations=20, population=24, n_games=400, elite=4, mutation=0.3,
+            workers=None, on_generation=None):
+        """
+        遺伝的アルゴリズムを実行する。
+
+        Args:
+            generations (int, optional): 世代数。
+            population (int, optional): 1世代の構成の数。
+            n_games (int, optional): 構成1つあたりの試合数。上位の構成は世代が進むごとに試合数を増やして評価を確かめる。
+            elite (int, optional): そのまま次の世代に残す上位の構成の数。
+            mutation (float, optional): 子に突然変異を加える確率。
+            workers (int, optional): ワーカープロセス数。
+            on_generation (Callable, optional): 世代ごとに (世代番号, 上位の構成と評価のリスト, シミュレーションした試合数) を受け取る関数。
+
+        Returns:
+            list[tuple[tuple[int, ...], Fitness]]: 評価の高い順に並べた全ての評価済みの構成。
+        """
+        standard = (DECK_COPIES,) * len(self.cards)
+        decks = [standard] + [self.random_deck() for _ in range(population - 1)]
+        for generation in range(generations):
+            simulated = self.evaluate(decks, n_games, workers)
+            ranked = sorted(dict.fromkeys(decks), key=lambda d: self.cache[d].score, reverse=True)
+            # 上位の構成は試合数を増やして評価の誤差を小さくする (キャッシュ済みの試合はそのまま使う)
+            simulated += self.evaluate(ranked[:elite], n_games * (generation + 2), workers)
+            ranked.sort(key=lambda d: self.cache[d].score, reverse=True)
+            if on_generation is not None:
+                on_generation(generation, [(d, self.cache[d]) for d in ranked[:elite]], simulated)
+
+            # 上位の半分から親を選び、交叉と突然変異で次の世代を作る
+            parents = ranked[:max(2, len(ranked) // 2)]
+            decks = ranked[:elite]
+            while len(decks) < population:
+                child = self.crossover(self.rng.choice(parents), self.rng.choice(parents))
+                if self.rng.random() < mutation:
+                    child = self.mutate(child)
+                decks.append(child)
+        return self.ranking()
+
+    def ranking(self):
+        """評価済みの全ての構成を評価の高い順に返す。"""
+        return sorted(self.cache.items(), key=lambda item: item[1].score, reverse=True)
+
+    def card_contributions(self):
+        """
+        評価済みの全ての構成から、各カードを1枚増やしたときの得点の変化を推定する。
+        得点を各カードの枚数で重み付き最小二乗法により回帰する (重みは試合数)。
+
+        Returns:
+            list[tuple[Card, float]]: カードと、1枚あたりの得点への寄与 (カードプールの平均との差)。
+        """
+        decks = [deck for deck, fitness in self.cache.items() if fitness.games]
+        if len(decks) < 2:
+            return [(card, 0.0) for card in self.cards]
+        x = np.array(decks, dtype=float)
+        y = np.array([self.cache[deck].score for deck in decks])
+        w = np.sqrt([self.cache[deck].games for deck in decks])
+        # 枚数の合計は一定なので切片は不要 (各カードの係数が「その1枚分の得点」になる)
+        coef, *_ = np.linalg.lstsq(x * w[:, None], y * w, rcond=None)
+        coef -= coef.mean()
+        return list(zip(self.cards, coef.tolist()))
+
+
+def print_deck(deck, fitness, cards=MASTER_CARDS):
+    """構成と評価を1行で表示する。"""
+    contents = " ".join(f"{card.name}x{count}" for card, count in zip(cards, deck) if count)
+    print(f"{fitness.score:.3f} ({fitness.games} games) {contents}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="遺伝的アルゴリズムによる山札の構成の最適化")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=24)
+    parser.add_argument("--games", type=int, default=400, help="構成1つあたりの試合数")
+    parser.add_argument("--strategy", default="greedy", help="評価する山札を使う戦略")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=5, help="表示する上位の構成の数")
+    args = parser.parse_args()
+
+    builder = DeckBuilder(strategy=args.strategy, seed=args.seed)
+
+    def report(generation, best, simulated):
+        deck, fitness = best[0]
+        print(f"generation {generation}: best {fitness.score:.3f} "
+              f"({len(builder.cache)} decks cached, {simulated} games simulated)")
+
+    ranking = builder.run(args.generations, args.population, args.games, workers=args.workers,
+                          on_generation=report)
+    print()
+    for deck, fitness in ranking[:args.top]:
+        print_deck(deck, fitness)
+    print()
+    for card, contribution in sorted(builder.card_contributions(), key=lambda item: -item[1]):
+        print(f"{card.id:>3} {card.name}: {contribution:+.4f}")
@@ -0,0 +1,198 @@
+import heapq
+
+
+# 効果の種類
+ATTACK = "attack"   # 戦闘ダメージ。量は解決する時点の魂の数と場のカードから求める (解決する関数は Engine が登録する)
+DAMAGE = "damage"   # 対象のライフを減らす (契約の代償)
+HEAL = "heal"       # 対象のライフを回復する (契約の利益)
+SOUL = "soul"       # 対象の魂の数を増やす (穢れた魂の増加)
+
+
+class Effect:
+    """
+    解決キューに積む効果1つ。
+    スピードが速い効果から解決し、同じスピードなら発生させたプレイヤーの番号順、さらに積んだ順に解決する。
+    """
+    __slots__ = ("kind", "owner", "target", "amount", "speed", "source")
+
+    def __init__(self, kind, owner, target, amount, speed, source=None):
+        """
+        Args:
+            kind (str): 効果の種類 (DAMAGE, HEAL, SOUL)。
+            owner (int): 効果を発生させたプレイヤーの番号。
+            target (int): 効果の対象のプレイヤーの番号。
+            amount (int | None): 効果の量 (ATTACK は解決したときに求めた量が入る)。
+            speed (int): 解決順を決めるスピード (効果の元になったカードのスピード)。
+            source (Card, optional): 効果の元になったカード。
+        """
+        self.kind = kind
+        self.owner = owner
+        self.target = target
+        self.amount = amount
+        self.speed = speed
+        self.source = source
+
+    def __repr__(self):
+        return f"Effect({self.kind}, owner={self.owner}, target={self.target}, amount={self.amount}, speed={self.speed})"
+
+
+def _apply_damage(game, effect, queue):
+    game.players[effect.target].life -= effect.amount
+
+
+def _apply_heal(game, effect, queue):
+    game.players[effect.target].life += effect.amount
+
+
+def _apply_soul(game, effect, queue):
+    player = game.players[effect.target]
+    player.soul_point = max(0, player.soul_point + effect.amount)
+
+
+# 効果の種類 → 解決する関数 (game, effect, queue)。関数は queue に新しい効果を積んでもよい
+# (ATTACK はマッチアップ表を使うため、Engine が登録する)
+HANDLERS = {
+    DAMAGE: _apply_damage,
+    HEAL: _apply_heal,
+    SOUL: _apply_soul,
+}
+
+
+class EffectQueue:
+    """
+    スピード順の効果解決キュー。
+    ヒープで管理するため、積むのも取り出すのも効果の数の対数時間で済む。
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, effect):
+        """効果を積む。"""
+        heapq.heappush(self._heap, (-effect.speed, effect.owner, self._seq, effect))
+        self._seq += 1
+
+    def resolve(self, game):
+        """
+        積まれた効果を解決順に全て解決する。解決中に積まれた効果も順序に従って解決する。
+
+        Args:
+            game (GameData): ゲームデータ。
+
+        Returns:
+            list[Effect]: 解決した効果 (解決した順)。
+        """
+        resolved = []
+        heap = self._heap
+        while heap:
+            effect = heapq.heappop(heap)[-1]
+            HANDLERS[effect.kind](game, effect, self)
+            resolved.append(effect)
+        return resolved
+
+
+def contract_effects(card, owner):
+    """
+    カードの契約から、1ターン分の効果 (利益、代償、穢れた魂の増加) を作る。
+
+    Args:
+        card (Card): 契約を持つカード。
+        owner (int): カードを出したプレイヤーの番号。
+
+    Returns:
+        list[Effect]: 契約の効果。契約がなければ空。
+    """
+    contract = card.contract
+    if contract is None:
+        return []
+    effects = []
+    if contract.benefit:
+        effects.append(Effect(HEAL, owner, owner, contract.benefit, card.speed, card))
+    if contract.cost:
+        effects.append(Effect(DAMAGE, owner, owner, contract.cost, card.speed, card))
+    if contract.soul:
+        effects.append(Effect(SOUL, owner, owner, contract.soul, card.speed, card))
+    return effects
+
+
+class LingeringEffects:
+    """
+    持続中の効果を、切れるターンの順に並べたヒープ (GameData.lingering)。
+    同じターンに切れる効果は登録した順に並べる。要素は (切れるターン, 登録順, 効果) のタプル。
+    """
+    __slots__ = ("_heap", "_seq")
+
+    def __init__(self, entries=()):
+        """
+        Args:
+            entries (Iterable[tuple[int, int, Effect]], optional): (切れるターン, 登録順, 効果) の並び
+                (スナップショットから戻すときに使う)。
+        """
+        self._heap = list(entries)
+        heapq.heapify(self._heap)
+        self._seq = max((seq for _, seq, _ in self._heap), default=-1) + 1
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return iter(self._heap)
+
+    def __eq__(self, other):
+        return isinstance(other, LingeringEffects) and self._heap == other._heap
+
+    def __repr__(self):
+        return f"LingeringEffects({self._heap!r})"
+
+    def push(self, effect, expires):
+        """
+        持続効果を登録する。
+
+        Args:
+            effect (Effect): 持続させる効果。
+            expires (int): 効果が切れるターン (このターンからは解決しない)。
+        """
+        heapq.heappush(self._heap, (expires, self._seq, effect))
+        self._seq += 1
+
+    def expire(self, turn):
+        """turn までに切れた持続効果を取り除く。"""
+        heap = self._heap
+        while heap and heap[0][0] <= turn:
+            heapq.heappop(heap)
+
+    def effects(self):
+        """持続中の効果を返す。"""
+        return [effect for _, _, effect in self._heap]
+
+
+def add_lingering(game, effect, turns):
+    """
+    次のターンから一定ターンの間、毎ターン解決される持続効果を登録する。
+    持続効果は切れるターンの順のヒープで持つため、切れた効果の削除は効果の数の対数時間で済む。
+
+    Args:
+        game (GameData): ゲームデータ。
+        effect (Effect): 持続させる効果。
+        turns (int): 効果が続くターン数。
+    """
+    if turns > 0:
+        game.lingering.push(effect, game.turn + 1 + turns)
+
+
+def queue_lingering(game, queue):
+    """
+    切れた持続効果を取り除き、残りの持続効果を解決キューに積む。
+    毎ターン見るのは持続中の効果だけで、カード全体を調べ直すことはない。
+
+    Args:
+        game (GameData): ゲームデータ。
+        queue (EffectQueue): 解決キュー。
+    """
+    game.lingering.expire(game.turn)
+    for effect in game.lingering.effects():
+        queue.push(effect)
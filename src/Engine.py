@@ -0,0 +1,285 @@
+import random
+from src.settings import *
+from src.DataClass import *
+from src.Matchup import *
+from src.Deck import Deck
+from src.Effects import *
+
+
+# 1ターンのフェーズ進行順
+PHASES = (
+    "start",     # ターン開始 (手札の補充)
+    "select",    # カード選択
+    "effect",    # 効果解決
+    "battle",    # 戦闘
+    "contract",  # 契約解決
+    "end",       # ターン終了 (勝敗判定)
+)
+RESULT_PHASE = "result"  # 決着後のフェーズ
+
+
+def new_game(names=("Alice", "Bob"), cards=MASTER_CARDS, seed=None, decks=None):
+    """
+    新しいゲームデータを生成し、各プレイヤーに初期手札を配る。
+    ゲーム中の乱数は全てシードから作った1つの乱数列(game.rng)から取り出すため、
+    同じシードと同じカード選択からは同じ対戦が再現される。
+
+    Args:
+        names (tuple[str, str], optional): プレイヤー名。
+        cards (list[Card], optional): カードプール。各プレイヤーの山札には各カードを DECK_COPIES 枚ずつ入れる。
+        seed (int, optional): 乱数のシード。省略時はランダムに決める。
+        decks (tuple[Sequence[int] | None, Sequence[int] | None], optional): 各プレイヤーの山札の構成
+            (カードプールの位置ごとの枚数)。None の場合は各カード DECK_COPIES 枚。
+
+    Returns:
+        GameData: "start" フェーズから始まるゲームデータ。
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    if decks is None:
+        decks = (None,) * len(names)
+    players = [Player(name, INITIAL_LIFE, [],
+                      Deck.standard(cards) if counts is None else Deck.from_counts(counts, cards), [])
+               for name, counts in zip(names, decks)]
+    game = GameData(players=players, seed=seed, rng=random.Random(seed), cards=cards)
+    for player in players:
+        fill_hand(player, game.rng)
+    return game
+
+
+def draw_card(player, rng=random):
+    """
+    プレイヤーが山札からカードを1枚引いて手札に加える。
+    山札が空のときは、墓地のカードを山札に戻してから引く。
+    山札を持たないプレイヤー (GameData() の既定のプレイヤーなど) は何も引かない。
+
+    Args:
+        player (Player): カードを引くプレイヤー。
+        rng (random.Random, optional): 乱数生成器。
+
+    Returns:
+        Card | None: 引いたカード。山札と墓地がどちらも空、または山札がなければ None。
+    """
+    deck = player.deck
+    if deck is None:
+        return None
+    if not deck:
+        deck.recycle(player.graveyard)
+        player.graveyard.clear()
+    card = deck.draw(rng)
+    if card is not None:
+        player.hand.append(card)
+    return card
+
+
+def fill_hand(player, rng=random):
+    """プレイヤーの手札を上限枚数まで補充する。引けるカードがなくなったらそこで止める。"""
+    while len(player.hand) < HAND_SIZE:
+        if draw_card(player, rng) is None:
+            break
+
+
+def start_phase(game):
+    """ターン開始: 各プレイヤーの手札を、ゲームの乱数列を使って上限枚数まで補充する。"""
+    rng = game.rng or random
+    for player in game.players:
+        fill_hand(player, rng)
+    game.phase = "select"
+
+
+def select_phase(game, index1, index2):
+    """
+    カード選択: 各プレイヤーが手札から選んだカードを場に出す。
+
+    Args:
+        game (GameData): ゲームデータ。
+        index1 (int): プレイヤー1が選んだ手札の位置。
+        index2 (int): プレイヤー2が選んだ手札の位置。
+    """
+    for player, index in zip(game.players, (index1, index2)):
+        player.field_card = player.hand.pop(index)
+    game.phase = "effect"
+
+
+def effect_phase(game):
+    """
+    効果解決: 戦闘の前に解決する効果の段階。
+    今のカードには戦闘前に解決する効果がないため、何もせずに戦闘へ進む
+    (契約の利益・代償・穢れた魂は contract_phase で解決する)。
+    """
+    game.phase = "battle"
+
+
+def _apply_attack(game, effect, queue):
+    """
+    戦闘ダメージを解決する。ダメージは解決する時点の攻撃側の魂の数と、対象の場のカードから
+    事前計算したマッチアップ表で引くため、先に解決された効果で魂の数が変わっていればそれが反映される。
+    """
+    attacker = game.players[effect.owner]
+    defender = game.players[effect.target]
+    effect.amount = lookup_damage(effect.source, defender.field_card, attacker.soul_point, game.cards)
+    defender.life -= effect.amount
+
+
+HANDLERS[ATTACK] = _apply_attack
+
+
+def battle_phase(game):
+    """
+    戦闘: 場のカード同士の攻撃を効果として解決キューに積み、スピードが速いカードの効果から順に解決する。
+    ダメージは各効果を解決する時点の状態から求める (_apply_attack)。
+    先に解決した攻撃で相手のライフが0以下になっても、遅い方の攻撃も解決する (攻撃は同時に行うルールのため。
+    両者のライフが0以下になったときの勝敗は end_phase でスピードにより決まる)。
+    """
+    card1, card2 = (player.field_card for player in game.players)
+    queue = EffectQueue()
+    queue.push(Effect(ATTACK, 0, 1, None, card1.speed, card1))
+    queue.push(Effect(ATTACK, 1, 0, None, card2.speed, card2))
+    queue.resolve(game)
+    game.phase = "contract"
+
+
+def contract_phase(game):
+    """
+    契約解決: 場に出たカードの契約 (利益、代償、穢れた魂の増加) と、前のターンまでの契約の持続効果を
+    解決キューに積み、スピード順に解決する。2ターン以上続く契約は持続効果として登録する。
+    """
+    player1, player2 = game.players
+    if not game.lingering and player1.field_card.contract is None and player2.field_card.contract is None:
+        game.phase = "end"  # 解決する契約がない
+        return
+    queue = EffectQueue()
+    queue_lingering(game, queue)
+    for owner, player in enumerate(game.players):
+        card = player.field_card
+        if card.contract is None:
+            continue
+        for effect in contract_effects(card, owner):
+            queue.push(effect)
+            add_lingering(game, effect, card.contract.duration - 1)
+    queue.resolve(game)
+    game.phase = "end"
+
+
+def end_phase(game):
+    """
+    ターン終了: 場のカードを墓地に送り、勝敗を判定する。
+    両者のライフが同時に0以下になった場合は、スピードが速いカードを出した側の勝ち。
+    """
+    player1, player2 = game.players
+    speed1 = player1.field_card.speed
+    speed2 = player2.field_card.speed
+    for player in game.players:
+        player.graveyard.append(player.field_card)
+        player.field_card = None
+
+    if player1.life <= 0 and player2.life <= 0:
+        if speed1 > speed2:
+            game.winner = 0
+        elif speed1 < speed2:
+            game.winner = 1
+        game.phase = RESULT_PHASE
+    elif player1.life <= 0:
+        game.winner = 1
+        game.phase = RESULT_PHASE
+    elif player2.life <= 0:
+        game.winner = 0
+        game.phase = RESULT_PHASE
+    else:
+        game.turn += 1
+        game.phase = "start"
+
+
+def resolve_turn(game):
+    """
+    カード選択後のフェーズ (効果解決 → 戦闘 → 契約解決 → ターン終了) をまとめて進める。
+
+    Args:
+        game (GameData): "effect" フェーズのゲームデータ。
+    """
+    effect_phase(game)
+    battle_phase(game)
+    contract_phase(game)
+    end_phase(game)
+
+
+def play_turn(game, index1, index2):
+    """
+    1ターン分のフェーズを全て進める。
+
+    Args:
+        game (GameData): "start" または "select" フェーズのゲームデータ。
+        index1 (int): プレイヤー1が選んだ手札の位置。
+        index2 (int): プレイヤー2が選んだ手札の位置。
+    """
+    if game.phase == "start":
+        start_phase(game)
+    select_phase(game, index1, index2)
+    resolve_turn(game)
+
+
+def random_strategy(game, player_index, rng=random):
+    """
+    手札からランダムにカードを選ぶ戦略 (従来のプレイヤー2のAIロジック)。
+
+    Args:
+        game (GameData): ゲームデータ。
+        player_index (int): 選択するプレイヤーの番号。
+        rng (random.Random, optional): 乱数生成器。
+
+    Returns:
+        int: 選んだ手札の位置。
+    """
+    return rng.randrange(len(game.players[player_index].hand))
+
+
+def play_match(strategy1, strategy2, rng=None, game=None, max_turns=MAX_TURNS, on_select=None):
+    """
+    2つの戦略同士で決着がつくまで対戦させる。
+
+    Args:
+        strategy1 (Callable): プレイヤー1の戦略。(game, player_index, rng) を受け取り手札の位置を返す。
+        strategy2 (Callable): プレイヤー2の戦略。
+        rng (random.Random, optional): 戦略に渡す乱数生成器。新しくゲームを生成する場合は、そのシードもここから取り出す。
+            省略時はゲームの乱数列を使う。
+        game (GameData, optional): 途中から対戦させる場合のゲームデータ。省略時は新しく生成する。
+        max_turns (int, optional): このターン数を超えたら引き分けとして打ち切る。
+        on_select (Callable, optional): 毎ターン、カードを場に出す直前に (game, index1, index2) を受け取る関数
+            (使ったカードの集計などに使う)。
+
+    Returns:
+        GameData: 対戦終了後のゲームデータ。
+    """
+    if game is None:
+        game = new_game(seed=None if rng is None else rng.getrandbits(64))
+    if rng is None:
+        rng = game.rng or random
+    while game.phase != RESULT_PHASE:
+        if game.turn > max_turns:
+            game.phase = RESULT_PHASE
+            break
+        if game.phase == "start":
+            start_phase(game)
+        index1 = strategy1(game, 0, rng)
+        index2 = strategy2(game, 1, rng)
+        if on_select is not None:
+            on_select(game, index1, index2)
+        select_phase(game, index1, index2)
+        resolve_turn(game)
+    return game
+
+
+def turns_played(game):
+    """
+    決着 (または打ち切り) までに終えたターン数を返す。
+    決着したターンでは game.turn は進まないが、ターン数の上限で打ち切った場合は次のターンに進んだ後で止まっている。
+
+    Args:
+        game (GameData): 対戦終了後のゲームデータ。
+
+    Returns:
+        int: 終えたターン数。
+    """
+    if game.phase == RESULT_PHASE and all(player.life > 0 for player in game.players):
+        return game.turn - 1    # play_match が上限で打ち切った
+    return game.turn
@@ -0,0 +1,439 @@
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+
+import numpy as np
+
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.Matchup import get_matchup_table
+from src.Replay import card_pool_checksum
+
+
+# 価値のファイルの形式 (np.savez_compressed)
+#   values: [魂の数の組, 自分のライフ, 相手のライフ] のターン開始時 (手札が配られる前) の局面の価値
+POLICY_VERSION = 3          # 3: 手札を公開情報として扱い、局面の価値だけを持つ形式
+SAMPLE_HANDS = 512          # 局面の価値を求めるときに標本にする手札の組の数
+ONLINE_ITERATIONS = 200     # 対戦中にそのターンの行列ゲームを解くときの後悔最小化の反復回数
+ONLINE_CACHE_SIZE = 4096    # 対戦中に解いた結果を覚えておく局面の数
+LOOP_UPDATE_INTERVAL = 20   # ダメージが0同士で同じ局面に戻る組の利得を、局面の価値で置き換える反復の間隔
+
+
+def hand_multisets(limits, size):
+    """
+    山札の構成から引きうる手札を、多重集合として全て列挙する。
+
+    Args:
+        limits (Sequence[int]): カードプールの位置ごとの山札の枚数。
+        size (int): 手札の枚数。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 手札 ([手札, カードプールの位置] の枚数) と、
+            山札から size 枚を引いたときにその手札になる確率 (多変量超幾何分布)。
+    """
+    hands = []
+
+    def extend(prefix, slot, remaining):
+        if slot == len(limits):
+            if remaining == 0:
+                hands.append(prefix)
+            return
+        for count in range(min(limits[slot], remaining) + 1):
+            extend(prefix + (count,), slot + 1, remaining - count)
+
+    extend((), 0, size)
+    hands = np.array(hands, dtype=np.int8).reshape(-1, len(limits))
+    # ways[位置, 枚数]: その位置のカードを、山札の枚数から指定した枚数だけ選ぶ組み合わせの数
+    ways = np.array([[comb(limit, count) for count in range(size + 1)] for limit in limits], dtype=float)
+    ways = ways.reshape(len(limits), size + 1)
+    prior = ways[np.arange(len(limits)), hands].prod(axis=1) / comb(sum(limits), size)
+    return hands, prior
+
+
+def solve_matrix_games(payoff, rows, columns, iterations, loop=None):
+    """
+    同じ大きさの零和の行列ゲームをまとめて、後悔最小化 (regret matching+) で近似的に解く。
+
+    Args:
+        payoff (np.ndarray): [ゲーム, 自分のカード, 相手のカード] の自分の利得 (相手の利得はその符号を反転したもの)。
+        rows (np.ndarray): [ゲーム, 自分のカード] 自分が出せるカードのマスク。
+        columns (np.ndarray): [ゲーム, 相手のカード] 相手が出せるカードのマスク。
+        iterations (int): 反復回数。
+        loop (np.ndarray, optional): 利得がこの局面自身の価値になる (どちらもダメージを受けない) 組のマスク。
+            この組の利得は、反復の途中で求めた全てのゲームの価値の平均で LOOP_UPDATE_INTERVAL 回ごとに置き換える。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 自分の平均戦略 ([ゲーム, 自分のカード] の確率) と、各ゲームの価値。
+    """
+    matrix = payoff.astype(float)
+    masks = [rows.astype(float), columns.astype(float)]
+    regrets = [np.zeros(mask.shape) for mask in masks]
+    averages = [np.zeros(mask.shape) for mask in masks]
+    uniform = [mask / mask.sum(axis=1, keepdims=True) for mask in masks]
+    has_loop = loop is not None and loop.any()
+
+    def values_of(strategies):
+        mine, theirs = [strategy / strategy.sum(axis=1, keepdims=True) for strategy in strategies]
+        return np.einsum("gi,gij,gj->g", mine, matrix, theirs)
+
+    for t in range(1, iterations + 1):
+        strategies = []
+        for regret, uniform_strategy in zip(regrets, uniform):
+            total = regret.sum(axis=1, keepdims=True)
+            strategies.append(np.where(total > 0, regret / np.where(total > 0, total, 1), uniform_strategy))
+        utilities = (np.einsum("gij,gj->gi", matrix, strategies[1]),
+                     -np.einsum("gi,gij->gj", strategies[0], matrix))
+        for regret, average, strategy, utility, mask in zip(regrets, averages, strategies, utilities, masks):
+            expected = (strategy * utility).sum(axis=1, keepdims=True)
+            regret += (utility - expected) * mask
+            np.maximum(regret, 0, out=regret)
+            average += t * strategy     # 後半の反復ほど重く平均する
+        if has_loop and t % LOOP_UPDATE_INTERVAL == 0:
+            matrix[loop] = values_of(averages).mean()
+
+    if has_loop:
+        matrix[loop] = values_of(averages).mean()
+    return averages[0] / averages[0].sum(axis=1, keepdims=True), values_of(averages)
+
+
+def solve_situation(payoff, loop, kinds, iterations):
+    """
+    1つの局面の価値を、標本にした手札の組ごとの行列ゲームの価値の平均として求める。ワーカープロセスで呼び出される。
+
+    Args:
+        payoff (np.ndarray): [自分のカード, 相手のカード] の自分の利得。
+        loop (np.ndarray): 同じ局面に戻る組のマスク。
+        kinds (tuple[np.ndarray, np.ndarray]): (自分, 相手) の手札の標本 ([標本, 種類] のカードプールの位置。
+            種類の少ない手札は -1 で埋める)。
+        iterations (int): 反復回数。
+
+    Returns:
+        float: 局面の価値。
+    """
+    mine, theirs = kinds
+    rows, columns = mine >= 0, theirs >= 0
+    i = np.maximum(mine, 0)[:, :, None]
+    j = np.maximum(theirs, 0)[:, None, :]
+    playable = rows[:, :, None] & columns[:, None, :]
+    _, values = solve_matrix_games(payoff[i, j], rows, columns, iterations, loop[i, j] & playable)
+    return float(values.mean())
+
+
+class EquilibriumSolver:
+    """
+    毎ターンのカード選択を同時手番の行列ゲームとして、全ての局面の価値をオフラインで求める。
+
+    両者の手札は画面に表示される公開情報なので (greedy や MCTS も相手の手札を見て選ぶ)、1ターンは
+    「自分の手札のカード × 相手の手札のカード」の行列ゲームになる。局面はターン開始時の
+    (自分と相手のライフ, 自分と相手の魂の数) で表し、その価値は手札が配られる前の行列ゲームの価値の期待値とする。
+    期待値は、山札の構成から配った手札の組の標本 (SAMPLE_HANDS 組) の平均で求める。ターンの利得は、
+    決着すれば勝ち1・負け-1・引き分け0、決着しなければダメージを受け、契約で魂の数が増えた後の局面の価値とする。
+
+    局面はライフの合計が小さい順に、同じライフの合計の中では魂の数の合計が大きい順に解く。
+    同じ順番の局面は互いに依存しないため、プロセスプールでまとめて解く。
+    利得の行列が同じ局面は一度だけ解き、結果を使い回す。
+
+    手札の標本は毎回満杯の山札から配るため、墓地にたまったカードによる山札の偏りは先のターンの価値には反映されない
+    (そのターンの行列ゲームは、対戦中に EquilibriumPolicy が実際の手札で解く)。
+    契約のうち扱うのは魂の数の増加だけで、利益・代償・2ターン以上続く契約を持つカードプールは解けない。
+    """
+
+    def __init__(self, cards=MASTER_CARDS, max_life=INITIAL_LIFE, iterations=200, copies=DECK_COPIES,
+                 samples=SAMPLE_HANDS, seed=0):
+        """
+        Args:
+            cards (list[Card], optional): カードプール。
+            max_life (int, optional): 解くライフの上限。
+            iterations (int, optional): 局面1つあたりの後悔最小化の反復回数。
+            copies (int, optional): 山札に入れる1種類あたりのカードの枚数 (手札の標本を配るのに使う)。
+            samples (int, optional): 局面の価値を求めるときに標本にする手札の組の数。
+            seed (int, optional): 手札の標本を配る乱数のシード。
+        """
+        self.cards = cards
+        self.max_life = max_life
+        self.iterations = iterations
+        self.limits = (copies,) * len(cards)
+        self.speed = np.array([card.speed for card in cards])
+        self.card_table = get_matchup_table(cards).card_table
+        for card in cards:
+            contract = card.contract
+            if contract is not None and (contract.benefit or contract.cost or contract.duration > 1
+                                         or contract.soul < 0):
+                raise ValueError(f"cannot solve contracts other than a soul increase: {card.name}")
+        # 各カードを出したときの魂の数の増加量。増えるカードがなければ、魂の数は0から変わらない
+        self.soul_gain = np.array([0 if card.contract is None else card.contract.soul for card in cards])
+        self.soul_values = tuple(range(MAX_SOUL_POINT + 1)) if self.soul_gain.any() else (0,)
+        self.souls = [(mine, theirs) for mine in self.soul_values for theirs in self.soul_values]
+        # 魂の数の組ごとの、[自分のカード, 相手のカード] を出した後の魂の数の組の位置
+        top = len(self.soul_values) - 1
+        self.next_souls = np.array([
+            np.minimum(mine + self.soul_gain, top)[:, None] * len(self.soul_values)
+            + np.minimum(theirs + self.soul_gain, top)[None, :]
+            for mine, theirs in self.souls])
+        self.samples = samples
+        self.seed = seed
+        self.memo = {}              # (利得の行列, 同じ局面に戻る組) → 局面の価値
+
+    def sample_kinds(self):
+        """
+        山札の構成から、自分と相手の手札の標本を配る。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (自分, 相手) の手札に含まれるカードプールの位置 ([標本, HAND_SIZE]、
+                種類の少ない手札は -1 で埋める)。
+        """
+        hands, prior = hand_multisets(self.limits, HAND_SIZE)
+        rng = np.random.default_rng(self.seed)
+        kinds = []
+        for _ in range(2):
+            drawn = np.full((self.samples, HAND_SIZE), -1, dtype=np.int64)
+            for row, hand in enumerate(hands[rng.choice(len(hands), size=self.samples, p=prior)]):
+                slots = np.flatnonzero(hand)
+                drawn[row, :len(slots)] = slots
+            kinds.append(drawn)
+        return tuple(kinds)
+
+    def payoff(self, values, life, opponent_life, soul, opponent_soul):
+        """
+        局面の利得の行列を作る。
+
+        Args:
+            values (np.ndarray): [魂の数の組, 自分のライフ, 相手のライフ] で引ける、解き終えた局面の価値。
+            life (int): 自分のライフ。
+            opponent_life (int): 相手のライフ。
+            soul (int): 自分の魂の数。
+            opponent_soul (int): 相手の魂の数。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: [自分のカード, 相手のカード] の利得と、同じ局面に戻る組のマスク。
+        """
+        next_souls = self.next_souls[self.souls.index((soul, opponent_soul))]
+        dealt = self.card_table.damage_table(soul)              # [自分, 相手] 自分が与えるダメージ
+        taken = self.card_table.damage_table(opponent_soul).T   # [自分, 相手] 自分が受けるダメージ
+        new_life = life - taken
+        new_opponent_life = opponent_life - dealt
+        dead, opponent_dead = new_life <= 0, new_opponent_life <= 0
+        faster = np.sign(self.speed[:, None] - self.speed[None, :])
+        continuing = ~dead & ~opponent_dead
+        payoff = np.where(dead & opponent_dead, faster, np.where(dead, -1.0, 1.0)).astype(float)
+        payoff[continuing] = values[next_souls[continuing], new_life[continuing], new_opponent_life[continuing]]
+        loop = (dealt == 0) & (taken == 0) & (next_souls == self.souls.index((soul, opponent_soul)))
+        return payoff, loop
+
+    def solve(self, workers=None, on_progress=None):
+        """
+        全ての局面を解く。
+
+        Args:
+            workers (int, optional): ワーカープロセス数。省略時はCPUのコア数。
+            on_progress (Callable, optional): 局面をまとめて解くごとに (解き終えた局面の数, 全体の局面の数) を受け取る関数。
+
+        Returns:
+            EquilibriumPolicy: 求めた方策。
+        """
+        kinds = self.sample_kinds()
+        lives = self.max_life
+        # values[魂の数の組, 自分のライフ, 相手のライフ] (ライフ0以下は使わない)
+        values = np.zeros((len(self.souls), lives + 1, lives + 1))
+        total = len(self.souls) * lives * lives
+        done = 0
+        # 魂の数は増えるだけなので、同じライフの合計の中では魂の数の合計が大きい組から解く
+        order = sorted(range(len(self.souls)), key=lambda s: -sum(self.souls[s]))
+        soul_groups = [list(group) for _, group in itertools.groupby(order, key=lambda s: sum(self.souls[s]))]
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            for life_sum in range(2, 2 * lives + 1):
+                lives_pairs = [(life, life_sum - life) for life in range(max(1, life_sum - lives),
+                                                                         min(lives, life_sum - 1) + 1)]
+                for group in soul_groups:
+                    futures = {}
+                    for s in group:
+                        soul, opponent_soul = self.souls[s]
+                        for life, opponent_life in lives_pairs:
+                            payoff, loop = self.payoff(values, life, opponent_life, soul, opponent_soul)
+                            key = (payoff.round(9).tobytes(), loop.tobytes())
+                            if key not in self.memo:
+                                self.memo[key] = executor.submit(solve_situation, payoff, loop, kinds,
+                                                                 self.iterations)
+                            futures[(s, life, opponent_life)] = key
+                    for (s, life, opponent_life), key in futures.items():
+                        value = self.memo[key]
+                        if not isinstance(value, float):
+                            value = self.memo[key] = value.result()
+                        values[s, life, opponent_life] = value
+                    done += len(futures)
+                    if on_progress is not None:
+                        on_progress(done, total)
+
+        return EquilibriumPolicy(values.astype(np.float32), self.cards)
+
+
+class EquilibriumPolicy:
+    """
+    EquilibriumSolver で求めた局面の価値を使って、毎ターン実際の手札同士の行列ゲームを解いてカードを選ぶ方策。
+    MCTSAgent と同じように、戦略としても GameScene のプレイヤー2としても使える。
+
+    事前に求めてあるのは局面の価値だけで、戦略は表にしていない。手札が公開情報のこのゲームでは、戦略が
+    (自分の手札の種類, 相手の手札の種類, ライフ, 魂の数) ごとに変わり、表にすると約 9,000 万の局面になるため。
+    代わりに、そのターンの行列ゲーム (最大で 5×5) を best_move が呼ばれたときに1回だけ解き、結果は局面ごとに覚えておく。
+    MCTSAgent と違ってフレームごとの探索はしない (search メソッドを持たない)。
+    ターンの後の局面の価値は事前に解いた表から引くため、その精度 (手札の標本の数、満杯の山札から配るという仮定) を超えては強くならない。
+    """
+
+    def __init__(self, values, cards=MASTER_CARDS, player_index=1, seed=None, iterations=ONLINE_ITERATIONS):
+        """
+        Args:
+            values (np.ndarray): [魂の数の組, 自分のライフ, 相手のライフ] の局面の価値。
+            cards (list[Card], optional): カードプール。
+            player_index (int, optional): AIが担当するプレイヤー番号 (best_move で使う)。
+            seed (int, optional): 標本を取り出す乱数のシード。
+            iterations (int, optional): そのターンの行列ゲームを解くときの後悔最小化の反復回数。
+        """
+        self.values = values
+        self.cards = cards
+        self.player_index = player_index
+        self.rng = random.Random(seed)
+        self.iterations = iterations
+        self.slot = {card.id: i for i, card in enumerate(cards)}
+        self.max_life = values.shape[1] - 1
+        self._solver = EquilibriumSolver(cards, max_life=self.max_life)    # 利得の行列を作るのに使う
+        self.max_soul = max(self._solver.soul_values)
+        self._strategies = {}       # 解いた局面 → 自分の手札の各種類を出す確率
+
+    def save(self, path):
+        """局面の価値をファイルに書き出す。"""
+        np.savez_compressed(path, version=POLICY_VERSION, checksum=card_pool_checksum(self.cards),
+                            values=self.values)
+
+    @classmethod
+    def load(cls, path, cards=MASTER_CARDS, player_index=1, seed=None):
+        """
+        save で書き出した局面の価値を読み込んで、方策を作る。
+
+        Args:
+            path (str): 価値のファイルのパス。
+            cards (list[Card], optional): カードプール。価値を求めたときと同じでなければならない。
+            player_index (int, optional): AIが担当するプレイヤー番号。
+            seed (int, optional): 標本を取り出す乱数のシード。
+
+        Returns:
+            EquilibriumPolicy: 読み込んだ方策。
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != POLICY_VERSION:
+                raise ValueError(f"{path} is not a policy file of version {POLICY_VERSION}")
+            if int(data["checksum"]) != card_pool_checksum(cards):
+                raise ValueError(f"{path} was solved for a different card pool")
+            return cls(data["values"], cards, player_index, seed)
+
+    def strategy(self, hand, opponent_hand, life, opponent_life, soul=0, opponent_soul=0):
+        """
+        そのターンの行列ゲームを解き、自分の手札の各種類を出す確率を求める。
+        範囲外のライフや魂の数は、解いた範囲の端に丸める。
+
+        Args:
+            hand (list[Card]): 自分の手札。
+            opponent_hand (list[Card]): 相手の手札。
+            life (int): 自分のライフ。
+            opponent_life (int): 相手のライフ。
+            soul (int, optional): 自分の魂の数。
+            opponent_soul (int, optional): 相手の魂の数。
+
+        Returns:
+            tuple[tuple[int, ...], list[float]]: 自分の手札の種類 (カードプールの位置) と、それぞれを出す確率。
+        """
+        mine = tuple(sorted({self.slot[card.id] for card in hand}))
+        theirs = tuple(sorted({self.slot[card.id] for card in opponent_hand}))
+        life = min(max(life, 1), self.max_life)
+        opponent_life = min(max(opponent_life, 1), self.max_life)
+        soul, opponent_soul = min(soul, self.max_soul), min(opponent_soul, self.max_soul)
+        key = (mine, theirs, life, opponent_life, soul, opponent_soul)
+        probabilities = self._strategies.get(key)
+        if probabilities is None:
+            payoff, _ = self._solver.payoff(self.values, life, opponent_life, soul, opponent_soul)
+            matrix = payoff[np.ix_(mine, theirs)][None]
+            strategy, _ = solve_matrix_games(matrix, np.ones((1, len(mine)), dtype=bool),
+                                             np.ones((1, len(theirs)), dtype=bool), self.iterations)
+            probabilities = strategy[0].tolist()
+            if len(self._strategies) >= ONLINE_CACHE_SIZE:
+                self._strategies.clear()
+            self._strategies[key] = probabilities
+        return mine, probabilities
+
+    def sample(self, hand, opponent_hand, life, opponent_life, soul=0, opponent_soul=0, rng=None):
+        """
+        そのターンの行列ゲームの戦略から、出すカードを手札の位置として取り出す。
+
+        Args:
+            hand (list[Card]): 自分の手札。
+            opponent_hand (list[Card]): 相手の手札。
+            life (int): 自分のライフ。
+            opponent_life (int): 相手のライフ。
+            soul (int, optional): 自分の魂の数。
+            opponent_soul (int, optional): 相手の魂の数。
+            rng (random.Random, optional): 乱数生成器。省略時は self.rng。
+
+        Returns:
+            int: 選んだ手札の位置。
+        """
+        rng = rng or self.rng
+        kinds, probabilities = self.strategy(hand, opponent_hand, life, opponent_life, soul, opponent_soul)
+        x = rng.random()
+        slot = kinds[-1]
+        for kind, probability in zip(kinds, probabilities):
+            x -= probability
+            if x < 0:
+                slot = kind
+                break
+        return next(index for index, card in enumerate(hand) if self.slot[card.id] == slot)
+
+    def _sample_for(self, game, player_index, rng=None):
+        me = game.players[player_index]
+        opponent = game.players[1 - player_index]
+        return self.sample(me.hand, opponent.hand, me.life, opponent.life, me.soul_point, opponent.soul_point, rng)
+
+    def best_move(self, game):
+        """方策から、AIが担当するプレイヤーの出すカードを手札の位置として返す。"""
+        return self._sample_for(game, self.player_index)
+
+    def __call__(self, game, player_index, rng=random):
+        """戦略として呼び出されたときは、渡された乱数生成器で方策から選ぶ。"""
+        return self._sample_for(game, player_index, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="カード選択の局面の価値をオフラインで求め、ファイルに書き出す")
+    parser.add_argument("output", help="書き出す価値のファイルのパス (.npz)")
+    parser.add_argument("--iterations", type=int, default=200, help="局面1つあたりの後悔最小化の反復回数")
+    parser.add_argument("--samples", type=int, default=SAMPLE_HANDS, help="局面の価値を求めるときに標本にする手札の組の数")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--games", type=int, default=0, help="求めた方策と greedy 戦略を対戦させる試合数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    solver = EquilibriumSolver(iterations=args.iterations, samples=args.samples, seed=args.seed)
+
+    def report(done, total):
+        print(f"\r{done}/{total} situations ({len(solver.memo)} distinct subgames)", end="", flush=True)
+
+    policy = solver.solve(workers=args.workers, on_progress=report)
+    print()
+    policy.save(args.output)
+    print(f"saved {args.output} ({os.path.getsize(args.output)} bytes)")
+
+    if args.games:
+        from src.AI import greedy_strategy
+        rng = random.Random(args.seed)
+        wins = draws = 0
+        for i in range(args.games):
+            # 先手・後手を入れ替えながら対戦する
+            me = i % 2
+            strategies = (policy, greedy_strategy) if me == 0 else (greedy_strategy, policy)
+            game = play_match(*strategies, rng)
+            wins += game.winner == me
+            draws += game.winner is None
+        print(f"vs greedy: {wins} wins, {draws} draws, {args.games - wins - draws} losses")
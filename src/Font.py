@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import pyxel
+
+
+# フォント名とBDFファイルの対応
+FONT_FILES = {
+    "mm8": r"../assets/fonts/misaki_mincho.bdf",         # 8px
+    "mg1_8": r"../assets/fonts/misaki_gothic.bdf",       # 8px
+    "mg2_8": r"../assets/fonts/misaki_gothic_2nd.bdf",   # 8px
+    "umplus10": r"../assets/fonts/umplus_j10r.bdf",      # 10px
+    "umplus12": r"../assets/fonts/umplus_j12r.bdf",      # 12px
+}
+
+# 前もって読み込むフォント (シーンが実際に使うもの、最初に描画する順)
+PRELOAD_FONTS = ("umplus12", "umplus10", "mg2_8")
+
+
+class FontRegistry:
+    """
+    プロセス全体で共有するフォントの置き場所。
+    各フォントは最初に使われたときに一度だけ読み込まれ、全てのシーンで共有される。
+    prefetch と warm_step を使うと、タイトル画面の表示中に前もって読み込んでおける。
+    warm_step は、これまでの読み込みにかかった時間から次のフォントの読み込み時間を見積もり、
+    1フレームの時間の予算に収まる分だけを読み込む。
+    """
+
+    def __init__(self, files=FONT_FILES):
+        """
+        Args:
+            files (dict[str, str], optional): フォント名とBDFファイルの対応。
+        """
+        self.files = files
+        self._fonts = {}
+        self._pending = []              # 前もって読み込む予定のフォント名
+        self._prefetch_thread = None
+        self._seconds_per_byte = None   # これまでの読み込みから見積もった、ファイル1バイトあたりの読み込み時間
+
+    def get(self, name):
+        """
+        フォントを返す。まだ読み込んでいなければ、その場で読み込む。
+
+        Args:
+            name (str): フォント名 (FONT_FILES のキー)。
+
+        Returns:
+            pyxel.Font: フォント。
+
+        Raises:
+            FileNotFoundError: フォントファイルが見つからない場合。
+        """
+        font = self._fonts.get(name)
+        if font is None:
+            if not os.path.exists(self.files[name]):
+                raise FileNotFoundError(f"font file not found: {self.files[name]} ({name})")
+            start = time.perf_counter()
+            font = pyxel.Font(self.files[name])
+            size = self._file_size(name)
+            if size:
+                self._seconds_per_byte = (time.perf_counter() - start) / size
+            self._fonts[name] = font
+        return font
+
+    def peek(self, name):
+        """
+        読み込み済みのフォントを返す。まだ読み込んでいなければ、読み込まずに None を返す。
+        None は pyxel の組み込みフォントとしてそのまま pyxel.text に渡せる。
+        """
+        return self._fonts.get(name)
+
+    def is_loaded(self, name):
+        """フォントが読み込み済みかどうかを返す。"""
+        return name in self._fonts
+
+    def estimate(self, name):
+        """
+        フォントの読み込みにかかる時間 (秒) を、ファイルの大きさから見積もる。
+
+        Returns:
+            float | None: 見積もった時間。まだ1つも読み込んでいなければ None。
+        """
+        if self._seconds_per_byte is None:
+            return None
+        return self._file_size(name) * self._seconds_per_byte
+
+    def _file_size(self, name):
+        try:
+            return os.path.getsize(self.files[name])
+        except OSError:
+            return 0
+
+    def prefetch(self, names=None):
+        """
+        バックグラウンドのスレッドでフォントファイルを読み出し、OSのファイルキャッシュに載せておく。
+        pyxel.Font は作成したスレッド以外から扱えないため、フォントの生成そのものは warm_step で行う。
+
+        Args:
+            names (list[str], optional): 対象のフォント名。省略時は PRELOAD_FONTS。
+        """
+        self._pending = [name for name in (PRELOAD_FONTS if names is None else names)
+                         if name not in self._fonts]
+        files = [self.files[name] for name in self._pending]
+
+        def read_all():
+            for filename in files:
+                try:
+                    with open(filename, "rb") as f:
+                        while f.read(1 << 20):
+                            pass
+                except OSError:
+                    # 存在しないファイルは、実際に使うときに pyxel.Font が例外を出す
+                    pass
+
+        self._prefetch_thread = threading.Thread(target=read_all, daemon=True)
+        self._prefetch_thread.start()
+
+    def warm_step(self, budget=None, force=True):
+        """
+        prefetch で予約したフォントを、時間の予算に収まる分だけ読み込む。
+        タイトル画面など、処理に余裕のあるフレームで毎フレーム呼び出すことを想定している。
+
+        Args:
+            budget (float, optional): 使ってよい時間 (秒)。省略時は1つだけ読み込む。
+            force (bool, optional): 見積もりが予算を超えても、最初の1つは読み込むかどうか。
+                1つのフォントの読み込みが予算より長い場合でも、読み込みが止まらないようにする。
+
+        Returns:
+            bool: まだ読み込んでいないフォントが残っていれば True。
+
+        Raises:
+            FileNotFoundError: フォントファイルが見つからない場合 (そのフォントは予約から外す)。
+        """
+        start = time.perf_counter()
+        loaded = 0
+        while self._pending:
+            name = self._pending[0]
+            if name in self._fonts:
+                self._pending.pop(0)
+                continue
+            if budget is None:
+                if loaded:
+                    break
+            elif loaded or not force:
+                estimate = self.estimate(name)
+                if estimate is None or time.perf_counter() - start + estimate > budget:
+                    break
+            self._pending.pop(0)
+            self.get(name)
+            loaded += 1
+        return bool(self._pending)
+
+
+# 全てのシーンで共有するフォント
+FONTS = FontRegistry()
@@ -0,0 +1,105 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from src.settings import *
+
+
+_STOP = object()    # 書き込みスレッドを止めるための印
+
+
+class GameLogger:
+    """
+    対戦の出来事を構造化された記録として残すロガー。
+
+    記録は (ターン, フェーズ, 種類, 内容) のタプルで GameData.log に追加し、ファイルへの書き込みと
+    rich による表示はバックグラウンドのスレッドで行う。スレッドへ渡すキューは上限つきで、
+    あふれた記録はフレームを止めないように捨てて数だけ数える。
+    rich による表示は明示的に有効にした場合だけ行い、直前と同じ内容は表示せず、1秒あたりの行数も制限する。
+    """
+
+    def __init__(self, path=LOG_FILE, queue_size=LOG_QUEUE_SIZE, rich=LOG_RICH, rich_rate=LOG_RICH_RATE):
+        """
+        Args:
+            path (str, optional): 記録を JSON Lines で書き出すファイルのパス。None なら書き出さない。
+            queue_size (int, optional): 書き込みスレッドへ渡すキューの上限。
+            rich (bool, optional): rich でコンソールに表示するかどうか。
+            rich_rate (float, optional): コンソールに表示する1秒あたりの行数の上限。
+        """
+        self.path = path
+        self.rich = rich
+        self.rich_rate = rich_rate
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0        # キューがあふれて捨てた記録の数
+        self._thread = None
+
+    @property
+    def active(self):
+        """ファイルへの書き出しかコンソールへの表示を行うかどうか。"""
+        return self.path is not None or self.rich
+
+    def event(self, game, kind, **fields):
+        """
+        出来事を1件記録する。
+
+        Args:
+            game (GameData): ゲームデータ。記録は game.log に追加される。
+            kind (str): 出来事の種類 ("select", "battle", "result" など)。
+            **fields: 出来事の内容 (JSON に変換できる値)。
+        """
+        record = (game.turn, game.phase, kind, fields)
+        game.log.append(record)
+        if not self.active:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="GameLogger", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """溜まっている記録を書き出し終えるまで待ってから、書き込みスレッドを止める。"""
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """書き込みスレッドの処理。"""
+        file = open(self.path, "a", encoding="utf-8") if self.path is not None else None
+        if self.rich:
+            from rich import print as rprint
+        last_shown = None               # 直前に表示した内容 (ターンを除く)
+        allowance = self.rich_rate      # 表示できる残りの行数 (時間とともに回復する)
+        last_time = time.perf_counter()
+        try:
+            while True:
+                record = self.queue.get()
+                if record is _STOP:
+                    break
+                turn, phase, kind, fields = record
+                if file is not None:
+                    file.write(json.dumps({"turn": turn, "phase": phase, "event": kind, **fields},
+                                          ensure_ascii=False, separators=(",", ":")) + "\n")
+                    if self.queue.empty():
+                        file.flush()
+                if self.rich:
+                    now = time.perf_counter()
+                    allowance = min(self.rich_rate, allowance + (now - last_time) * self.rich_rate)
+                    last_time = now
+                    shown = (kind, phase, repr(fields))
+                    if shown != last_shown and allowance >= 1:
+                        rprint(f"[bold]{kind}[/bold] turn={turn} phase={phase} {fields}")
+                        last_shown = shown
+                        allowance -= 1
+        finally:
+            if file is not None:
+                file.close()
+
+
+# アプリ全体で共有するロガー
+LOGGER = GameLogger()
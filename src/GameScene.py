@@ -0,0 +1,429 @@
+import os
+import random
+import struct
+import pyxel
+from src.settings import *
+from src.DataClass import *
+from src.Scene import Scene
+from src.Hud import Panel, HitGrid
+from src.CardAtlas import CardAtlas
+from src.Profiler import PROFILER, profiled
+from src.Engine import *
+from src.MCTS import MCTSAgent
+from src.Equilibrium import EquilibriumPolicy
+from src.Replay import *
+from src.Scheduler import PhaseScheduler
+from src.Snapshot import SnapshotBuffer
+from src.GameLog import LOGGER
+
+
+FIELD_X = (8, 128)                      # 場のカードを描画するX座標 (プレイヤー1, プレイヤー2)
+FIELD_Y = 100                           # 場のカードを描画するY座標
+HAND_Y = WINDOW_HEIGHT - CARD_HEIGHT - 4  # プレイヤー1の手札を描画するY座標
+
+
+class GameScene(Scene):
+    """
+    ゲームプレイ中のメインシーン。
+    カード選択、戦闘、ターン進行など、ゲームのコアロジックを管理する。
+    """
+
+    def __init__(self, app, replay_file=REPLAY_FILE, game=None, turbo=False, snapshot_file=SNAPSHOT_FILE,
+                 player1=None, ai_iterations=None):
+        """
+        ゲームシーンの初期化。
+        プレイヤー、カード、ゲームデータなどのオブジェクトを生成する。
+        前回の対戦がクラッシュなどで中断していた (スナップショットファイルが残っている) 場合は、その続きから始める。
+        ただしリプレイを記録する場合は、中断した対戦のリプレイファイルが残っていて続きに追記できるときだけ再開する。
+
+        Args:
+            app (App): アプリケーション。
+            replay_file (str, optional): 対戦を記録するリプレイファイルのパス。None なら記録しない。
+            game (GameData, optional): "start" フェーズのゲームデータ。省略時は新しく生成する。
+            turbo (bool, optional): True の場合、戦闘演出の待ち時間を0にする。
+            snapshot_file (str, optional): クラッシュからの復帰用に、毎ターン最新のスナップショットを書き出すパス。
+                None なら書き出さない。
+            player1 (Callable, optional): プレイヤー1の戦略 ((game, player_index, rng) を受け取り手札の位置を返す)。
+                指定するとキー入力を待たずにこの戦略で選ぶ (AI同士の対戦)。
+            ai_iterations (int, optional): プレイヤー2(AI)が1 tick あたりに行う探索の反復回数。
+                省略時は時間 (AI_FRAME_BUDGET) で区切る。回数で区切ると、同じシードなら同じ対戦になる。
+        """
+        super().__init__(app)
+        self.master_cards = MASTER_CARDS  # ゲームに登場する全カードのリスト
+
+        # 毎ターンのスナップショット (BackSpaceキーで1ターン前に巻き戻す)
+        self.history = SnapshotBuffer(cards=self.master_cards, names=("Alice", "Bob"))
+        self.snapshot_file = snapshot_file
+        resumed = False
+        if game is None and snapshot_file is not None and os.path.exists(snapshot_file):
+            try:
+                game = self.history.branch(self.history.load(snapshot_file))
+                resumed = True
+            except (OSError, ValueError):
+                pass    # 読めないスナップショットは無視して新しく始める
+        if resumed and replay_file is not None and not self._can_resume_replay(replay_file, game):
+            # 途中から新しいリプレイを書き始めると、シードから再生しても同じ対戦にならないため、
+            # 中断した対戦のリプレイの続きに追記できないときは再開せずに新しく始める
+            game, resumed = None, False
+
+        # ゲーム全体の進行状況を管理するオブジェクト
+        # 各プレイヤーには初期手札として5枚のカードがランダムに配られる
+        self.game = game or new_game(("Alice", "Bob"), self.master_cards)
+
+        # 対戦をリプレイファイルに記録する (シードと毎ターンのカード選択)
+        # 中断した対戦の続きなら、リプレイファイルも中断した時点から追記する
+        self.recorder = None
+        if replay_file is not None:
+            if resumed and os.path.exists(replay_file):
+                self.recorder = ReplayWriter.reopen(replay_file, self.game.turn - 1)
+            else:
+                self.recorder = ReplayWriter(replay_file, self.game.seed, self.master_cards)
+
+        # プレイヤー2(AI)。プレイヤー1の選択を待つ間、毎フレーム少しずつ探索を進める
+        # 事前計算した局面の価値のファイルがあれば、探索せずに毎ターンそのターンの行列ゲームを解いて選ぶ
+        if AI_POLICY_FILE is not None and os.path.exists(AI_POLICY_FILE):
+            self.ai = EquilibriumPolicy.load(AI_POLICY_FILE, self.master_cards, player_index=1, seed=self.game.seed)
+        else:
+            self.ai = MCTSAgent(player_index=1, cards=self.master_cards, seed=self.game.seed)
+        self.ai_iterations = ai_iterations
+
+        # AI同士の対戦でのプレイヤー1の戦略と、その乱数 (ゲームのシードから作るため対戦を再現できる)
+        self.player1 = player1
+        self.rng = random.Random(self.game.seed)
+        self._input_frame = None    # 最後にキー入力を受け付けたフレーム
+
+        # 戦闘演出のための状態変数
+        self.battle_wait = False  # 戦闘開始前の待機状態フラグ
+
+        # 描画結果をキャッシュするパネル (表示する値が変わったときだけ描き直す)
+        self.turn_panel = Panel(80, 12, lambda image: self._draw_turn(surface=image))
+        self.hud_panels = [
+            Panel(118, 24 + HAND_SIZE * 10,
+                  lambda image, player: self._draw_player_hud(player, surface=image))
+            for _ in range(2)
+        ]
+        # カードの絵柄はアトラスにまとめて描いておき、1枚1回の転送で描画する (最初の描画時に作る)
+        self.atlas = None
+
+        # マウスの当たり判定: クリックできる領域 (プレイヤー1の手札) を格子に登録しておく
+        self.hit_grid = HitGrid(WINDOW_WIDTH, WINDOW_HEIGHT)
+        for i in range(HAND_SIZE):
+            self.hit_grid.add(("hand", i), *self._hand_position(i), CARD_WIDTH, CARD_HEIGHT)
+
+        # フェーズの進行はスケジューラに任せる (最初のターンの手札の補充もここで行われる)
+        self.scheduler = self._create_scheduler(turbo)
+        self.scheduler.transition(self.game.phase)
+        self.scheduler.dispatch()
+
+    @staticmethod
+    def _can_resume_replay(replay_file, game):
+        """
+        中断した対戦のリプレイファイルに、続きを追記できるかどうかを返す。
+        同じシードで、再開するターンの前までのカード選択が全て記録されている必要がある。
+        """
+        try:
+            replay = Replay.load(replay_file)
+        except (OSError, ValueError, struct.error):
+            return False
+        return replay.seed == game.seed and len(replay.turns) >= game.turn - 1
+
+    def _create_scheduler(self, turbo):
+        """
+        ターン進行のスケジューラを作り、各フェーズの処理を登録する。
+
+            start → (手札の補充) → select → (カード選択) → effect → (戦闘演出の待機) → start / result
+
+        Args:
+            turbo (bool): True の場合、待ち時間を0にする。
+
+        Returns:
+            PhaseScheduler: 作成したスケジューラ。
+        """
+        scheduler = PhaseScheduler(turbo=turbo)
+        scheduler.on_enter("start", self._start_turn)
+        scheduler.on_enter("select", self._take_snapshot)
+        scheduler.on_enter("effect", self._wait_battle)
+        scheduler.on_enter(RESULT_PHASE, self._finish)
+        self._register_select(scheduler)
+        return scheduler
+
+    def _register_select(self, scheduler):
+        """カード選択フェーズの間、毎フレームプレイヤーの入力を待つ。"""
+        scheduler.while_in("select", self._update_select)
+
+    def update(self):
+        """
+        ゲームシーンの更新処理。
+        スケジューラを1フレーム進める。入力待ちの間はカード選択の処理だけが、
+        戦闘演出の待機中はタイマーの確認だけが行われる。ルールの処理はエンジン(Engine.py)に任せる。
+        """
+        super().update()
+        self.scheduler.update()
+
+    def _start_turn(self):
+        """ターン開始: 手札を補充してカード選択フェーズへ進む。"""
+        start_phase(self.game)
+        self.scheduler.transition(self.game.phase)
+
+    def _take_snapshot(self):
+        """カード選択フェーズに入るたびにスナップショットを記録し、復帰用のファイルにも書き出す。"""
+        self.history.take(self.game)
+        if self.snapshot_file is not None:
+            self.history.save(self.snapshot_file)
+
+    def rewind(self, steps=1):
+        """
+        カード選択フェーズで、steps ターン前のカード選択フェーズに巻き戻す。
+        リプレイファイルの記録も巻き戻した時点までに切り詰める。
+
+        Args:
+            steps (int, optional): 戻るターン数。
+
+        Returns:
+            bool: 巻き戻せたかどうか (それより前のスナップショットがなければ False)。
+        """
+        snapshot = self.history.rewind(steps)
+        if snapshot is None:
+            return False
+        self.history.restore(snapshot, self.game)
+        if self.recorder is not None:
+            self.recorder.rewind(self.game.turn - 1)
+        if self.snapshot_file is not None:
+            self.history.save(self.snapshot_file)
+        LOGGER.event(self.game, "rewind", steps=steps)
+        return True
+
+    def _update_select(self):
+        """
+        カード選択フェーズの毎フレームの処理。
+        プレイヤー1の入力 (1-5キー、手札のクリック) を受け付け、選択されたらプレイヤー2(AI)も選択する。
+        BackSpaceキーが押されたら1ターン前に巻き戻す。
+        """
+        if (self.player1 is None and pyxel.frame_count != self._input_frame
+                and pyxel.btnp(pyxel.KEY_BACKSPACE) and self.rewind()):
+            self._input_frame = pyxel.frame_count
+            return
+        # フレームレートを落とさないよう、1フレームあたりの時間予算 (または反復回数) の範囲で探索する
+        # (探索しない AI は search を持たない)
+        if hasattr(self.ai, "search"):
+            with PROFILER.section("ai.search"):
+                if self.ai_iterations is None:
+                    self.ai.search(self.game, time_budget=AI_FRAME_BUDGET)
+                else:
+                    self.ai.search(self.game, iterations=self.ai_iterations)
+        if self.player1 is not None:
+            index1 = self.player1(self.game, 0, self.rng)
+        else:
+            index1 = self._read_hand_key(self.game.players[0])
+        if index1 is not None:
+            # プレイヤー2はそれまでの探索結果 (または局面の価値) から最善のカードを選択する
+            index2 = self.ai.best_move(self.game)
+            self._select(index1, index2)
+
+    def _select(self, index1, index2):
+        """両プレイヤーのカードを場に出し、記録して戦闘演出の待機へ進む。"""
+        LOGGER.event(self.game, "select", index=[index1, index2],
+                     card=[player.hand[i].id for player, i in zip(self.game.players, (index1, index2))])
+        select_phase(self.game, index1, index2)
+        if self.recorder is not None:
+            self.recorder.record(index1, index2)
+        self.scheduler.transition(self.game.phase)
+
+    def _wait_battle(self):
+        """戦闘演出の待機: 一定時間(BATTLE_WAIT_FRAMES)後に戦闘処理を実行するタイマーを登録する。"""
+        self.battle_wait = True
+        self.scheduler.after(BATTLE_WAIT_FRAMES, self._end_battle_wait)
+
+    def _end_battle_wait(self):
+        """待機が終わったら戦闘処理を実行し、次のターンか決着へ進む。"""
+        self._battle()
+        self.battle_wait = False
+        self.scheduler.transition(self.game.phase)
+
+    def _finish(self):
+        """決着: 記録を閉じてリザルト画面へ遷移する。"""
+        LOGGER.event(self.game, "result", winner=self.game.winner)
+        if self.recorder is not None:
+            self.recorder.close()
+        # 対戦を最後まで終えたので、復帰用のスナップショットは不要
+        if self.snapshot_file is not None and os.path.exists(self.snapshot_file):
+            os.remove(self.snapshot_file)
+        self.app.current_scene = self.app.scene["result"]
+
+    def _read_hand_key(self, player):
+        """
+        数字キーの入力と手札のクリックを読み取り、選択された手札の位置を返す。
+
+        Args:
+            player (Player): 手札を選択するプレイヤー。
+
+        Returns:
+            int | None: 選択された手札の位置。入力がなければNone。
+        """
+        # 1フレームに複数の tick を進める場合でも、同じキー入力で2回選ばないようにする
+        if pyxel.frame_count == self._input_frame:
+            return None
+        for i in range(len(player.hand)):
+            if pyxel.btnp(pyxel.KEY_1 + i):
+                self._input_frame = pyxel.frame_count
+                return i
+        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            i = self._hovered_hand(player)
+            if i is not None:
+                self._input_frame = pyxel.frame_count
+                return i
+        return None
+
+    def _hovered_hand(self, player):
+        """マウスカーソルが指している手札の位置を返す (指していなければ None)。"""
+        region = self.hit_grid.at(pyxel.mouse_x, pyxel.mouse_y)
+        if region is not None and region[0] == "hand" and region[1] < len(player.hand):
+            return region[1]
+        return None
+
+    @staticmethod
+    def _hand_position(i):
+        """プレイヤー1の手札の i 枚目を描画する左上の座標。"""
+        left = (WINDOW_WIDTH - HAND_SIZE * (CARD_WIDTH + 1) + 1) // 2
+        return left + i * (CARD_WIDTH + 1), HAND_Y
+
+    def draw(self):
+        """
+        ゲームシーンの描画処理。
+        プレイヤー情報、選択されたカード、現在のターン数などを画面に表示する。
+        各パネルは表示する値が変わったときだけ描き直し、それ以外はキャッシュした画像を転送する。
+        カードはアトラスに描いておいた絵柄を1枚につき1回転送する。
+        """
+        super().draw()
+        # 現在のターン数を表示
+        self.turn_panel.draw(10, 10, self.game.turn)
+
+        # 各プレイヤーのHUD(Head-Up Display)を描画
+        for panel, player, x in zip(self.hud_panels, self.game.players, (10, 128)):
+            panel.draw(x, 20, self._player_key(player), player)
+
+        if self.atlas is None:
+            self.atlas = CardAtlas(self.master_cards, self.mg2_8)
+            self.atlas.build()
+
+        with PROFILER.section("_draw_cards"):
+            # 選択されたカード(場のカード)を描画
+            for player, x in zip(self.game.players, FIELD_X):
+                if player.field_card:
+                    self.atlas.draw(player.field_card, x, FIELD_Y)
+
+            # プレイヤー1の手札を描画 (マウスカーソルが指しているカードは少し持ち上げて枠で囲む)
+            player = self.game.players[0]
+            hovered = self._hovered_hand(player) if self.game.phase == "select" else None
+            for i, card in enumerate(player.hand):
+                x, y = self._hand_position(i)
+                if i == hovered:
+                    y -= 4
+                    pyxel.rectb(x - 1, y - 1, CARD_WIDTH + 2, CARD_HEIGHT + 2, 7)
+                self.atlas.draw(card, x, y)
+
+        # 両方のカードが選択されたら "Battle!" の文字を表示
+        if self.battle_wait:
+            pyxel.text(80, 150, "Battle!", 8, self.mg2_8)
+
+    def _player_key(self, player):
+        """プレイヤーHUDパネルの内容を表すキーを返す。"""
+        return (player.life, player.name, tuple(card.name for card in player.hand))
+
+    def _draw_turn(self, surface=pyxel):
+        """
+        現在のターン数を描画する。
+
+        Args:
+            surface (pyxel.Image, optional): 描画先。省略時は画面に直接描画する。
+        """
+        surface.text(0, 0, f"Turn: {self.game.turn}", 3, self.umplus10)
+
+    @profiled("_draw_player_hud")
+    def _draw_player_hud(self, player, x=0, y=0, color=3, surface=pyxel):
+        """
+        指定されたプレイヤーのHUD（名前、ライフ、手札）を指定座標に描画する。
+
+        Args:
+            player (Player): 描画対象のプレイヤーオブジェクト。
+            x (int, optional): 描画を開始するX座標。
+            y (int, optional): 描画を開始するY座標。
+            color (int, optional): 描画に使用するpyxelのカラーコード。デフォルトは3。
+            surface (pyxel.Image, optional): 描画先。省略時は画面に直接描画する。
+        """
+        # ライフを描画
+        life_y = y
+        surface.text(x, life_y, f"Life: {player.life}", color, self.umplus10)
+
+        # プレイヤー名を描画
+        player_name_y = y + 10
+        surface.text(x, player_name_y, player.name, color, self.umplus10)
+
+        # 手札のリストを描画
+        hand_start_y = y + 24  # 手札表示の開始Y座標
+        line_height = 10       # 手札1枚ごとの行の高さ
+
+        for i, card in enumerate(player.hand):
+            # 手札の番号とカード名を表示
+            display_text = f"{i+1}:{card.name}"
+            draw_y = hand_start_y + i * line_height
+            surface.text(x, draw_y, display_text, color, self.mg2_8)
+
+    @profiled("_battle")
+    def _battle(self):
+        """
+        戦闘処理を実行する。
+        効果解決から勝敗判定までのフェーズをエンジンで進め (resolve_turn と同じ)、ターンを進める。
+        勝敗判定の前に、このターンのダメージを記録する。
+        """
+        game = self.game
+        lives = [player.life for player in game.players]
+        effect_phase(game)
+        battle_phase(game)
+        contract_phase(game)
+        LOGGER.event(game, "battle",
+                     damage=[before - player.life for before, player in zip(lives, game.players)],
+                     life=[player.life for player in game.players])
+        end_phase(game)
+
+
+class ReplayScene(GameScene):
+    """
+    リプレイを再生するシーン。
+    プレイヤーの入力の代わりにリプレイに記録されたカード選択を使い、任意の倍速で再生する。
+    """
+
+    def __init__(self, app, replay, speed=REPLAY_SPEED, turbo=False):
+        """
+        Args:
+            app (App): アプリケーション。
+            replay (Replay): 再生するリプレイ。
+            speed (float, optional): 再生速度 (実時間の何倍か)。
+            turbo (bool, optional): True の場合、戦闘演出を待たずに再生する。
+        """
+        self.replay = replay
+        self.speed = speed
+        self.turn_index = 0     # 次に再生するターンの位置
+        super().__init__(app, replay_file=None,
+                         game=replay_game(replay, MASTER_CARDS, ("Alice", "Bob")), turbo=turbo,
+                         snapshot_file=None)
+
+    def _register_select(self, scheduler):
+        """カード選択フェーズに入ったら、入力を待たずにリプレイのカード選択を使う。"""
+        scheduler.on_enter("select", self._replay_select)
+
+    def _replay_select(self):
+        """リプレイに記録された次のターンのカード選択で場に出す。"""
+        if self.turn_index >= len(self.replay.turns):
+            return  # 記録されたターンを全て再生した
+        index1, index2 = self.replay.turns[self.turn_index]
+        self.turn_index += 1
+        self._select(index1, index2)
+
+    def update(self):
+        """
+        リプレイの再生処理。
+        1フレームごとに再生速度分だけスケジューラの時間を進める。
+        高速再生では、戦闘待機のタイマーが1フレームの中で何度も発火して複数のターンが進む。
+        """
+        self.scheduler.update(self.speed)
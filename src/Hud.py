@@ -0,0 +1,135 @@
+import pyxel
+from src.settings import *
+
+
+_DIRTY = object()  # 描き直しが必要な状態を表す印
+
+
+class Panel:
+    """
+    描画結果を pyxel.Image にキャッシュしておく画面部品。
+    内容を表すキーが前回と変わったときだけ描き直し、それ以外のフレームではキャッシュを転送するだけにする。
+    """
+
+    def __init__(self, width, height, render, colkey=0):
+        """
+        Args:
+            width (int): パネルの幅。
+            height (int): パネルの高さ。
+            render (Callable): (描画先の pyxel.Image, *args) を受け取り、パネルの内容を左上(0, 0)基準で描画する関数。
+            colkey (int, optional): 背景色。転送時には透明色として扱う。
+        """
+        self.width = width
+        self.height = height
+        self.render = render
+        self.colkey = colkey
+        self.image = None       # 描画結果のキャッシュ (最初の描画時に生成する)
+        self.key = _DIRTY       # キャッシュを描いたときのキー
+        self.render_count = 0   # 描き直した回数 (確認用)
+
+    def invalidate(self):
+        """次の描画で必ず描き直すようにする。"""
+        self.key = _DIRTY
+
+    def draw(self, x, y, key, *args):
+        """
+        パネルを画面に描画する。キーが前回と異なる場合だけ、キャッシュを描き直す。
+
+        Args:
+            x (int): 描画先のX座標。
+            y (int): 描画先のY座標。
+            key (Hashable): パネルの内容を表すキー。表示する値が変わればキーも変わるようにする。
+            *args: render に渡す引数。
+        """
+        if self.image is None:
+            self.image = pyxel.Image(self.width, self.height)
+        if self.key is _DIRTY or key != self.key:
+            self.image.cls(self.colkey)
+            self.render(self.image, *args)
+            self.key = key
+            self.render_count += 1
+        pyxel.blt(x, y, self.image, 0, 0, self.width, self.height, self.colkey)
+
+
+class HitGrid:
+    """
+    クリックできる領域 (矩形) を登録しておき、座標から領域を引く一様格子の空間索引。
+
+    画面を HIT_GRID_CELL ピクセル四方のマスに分け、各マスにそのマスと重なる領域を登録順に持たせる。
+    座標から引くときはそのマスの領域だけを調べるため、画面上の領域の数が増えても手間は変わらない。
+    重なった領域では、後から登録した領域を優先する (後に描いたものが手前に見えるのと同じ)。
+    """
+
+    def __init__(self, width, height, cell=HIT_GRID_CELL):
+        """
+        Args:
+            width (int): 対象とする範囲 (画面) の幅。
+            height (int): 対象とする範囲の高さ。
+            cell (int, optional): 1マスの大きさ。
+        """
+        self.cell = cell
+        self.columns = (width + cell - 1) // cell
+        self.rows = (height + cell - 1) // cell
+        self.cells = [[] for _ in range(self.columns * self.rows)]  # マス → [(登録順, キー, x, y, 幅, 高さ)]
+        self.regions = {}   # キー → 登録した領域
+        self._order = 0
+
+    def _cells_of(self, x, y, w, h):
+        cell = self.cell
+        x0, y0 = max(0, x // cell), max(0, y // cell)
+        x1 = min(self.columns - 1, (x + w - 1) // cell)
+        y1 = min(self.rows - 1, (y + h - 1) // cell)
+        return [row * self.columns + column for row in range(y0, y1 + 1) for column in range(x0, x1 + 1)]
+
+    def add(self, key, x, y, w, h):
+        """
+        領域を登録する。同じキーの領域が既にあれば置き換える。
+
+        Args:
+            key (Hashable): 領域を識別するキー (at が返す値)。
+            x (int): 領域の左上のX座標。
+            y (int): 領域の左上のY座標。
+            w (int): 領域の幅。
+            h (int): 領域の高さ。
+        """
+        self.remove(key)
+        region = (self._order, key, x, y, w, h)
+        self._order += 1
+        self.regions[key] = region
+        for i in self._cells_of(x, y, w, h):
+            self.cells[i].append(region)
+
+    def remove(self, key):
+        """キーの領域を取り除く。登録されていなければ何もしない。"""
+        region = self.regions.pop(key, None)
+        if region is None:
+            return
+        for i in self._cells_of(*region[2:]):
+            self.cells[i].remove(region)
+
+    def clear(self):
+        """全ての領域を取り除く。"""
+        for regions in self.cells:
+            regions.clear()
+        self.regions.clear()
+
+    def at(self, x, y):
+        """
+        座標を含む領域のうち、最も手前 (最後に登録した) 領域のキーを返す。
+
+        Args:
+            x (int): X座標 (pyxel.mouse_x など)。
+            y (int): Y座標。
+
+        Returns:
+            Hashable | None: 領域のキー。どの領域にも含まれなければ None。
+        """
+        column, row = x // self.cell, y // self.cell
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return None
+        found = None
+        for region in self.cells[row * self.columns + column]:
+            _, key, rx, ry, rw, rh = region
+            if rx <= x < rx + rw and ry <= y < ry + rh and (found is None or region[0] > found[0]):
+                found = region
+        return None if found is None else found[1]
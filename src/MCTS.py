@@ -0,0 +1,308 @@
+import math
+import random
+import time
+from src.settings import *
+from src.DataClass import *
+from src.Matchup import *
+from src.State import StateCodec, GRAVEYARD_BITS
+
+
+ROLLOUT_DEPTH = 40          # ロールアウトで打ち切るまでのターン数
+ROLLOUT_GREEDY = 0.7        # ロールアウトで期待値が最も高いカードを選ぶ確率
+MAX_TABLE_SIZE = 200000     # 置換表に保持するノード数の上限 (超えたら作り直す)
+
+
+class Node:
+    """
+    探索木のノード。同時手番ゲームとして、各プレイヤーの行動ごとの統計を別々に持つ (decoupled UCT)。
+    行動は手札のカードのid (同じカードが複数枚あっても1つの行動として扱う)。
+    """
+    __slots__ = ("visits", "actions", "counts", "values")
+
+    def __init__(self, hand1, hand2):
+        self.visits = 0
+        self.actions = (sorted(set(hand1)), sorted(set(hand2)))
+        self.counts = ([0] * len(self.actions[0]), [0] * len(self.actions[1]))
+        self.values = ([0.0] * len(self.actions[0]), [0.0] * len(self.actions[1]))
+
+    def select(self, player, exploration):
+        """
+        UCB1 で指定したプレイヤーの行動を選ぶ。未試行の行動があればそれを優先する。
+
+        Args:
+            player (int): プレイヤー番号。
+            exploration (float): 探索項の係数。
+
+        Returns:
+            int: 選んだ行動の位置。
+        """
+        counts = self.counts[player]
+        values = self.values[player]
+        log_visits = math.log(self.visits + 1)
+        best, best_score = 0, -1.0
+        for i, n in enumerate(counts):
+            if n == 0:
+                return i
+            score = values[i] / n + exploration * math.sqrt(log_visits / n)
+            if score > best_score:
+                best, best_score = i, score
+        return best
+
+
+class MCTSAgent:
+    """
+    モンテカルロ木探索でカードを選ぶAI。
+    状態は (手札1, 手札2, ライフ1, ライフ2, 魂1, 魂2, ターン, 山札1, 山札2, キー) のタプルで表し、山札からのドローは確率的な遷移として扱う。
+    山札はカードプールの位置ごとの残り枚数のタプルで、そこから重み付きで1枚引く。
+    探索は時間または反復回数の予算ごとに少しずつ進められるため、毎フレーム呼び出して人間の選択中に探索を続けられる。
+    同じ局面は置換表で共有され、別の経路から到達しても二重に探索しない。
+    置換表のキーには、状態を StateCodec で1つの整数に詰め込んだものを使う。
+    キーは状態の最後の要素として持ち、1ターン進めるたびに変わった部分のビットだけを足し引きして更新する。
+    """
+
+    def __init__(self, player_index=1, cards=MASTER_CARDS, exploration=0.7, iterations=300, seed=None):
+        """
+        Args:
+            player_index (int, optional): AIが担当するプレイヤー番号。
+            cards (list[Card], optional): 山札として使うカードのリスト。
+            exploration (float, optional): UCB1 の探索項の係数。
+            iterations (int, optional): 戦略として呼び出されたときの反復回数。
+            seed (int, optional): 乱数のシード。
+        """
+        self.player_index = player_index
+        self.cards = cards
+        self.exploration = exploration
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+        self.table = {}         # 置換表 (状態を詰め込んだ整数 → Node)
+        self.codec = StateCodec(cards)
+        self.root = None        # 探索中の局面
+
+        # id で引けるスピードとカードプール上の位置、位置で引けるid
+        self.speed = {card.id: card.speed for card in cards}
+        self.slot = {card.id: i for i, card in enumerate(cards)}
+        self.deck_ids = [card.id for card in cards]
+        self.composition = ((DECK_COPIES,) * len(cards),) * 2  # 各プレイヤーの山札の構成 (探索時にゲームから取り出す)
+        self._matrices = {}
+
+        # キーの差分更新用: プレイヤーごとに、id で引ける手札・墓地の1枚分の値、墓地全体のビットマスク
+        codec = self.codec
+        self._hand_bit = [{card.id: 1 << shift for card, shift in zip(cards, codec.hand_shift[p])} for p in range(2)]
+        self._grave_bit = [{card.id: 1 << shift for card, shift in zip(cards, codec.graveyard_shift[p])}
+                           for p in range(2)]
+        self._grave_mask = [sum(((1 << GRAVEYARD_BITS) - 1) << shift for shift in codec.graveyard_shift[p])
+                            for p in range(2)]
+
+        # ロールアウト方策用: 山札から一様に引いた相手に対する (与ダメージ - 被ダメージ) の期待値
+        table = get_matchup_table(cards)
+        self.score = {}
+        for card in cards:
+            dealt, taken = table.expected_damage(card)
+            self.score[card.id] = dealt - taken
+
+    def _matrix(self, soul_point):
+        """魂の数に対応する [攻撃側のid][防御側のid] のダメージ表を返す。"""
+        matrix = self._matrices.get(soul_point)
+        if matrix is None:
+            # マッチアップ表はカードプール上の位置で引くため、id で引けるように並べ替える
+            rows = get_matchup_table(self.cards).matrix(soul_point).tolist()
+            size = max(self.deck_ids) + 1
+            matrix = [[0] * size for _ in range(size)]
+            for attacker, row in zip(self.deck_ids, rows):
+                target = matrix[attacker]
+                for defender, damage in zip(self.deck_ids, row):
+                    target[defender] = damage
+            self._matrices[soul_point] = matrix
+        return matrix
+
+    def state_of(self, game):
+        """
+        ゲームデータから探索用の状態を作る。
+
+        Args:
+            game (GameData): "select" フェーズのゲームデータ。
+
+        Returns:
+            tuple: 探索用の状態。
+
+        Raises:
+            ValueError: 持続中の効果や契約があるなど、探索で扱えないゲームの場合 (StateCodec.check_searchable)。
+        """
+        self.codec.check_searchable(game)
+        player1, player2 = game.players
+        return (tuple(sorted(card.id for card in player1.hand)),
+                tuple(sorted(card.id for card in player2.hand)),
+                player1.life, player2.life,
+                player1.soul_point, player2.soul_point, game.turn,
+                tuple(player1.deck.counts), tuple(player2.deck.counts),
+                self.codec.encode(game))
+
+    def _draw(self, hand, deck, player):
+        """
+        山札の残りから重み付きで1枚引いて手札に加える。山札が空なら墓地を山札に戻してから引く。
+
+        Args:
+            hand (list[int]): 使ったカードを除いた手札のid。引いたカードが追加される。
+            deck (tuple[int, ...]): 山札の残り枚数。
+            player (int): プレイヤー番号。
+
+        Returns:
+            tuple[tuple[int, ...], bool]: 引いた後の山札の残り枚数と、墓地を山札に戻したかどうか。
+        """
+        total = sum(deck)
+        recycled = total == 0
+        if recycled:
+            deck = list(self.composition[player])
+            for card_id in hand:
+                deck[self.slot[card_id]] -= 1
+            total = sum(deck)
+        else:
+            deck = list(deck)
+        r = self.rng.randrange(total)
+        for slot, count in enumerate(deck):
+            r -= count
+            if r < 0:
+                break
+        deck[slot] -= 1
+        hand.append(self.deck_ids[slot])
+        return tuple(deck), recycled
+
+    def _step(self, state, card1, card2):
+        """
+        両プレイヤーが選んだカードで1ターン進める。
+
+        Returns:
+            tuple[tuple, float | None]: 次の状態と、決着した場合のプレイヤー1から見た価値 (勝ち1, 負け0, 引き分け0.5)。
+        """
+        hand1, hand2, life1, life2, soul1, soul2, turn, deck1, deck2, key = state
+        damage1 = self._matrix(soul1)[card1][card2]
+        damage2 = self._matrix(soul2)[card2][card1]
+        life1 -= damage2
+        life2 -= damage1
+        if life1 <= 0 or life2 <= 0:
+            if life1 <= 0 and life2 <= 0:
+                speed1, speed2 = self.speed[card1], self.speed[card2]
+                value = 1.0 if speed1 > speed2 else 0.0 if speed1 < speed2 else 0.5
+            else:
+                value = 1.0 if life2 <= 0 else 0.0
+            return None, value
+        if turn + 1 > MAX_TURNS:
+            # Engine.play_match と同じく、次のターンが MAX_TURNS を超えたら引き分けとして打ち切る
+            return None, 0.5
+
+        # 使ったカードを手札から除き (墓地へ送り)、山札から1枚引く。キーも変わった部分だけ更新する
+        codec = self.codec
+        key += (1 << codec.turn_shift) - (damage2 << codec.life_shift[0]) - (damage1 << codec.life_shift[1])
+        new_hands = []
+        new_decks = []
+        for p, hand, card, deck in ((0, hand1, card1, deck1), (1, hand2, card2, deck2)):
+            new_hand = list(hand)
+            new_hand.remove(card)
+            key += self._grave_bit[p][card] - self._hand_bit[p][card]
+            deck, recycled = self._draw(new_hand, deck, p)
+            if recycled:
+                key &= ~self._grave_mask[p]
+            key += self._hand_bit[p][new_hand[-1]]
+            new_hand.sort()
+            new_hands.append(tuple(new_hand))
+            new_decks.append(deck)
+        return (new_hands[0], new_hands[1], life1, life2, soul1, soul2, turn + 1,
+                new_decks[0], new_decks[1], key), None
+
+    def _rollout(self, state):
+        """
+        対戦を一定ターン進め、プレイヤー1から見た価値を返す。
+        各プレイヤーは ROLLOUT_GREEDY の確率で期待値が最も高いカードを、それ以外はランダムにカードを選ぶ。
+        """
+        rng = self.rng
+        score = self.score.__getitem__
+        for _ in range(ROLLOUT_DEPTH):
+            hand1, hand2 = state[0], state[1]
+            card1 = max(hand1, key=score) if rng.random() < ROLLOUT_GREEDY else rng.choice(hand1)
+            card2 = max(hand2, key=score) if rng.random() < ROLLOUT_GREEDY else rng.choice(hand2)
+            state, value = self._step(state, card1, card2)
+            if value is not None:
+                return value
+        # 打ち切った場合はライフの差で評価する
+        return 0.5 + max(-0.5, min(0.5, (state[2] - state[3]) / (2 * INITIAL_LIFE)))
+
+    def _iterate(self):
+        """探索を1回進める (選択 → 展開 → ロールアウト → 逆伝播)。"""
+        path = []
+        state = self.root
+        while True:
+            key = state[-1]
+            node = self.table.get(key)
+            if node is None:
+                self.table[key] = Node(state[0], state[1])
+                value = self._rollout(state)
+                break
+            a1 = node.select(0, self.exploration)
+            a2 = node.select(1, self.exploration)
+            path.append((node, a1, a2))
+            state, value = self._step(state, node.actions[0][a1], node.actions[1][a2])
+            if value is not None:
+                break
+
+        for node, a1, a2 in path:
+            node.visits += 1
+            node.counts[0][a1] += 1
+            node.values[0][a1] += value
+            node.counts[1][a2] += 1
+            node.values[1][a2] += 1.0 - value
+
+    def search(self, game, time_budget=None, iterations=None):
+        """
+        現在の局面について探索を進める。局面が前回と同じなら、前回までの探索の続きから進める。
+
+        Args:
+            game (GameData): "select" フェーズのゲームデータ。
+            time_budget (float, optional): 探索に使う時間 (秒)。
+            iterations (int, optional): 探索の反復回数。どちらも省略した場合は self.iterations 回。
+        """
+        state = self.state_of(game)
+        self.composition = tuple(player.deck.composition for player in game.players)
+        if state != self.root:
+            self.root = state
+            if len(self.table) > MAX_TABLE_SIZE:
+                self.table.clear()
+
+        if time_budget is None:
+            for _ in range(iterations or self.iterations):
+                self._iterate()
+        else:
+            deadline = time.perf_counter() + time_budget
+            done = 0
+            while time.perf_counter() < deadline and (iterations is None or done < iterations):
+                self._iterate()
+                done += 1
+
+    def best_move(self, game, player_index=None):
+        """
+        探索結果から、最も多く試行された行動を手札の位置として返す。
+
+        Args:
+            game (GameData): "select" フェーズのゲームデータ。
+            player_index (int, optional): 選ぶプレイヤーの番号。省略時は self.player_index。
+
+        Returns:
+            int: 選んだ手札の位置。
+        """
+        if player_index is None:
+            player_index = self.player_index
+        hand = game.players[player_index].hand
+        node = self.table.get(self.codec.encode(game))
+        if node is None or node.visits == 0:
+            return self.rng.randrange(len(hand))
+        counts = node.counts[player_index]
+        card_id = node.actions[player_index][counts.index(max(counts))]
+        return next(i for i, card in enumerate(hand) if card.id == card_id)
+
+    def __call__(self, game, player_index, rng=random):
+        """
+        戦略として呼び出されたときは、決められた反復回数だけ探索して選ぶ。
+        探索には自分の乱数列 (seed) を使い、渡された乱数生成器やエージェントの設定は変更しない。
+        席ごとに別のエージェントを使う (AI.create_strategy)。
+        """
+        self.search(game)
+        return self.best_move(game, player_index)
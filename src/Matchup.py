@@ -0,0 +1,213 @@
+from array import array
+import numpy as np
+from src.settings import *
+from src.DataClass import *
+from src.Batch import CardTable, batch_damage
+
+
+class MatchupTable:
+    """
+    カードプール内の全ての組み合わせについて、最終ダメージを事前計算した表。
+    ダメージは (攻撃側, 防御側, 魂の数) だけで決まるため、魂の数ごとに [攻撃側の位置, 防御側の位置] の行列として持つ。
+    位置はカードプールでの並び順で、id の最大値ではなくカードの枚数だけの大きさで済む。
+    行列は魂の数ごとに、初めて引かれたときに作る (使わない魂の数の分はメモリを使わない)。
+    """
+
+    def __init__(self, cards):
+        """
+        カードのリストから表を生成する。
+
+        Args:
+            cards (list[Card]): カードプール。
+        """
+        self.cards = list(cards)
+        self.size = len(self.cards)
+        self.card_table = CardTable.from_cards(self.cards)
+        self.position = {card.id: i for i, card in enumerate(self.cards)}  # id → カードプール上の位置
+        # 魂の数 → [攻撃側の位置 * size + 防御側の位置] で引ける最終ダメージ (int32 の1次元配列)
+        # 1件ずつ引くときは NumPy のスカラー取り出しより array の方が速く、NumPy からはコピーせずに行列として読める
+        self._damage = [None] * (MAX_SOUL_POINT + 1)
+
+    def contains(self, card):
+        """
+        カードが表に含まれているかどうかを返す。
+        同じ id でもカードプールのものと定義 (ステータスなど) が違えば含まれないとみなす。
+
+        Args:
+            card (Card | CardInstance): 確認するカード。
+
+        Returns:
+            bool: 表に含まれていれば True。
+        """
+        position = self.position.get(card.id)
+        return position is not None and _same_card(self.cards[position], card.base)
+
+    def built(self, soul_point):
+        """魂の数に対応する最終ダメージの配列を、もう作ってあるかどうかを返す。"""
+        return self._damage[soul_point] is not None
+
+    def damage(self, soul_point):
+        """
+        魂の数に対応する最終ダメージの1次元配列を返す。まだ作っていなければここで作る。
+
+        Args:
+            soul_point (int): 攻撃側プレイヤーの魂の数 (MAX_SOUL_POINT 以下)。
+
+        Returns:
+            array.array: [攻撃側の位置 * size + 防御側の位置] で引ける最終ダメージ。
+        """
+        damage = self._damage[soul_point]
+        if damage is None:
+            n = self.size
+            values = batch_damage(self.card_table, np.arange(n)[:, None], np.arange(n)[None, :], soul_point)
+            damage = self._damage[soul_point] = array("i", values.astype(np.int32).tobytes())
+        return damage
+
+    def matrix(self, soul_point=0):
+        """
+        分析用に、カードプールの並び順で引けるマッチアップ行列を返す。
+
+        Args:
+            soul_point (int, optional): 攻撃側プレイヤーの魂の数。
+
+        Returns:
+            np.ndarray: [攻撃側の位置, 防御側の位置] で引ける最終ダメージの行列。
+                MAX_SOUL_POINT 以下なら表と同じメモリを参照する (書き換えないこと)。
+        """
+        n = self.size
+        if soul_point > MAX_SOUL_POINT:
+            return batch_damage(self.card_table, np.arange(n)[:, None], np.arange(n)[None, :], soul_point)
+        return np.frombuffer(self.damage(soul_point), dtype=np.int32).reshape(n, n)
+
+    def dominated_cards(self, soul_point=0):
+        """
+        他のカードに支配されているカードを返す。
+        カードAがカードBに支配されるとは、どの相手に対してもBの与ダメージがA以上かつ被ダメージがA以下で、
+        少なくとも一方が厳密に優れている場合をいう。
+
+        Args:
+            soul_point (int, optional): 魂の数。
+
+        Returns:
+            list[tuple[Card, Card]]: (支配されているカード, 支配しているカード) の組のリスト。
+        """
+        dealt = self.matrix(soul_point)     # [自分, 相手] 自分が与えるダメージ
+        taken = dealt.T                     # [自分, 相手] 自分が受けるダメージ
+        result = []
+        for a in range(len(self.cards)):
+            not_worse = (dealt >= dealt[a]).all(axis=1) & (taken <= taken[a]).all(axis=1)
+            better = (dealt > dealt[a]).any(axis=1) | (taken < taken[a]).any(axis=1)
+            for b in np.flatnonzero(not_worse & better):
+                result.append((self.cards[a], self.cards[b]))
+        return result
+
+    def expected_damage(self, card, soul_point=0, opponent_soul_point=0):
+        """
+        カードプールから一様ランダムに配られた手札の相手と戦ったときの期待ダメージを返す。
+        相手がランダムに選ぶカードは、カードプールからの一様な抽出と同じ分布になる。
+
+        Args:
+            card (Card): 評価するカード。
+            soul_point (int, optional): 自分の魂の数。
+            opponent_soul_point (int, optional): 相手の魂の数。
+
+        Returns:
+            tuple[float, float]: (与ダメージの期待値, 被ダメージの期待値)。
+
+        Raises:
+            ValueError: カードがカードプールに含まれていない場合。
+        """
+        if not self.contains(card):
+            raise ValueError(f"card {card.id} ({card.name}) is not in the card pool of this table")
+        position = self.position[card.id]
+        dealt = self.matrix(soul_point)[position].mean()
+        taken = self.matrix(opponent_soul_point)[:, position].mean()
+        return float(dealt), float(taken)
+
+
+# カードプールの内容 (カードのタプル) → 生成済みの表
+# リストを書き換えて内容が変われば別のキーになるため、次に get_matchup_table を呼んだときに作り直される
+_tables = {}
+# id(カードプールのリスト) → (リスト, 最後にそのリストから引いた表)。lookup_damage で毎回内容を比べないための近道
+_by_list = {}
+
+
+def _same_card(card, other):
+    """2枚が同じカードの定義かどうか (同じオブジェクトなら比較を省く)。"""
+    return card is other or card == other
+
+
+def calc_damage(attacker, defender, soul_point):
+    """
+    攻撃側のカードが防御側のプレイヤーに与える最終ダメージを計算する。
+
+    基本ダメージ = 攻撃力 - 相手の防御力 (マイナスなら0)
+    最終ダメージ = 基本ダメージ * (1 + 魂の数 * 0.1) (小数点以下は切り捨て)
+
+    Args:
+        attacker (Card): 攻撃側のカード。
+        defender (Card): 防御側のカード。
+        soul_point (int): 攻撃側プレイヤーの魂の数。
+
+    Returns:
+        int: 最終ダメージ。
+    """
+    base_damage = attacker.attack - defender.defense
+    return int(max(0, base_damage * (1 + soul_point * 0.1)))
+
+
+def get_matchup_table(cards=MASTER_CARDS, rebuild=False):
+    """
+    カードプールに対応するマッチアップ表を返す。
+    表はカードプールの内容 (各カードの定義) をキーにキャッシュするため、リストをその場で書き換えても、
+    内容が変わっていれば作り直した表を返す。
+
+    Args:
+        cards (list[Card], optional): カードプール。
+        rebuild (bool, optional): True なら生成済みの表を破棄して作り直す。
+
+    Returns:
+        MatchupTable: マッチアップ表。
+    """
+    key = tuple(cards)
+    table = None if rebuild else _tables.get(key)
+    if table is None:
+        table = _tables[key] = MatchupTable(cards)
+    _by_list[id(cards)] = (cards, table)
+    return table
+
+
+def lookup_damage(attacker, defender, soul_point, cards=MASTER_CARDS):
+    """
+    マッチアップ表から最終ダメージを引く。
+    次の場合は表を使わずに calc_damage で計算する:
+    修正値を持つカード (DataClass.CardInstance)、カードプールに含まれないカード、表の範囲を超える魂の数、
+    MATCHUP_TABLE_MAX_CARDS 枚より大きいカードプール (表が大きくなりすぎるため)。
+    毎回カードプールの内容を比べないよう、同じリストには前回の表を使う。リストがその場で書き換えられていても、
+    引く2枚が表のカードと同じ定義かどうかを確かめるため、古い表から違うダメージを返すことはない。
+
+    Args:
+        attacker (Card): 攻撃側のカード。
+        defender (Card): 防御側のカード。
+        soul_point (int): 攻撃側プレイヤーの魂の数。
+        cards (list[Card], optional): 2枚のカードが属するカードプール。
+
+    Returns:
+        int: 最終ダメージ。
+    """
+    if (attacker.modified or defender.modified or soul_point > MAX_SOUL_POINT
+            or len(cards) > MATCHUP_TABLE_MAX_CARDS):
+        return calc_damage(attacker, defender, soul_point)
+    entry = _by_list.get(id(cards))
+    if entry is not None and entry[0] is cards:
+        table = entry[1]    # よく通る経路: 生成済みの表を使う
+    else:
+        table = get_matchup_table(cards)
+    position = table.position
+    a = position.get(attacker.id)
+    d = position.get(defender.id)
+    if (a is None or d is None or not _same_card(table.cards[a], attacker.base)
+            or not _same_card(table.cards[d], defender.base)):
+        # カードプール外のカード (同じ id の別の定義を含む)
+        return calc_damage(attacker, defender, soul_point)
+    return table.damage(soul_point)[a * table.size + d]
@@ -0,0 +1,652 @@
+import argparse
+import asyncio
+import queue
+import random
+import struct
+import threading
+import time
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.State import ALL_PHASES
+
+
+# 通信の形式
+#   1つのメッセージは、ヘッダ (本体の長さ 2バイト, 種類 1バイト) と本体からなる
+#   クライアント → サーバ: JOIN (相手の種類 1バイト)、SELECT (ターン数 2バイト, 手札の位置 1バイト)
+#   サーバ → クライアント: WELCOME (対戦の番号 4バイト, プレイヤー番号 1バイト)、DELTA (状態の差分)、ERROR (理由)
+FRAME = struct.Struct("<HB")
+JOIN, SELECT, WELCOME, DELTA, ERROR = range(1, 6)
+JOIN_BODY = struct.Struct("<B")
+SELECT_BODY = struct.Struct("<HB")
+WELCOME_BODY = struct.Struct("<IB")
+OPPONENT_PLAYER, OPPONENT_AI = 0, 1     # JOIN で指定する相手の種類 (他のクライアント、サーバのAI)
+
+# 状態の差分の形式 (受け取るクライアントごとに作る)
+#   ヘッダ: ターン数 (2バイト), フェーズ (1バイト), 変化した項目のビット (1バイト)
+#   以降、ビットが立っている項目だけを下位ビットから順に並べる
+#     ライフ (2バイト)、魂の数 (1バイト)、自分の手札 (取り除く位置の数と位置、追加するカードの数とid)、
+#     両者の手札の枚数 (1バイトずつ)、直前のターンに出したカード (2人分の id + 1, 無ければ 0)、
+#     勝者 (0: 引き分け, 1: プレイヤー1, 2: プレイヤー2)
+#   相手の手札は枚数だけを送り、カードは送らない。カードのidは可変長 (LEB128) の符号なし整数で表す
+DELTA_HEADER = struct.Struct("<HBB")
+LIFE = struct.Struct("<h")
+LIFE_BIT, SOUL_BIT = 0x01, 0x04     # プレイヤー2は1つ左のビット
+HAND_BIT, HAND_SIZE_BIT = 0x10, 0x20
+PLAYED_BIT, WINNER_BIT = 0x40, 0x80
+
+
+def _frame(kind, body=b""):
+    return FRAME.pack(len(body), kind) + body
+
+
+def _put_varint(body, value):
+    """0以上の整数を、下位から7ビットずつ (続きがあれば最上位ビットを立てて) body に追加する。"""
+    while value >= 0x80:
+        body.append(value & 0x7F | 0x80)
+        value >>= 7
+    body.append(value)
+
+
+def _get_varint(data, pos):
+    """
+    _put_varint で書いた整数を読む。
+
+    Returns:
+        tuple[int, int]: 読んだ整数と、その次の位置。
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _hand_diff(old, new):
+    """
+    手札の変化を、取り除く位置と末尾に追加するカードで表す。
+    エンジンは選んだカードを取り除き、引いたカードを末尾に追加するため、通常は1枚ずつで済む。
+    """
+    removed = []
+    j = 0
+    for i, card_id in enumerate(old):
+        if j < len(new) and new[j] == card_id:
+            j += 1
+        else:
+            removed.append(i)
+    return removed, new[j:]
+
+
+class MatchView:
+    """
+    1人のプレイヤーから見える対戦の状態 (ターン、フェーズ、ライフ、魂の数、自分の手札、両者の手札の枚数、
+    直前に出したカード、勝者)。相手の手札はカードを持たず、枚数だけを持つ。
+    サーバはクライアントごとに、送る前と後の MatchView の差分だけを送り、クライアントは受け取った差分を
+    自分の MatchView に適用する。カードはidで持つ。
+    """
+    __slots__ = ("turn", "phase", "lives", "souls", "hand", "hand_sizes", "played", "winner")
+
+    def __init__(self):
+        self.turn = 0
+        self.phase = "start"
+        self.lives = [0, 0]
+        self.souls = [0, 0]
+        self.hand = []
+        self.hand_sizes = [0, 0]
+        self.played = [None, None]
+        self.winner = None
+
+    @classmethod
+    def of(cls, game, index, played=(None, None)):
+        """
+        ゲームデータから、指定したプレイヤーに見える MatchView を作る。
+
+        Args:
+            game (GameData): ゲームデータ。
+            index (int): 見るプレイヤーの番号。
+            played (tuple[int | None, int | None], optional): 直前のターンに各プレイヤーが出したカードのid。
+
+        Returns:
+            MatchView: 作成した MatchView。
+        """
+        view = cls()
+        view.turn = game.turn
+        view.phase = game.phase
+        view.lives = [player.life for player in game.players]
+        view.souls = [player.soul_point for player in game.players]
+        view.hand = [card.id for card in game.players[index].hand]
+        view.hand_sizes = [len(player.hand) for player in game.players]
+        view.played = list(played)
+        view.winner = game.winner
+        return view
+
+    def copy(self):
+        """別のスレッドに渡すための複製を作る。"""
+        view = MatchView()
+        view.turn, view.phase, view.winner = self.turn, self.phase, self.winner
+        view.lives, view.souls, view.played = list(self.lives), list(self.souls), list(self.played)
+        view.hand, view.hand_sizes = list(self.hand), list(self.hand_sizes)
+        return view
+
+    def diff(self, new):
+        """
+        この状態から new への差分をバイト列に変換する。
+
+        Args:
+            new (MatchView): 新しい状態。
+
+        Returns:
+            bytes: 差分。
+        """
+        mask = 0
+        body = bytearray()
+        for p in range(2):
+            if new.lives[p] != self.lives[p]:
+                mask |= LIFE_BIT << p
+        for p in range(2):
+            if new.souls[p] != self.souls[p]:
+                mask |= SOUL_BIT << p
+        if new.hand != self.hand:
+            mask |= HAND_BIT
+        if new.hand_sizes != self.hand_sizes:
+            mask |= HAND_SIZE_BIT
+        if new.played != self.played:
+            mask |= PLAYED_BIT
+        if new.winner != self.winner or (new.phase == RESULT_PHASE and self.phase != RESULT_PHASE):
+            mask |= WINNER_BIT
+
+        for p in range(2):
+            if mask & (LIFE_BIT << p):
+                body += LIFE.pack(new.lives[p])
+        for p in range(2):
+            if mask & (SOUL_BIT << p):
+                body.append(new.souls[p])
+        if mask & HAND_BIT:
+            removed, added = _hand_diff(self.hand, new.hand)
+            body.append(len(removed))
+            body += bytes(removed)
+            body.append(len(added))
+            for card_id in added:
+                _put_varint(body, card_id)
+        if mask & HAND_SIZE_BIT:
+            body += bytes(new.hand_sizes)
+        if mask & PLAYED_BIT:
+            for card_id in new.played:
+                _put_varint(body, 0 if card_id is None else card_id + 1)
+        if mask & WINNER_BIT:
+            body.append(0 if new.winner is None else new.winner + 1)
+        return DELTA_HEADER.pack(new.turn, ALL_PHASES.index(new.phase), mask) + bytes(body)
+
+    def apply(self, data):
+        """
+        diff で作った差分をこの状態に適用する。
+
+        Args:
+            data (bytes): 差分。
+        """
+        turn, phase, mask = DELTA_HEADER.unpack_from(data)
+        self.turn = turn
+        self.phase = ALL_PHASES[phase]
+        pos = DELTA_HEADER.size
+        for p in range(2):
+            if mask & (LIFE_BIT << p):
+                self.lives[p], = LIFE.unpack_from(data, pos)
+                pos += LIFE.size
+        for p in range(2):
+            if mask & (SOUL_BIT << p):
+                self.souls[p] = data[pos]
+                pos += 1
+        if mask & HAND_BIT:
+            count = data[pos]
+            for i in reversed(data[pos + 1:pos + 1 + count]):
+                del self.hand[i]
+            pos += 1 + count
+            count = data[pos]
+            pos += 1
+            for _ in range(count):
+                card_id, pos = _get_varint(data, pos)
+                self.hand.append(card_id)
+        if mask & HAND_SIZE_BIT:
+            self.hand_sizes = list(data[pos:pos + 2])
+            pos += 2
+        if mask & PLAYED_BIT:
+            played = []
+            for _ in range(2):
+                card_id, pos = _get_varint(data, pos)
+                played.append(None if card_id == 0 else card_id - 1)
+            self.played = played
+        if mask & WINNER_BIT:
+            self.winner = None if data[pos] == 0 else data[pos] - 1
+
+
+class Connection:
+    """サーバ側の、クライアント1つとの接続。"""
+    __slots__ = ("writer", "match", "index")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None       # 参加している対戦
+        self.index = None       # 対戦でのプレイヤー番号
+
+    def send(self, kind, body=b""):
+        # メッセージは小さいため、drain で待たずに書き込みバッファに積むだけにする
+        if not self.writer.is_closing():
+            self.writer.write(_frame(kind, body))
+
+
+class Match:
+    """
+    サーバが持つ対戦1つ。ゲームデータはサーバだけが持ち、両プレイヤーのカード選択が揃ったら1ターン進める。
+    待機中の対戦はタスクもタイマーも持たず、メモリを使うだけになる。
+    """
+    __slots__ = ("id", "game", "connections", "choices", "views", "played", "ai", "rng")
+
+    def __init__(self, match_id, game, connections, ai=None, rng=None):
+        """
+        Args:
+            match_id (int): 対戦の番号。
+            game (GameData): "select" フェーズのゲームデータ。
+            connections (list[Connection | None]): 各プレイヤーの接続 (サーバのAIが担当するプレイヤーは None)。
+            ai (Callable, optional): サーバのAIの戦略。
+            rng (random.Random, optional): サーバのAIの乱数。
+        """
+        self.id = match_id
+        self.game = game
+        self.connections = connections
+        self.choices = [None, None]
+        self.views = [MatchView(), MatchView()]    # 各プレイヤーに前回送った状態
+        self.played = (None, None)                  # 直前のターンに各プレイヤーが出したカードのid
+        self.ai = ai
+        self.rng = rng
+
+    def broadcast(self):
+        """
+        前回送った状態からの差分を、両プレイヤーに送る。
+        差分はプレイヤーごとに作り、相手の手札は枚数だけを送る。
+        """
+        for index, connection in enumerate(self.connections):
+            if connection is not None:
+                new = MatchView.of(self.game, index, self.played)
+                connection.send(DELTA, self.views[index].diff(new))
+                self.views[index] = new
+
+
+class MatchServer:
+    """
+    対戦を管理するサーバ。1つのプロセス (1つのイベントループ) で多数の対戦を同時に扱う。
+
+    クライアントごとにメッセージを読むコルーチンが1つあるだけで、対戦ごとのタスクやタイマーは持たない。
+    そのため、入力待ちの対戦が大半を占める状況では、1コアで数千の対戦を保持できる。
+    接続は asyncio のストリーム (StreamReader / StreamWriter) で扱い、TCP でもループバックでも同じ処理を使う。
+    """
+
+    def __init__(self, cards=MASTER_CARDS, ai=None, seed=None):
+        """
+        Args:
+            cards (list[Card], optional): カードプール。
+            ai (Callable, optional): サーバのAIと対戦するクライアントの相手をする戦略。省略時は greedy 戦略。
+            seed (int, optional): 対戦のシードを作る乱数のシード。
+        """
+        self.cards = cards
+        self.ai = ai
+        self.rng = random.Random(seed)
+        self.matches = {}       # 対戦の番号 → Match
+        self.waiting = None     # 相手を待っている接続
+        self.turns = 0          # 進めたターンの合計
+        self._next_id = 0
+
+    async def handle(self, reader, writer):
+        """
+        クライアント1つとの接続を処理する (asyncio.start_server のコールバック)。
+
+        Args:
+            reader (asyncio.StreamReader): 受信側のストリーム。
+            writer (asyncio.StreamWriter): 送信側のストリーム。
+        """
+        connection = Connection(writer)
+        try:
+            while True:
+                length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+                body = await reader.readexactly(length) if length else b""
+                if kind == JOIN:
+                    self._join(connection, *JOIN_BODY.unpack(body))
+                elif kind == SELECT:
+                    self._select(connection, *SELECT_BODY.unpack(body))
+                else:
+                    connection.send(ERROR, b"unknown message")
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+        finally:
+            self._disconnect(connection)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=NETWORK_PORT):
+        """TCP で接続を待ち受ける。"""
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def _new_match(self, connections):
+        if self.ai is None:
+            from src.AI import greedy_strategy
+            self.ai = greedy_strategy
+        game = new_game(("Player 1", "Player 2"), self.cards, seed=self.rng.getrandbits(64))
+        start_phase(game)
+        match = Match(self._next_id, game, connections,
+                      ai=self.ai if None in connections else None, rng=random.Random(game.seed))
+        self._next_id += 1
+        self.matches[match.id] = match
+        for index, connection in enumerate(connections):
+            if connection is not None:
+                connection.match, connection.index = match, index
+                connection.send(WELCOME, WELCOME_BODY.pack(match.id, index))
+        match.broadcast()
+        return match
+
+    def _join(self, connection, opponent):
+        if connection.match is not None:
+            connection.send(ERROR, b"already in a match")
+        elif opponent == OPPONENT_AI:
+            self._new_match([connection, None])
+        elif self.waiting is None or self.waiting is connection:
+            self.waiting = connection
+        else:
+            waiting, self.waiting = self.waiting, None
+            self._new_match([waiting, connection])
+
+    def _select(self, connection, turn, index):
+        match = connection.match
+        if match is None or match.game.phase != "select" or turn != match.game.turn:
+            connection.send(ERROR, b"not your turn")
+            return
+        if not 0 <= index < len(match.game.players[connection.index].hand):
+            connection.send(ERROR, b"invalid card")
+            return
+        match.choices[connection.index] = index
+        if match.ai is not None:
+            other = 1 - connection.index
+            match.choices[other] = match.ai(match.game, other, match.rng)
+        if None not in match.choices:
+            self._play_turn(match)
+
+    def _play_turn(self, match):
+        """両プレイヤーの選択が揃ったら、エンジンで1ターン進めて差分を送る。"""
+        game = match.game
+        index1, index2 = match.choices
+        match.choices = [None, None]
+        match.played = (game.players[0].hand[index1].id, game.players[1].hand[index2].id)
+        select_phase(game, index1, index2)
+        resolve_turn(game)
+        if game.phase == "start":
+            start_phase(game)
+        self.turns += 1
+        match.broadcast()
+        if game.phase == RESULT_PHASE:
+            self._close_match(match)
+
+    def _close_match(self, match):
+        self.matches.pop(match.id, None)
+        for connection in match.connections:
+            if connection is not None:
+                connection.match = None
+
+    def _disconnect(self, connection):
+        """切断したプレイヤーの負けとして、相手に結果を送る。"""
+        if self.waiting is connection:
+            self.waiting = None
+        match = connection.match
+        if match is None:
+            return
+        game = match.game
+        game.winner = 1 - connection.index
+        game.phase = RESULT_PHASE
+        match.connections[connection.index] = None
+        match.broadcast()
+        self._close_match(match)
+
+
+class MatchClient:
+    """
+    サーバに接続するクライアント。受け取った差分を MatchView に適用して、対戦の状態を手元に再現する。
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Args:
+            reader (asyncio.StreamReader): 受信側のストリーム。
+            writer (asyncio.StreamWriter): 送信側のストリーム。
+        """
+        self.reader = reader
+        self.writer = writer
+        self.view = MatchView()
+        self.match_id = None
+        self.index = None           # 自分のプレイヤー番号
+        self.errors = []
+        self.received = 0           # 受け取ったバイト数
+
+    async def join(self, opponent=OPPONENT_PLAYER):
+        """
+        対戦に参加し、対戦が始まって最初の状態を受け取るまで待つ。
+
+        Args:
+            opponent (int, optional): 相手の種類 (OPPONENT_PLAYER, OPPONENT_AI)。
+        """
+        self.writer.write(_frame(JOIN, JOIN_BODY.pack(opponent)))
+        while self.match_id is None or self.view.turn == 0:
+            await self.receive()
+
+    async def select(self, index):
+        """
+        現在のターンで出すカードを送る。
+
+        Args:
+            index (int): 手札の位置。
+        """
+        self.writer.write(_frame(SELECT, SELECT_BODY.pack(self.view.turn, index)))
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        メッセージを1つ受け取って処理する。
+
+        Returns:
+            int: 受け取ったメッセージの種類。
+        """
+        length, kind = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+        body = await self.reader.readexactly(length) if length else b""
+        self.received += FRAME.size + length
+        if kind == WELCOME:
+            self.match_id, self.index = WELCOME_BODY.unpack(body)
+        elif kind == DELTA:
+            self.view.apply(body)
+        elif kind == ERROR:
+            self.errors.append(body.decode())
+        return kind
+
+    @property
+    def finished(self):
+        """対戦が決着したかどうか。"""
+        return self.view.phase == RESULT_PHASE
+
+    def close(self):
+        self.writer.close()
+
+
+class _PipeWriter:
+    """ループバック接続の送信側。書き込んだデータを相手の StreamReader にそのまま渡す。"""
+
+    def __init__(self, peer):
+        self.peer = peer
+        self._closing = False
+
+    def write(self, data):
+        if not self._closing:
+            self.peer.feed_data(data)
+
+    async def drain(self):
+        # 相手の読み込みを進めるため、イベントループに一度制御を返す
+        await asyncio.sleep(0)
+
+    def is_closing(self):
+        return self._closing
+
+    def close(self):
+        if not self._closing:
+            self._closing = True
+            self.peer.feed_eof()
+
+    async def wait_closed(self):
+        pass
+
+
+def loopback(server):
+    """
+    ソケットを使わずにサーバへ接続する (テストや負荷試験でクライアントの代わりに使う)。
+    実行中のイベントループの中で呼び出す。
+
+    Args:
+        server (MatchServer): 接続するサーバ。
+
+    Returns:
+        MatchClient: 接続したクライアント。
+    """
+    client_reader = asyncio.StreamReader()
+    server_reader = asyncio.StreamReader()
+    client_writer = _PipeWriter(server_reader)
+    server_writer = _PipeWriter(client_reader)
+    asyncio.get_running_loop().create_task(server.handle(server_reader, server_writer))
+    return MatchClient(client_reader, client_writer)
+
+
+async def play_bot(client, opponent=OPPONENT_PLAYER, rng=random, think=0.0):
+    """
+    ランダムにカードを選ぶクライアントとして、決着まで対戦する。
+
+    Args:
+        client (MatchClient): 接続したクライアント。
+        opponent (int, optional): 相手の種類。
+        rng (random.Random, optional): 乱数生成器。
+        think (float, optional): カードを選ぶまでに待つ時間 (秒)。入力待ちの多い対戦を再現するのに使う。
+
+    Returns:
+        MatchClient: 決着したクライアント。
+    """
+    await client.join(opponent)
+    while not client.finished:
+        if client.view.phase == "select":
+            turn = client.view.turn
+            if think:
+                await asyncio.sleep(think * rng.random())
+            await client.select(rng.randrange(len(client.view.hand)))
+            # 相手の選択を待ち、ターンが進むまで受け取り続ける
+            while client.view.turn == turn and not client.finished:
+                await client.receive()
+        else:
+            await client.receive()
+    client.close()
+    return client
+
+
+async def soak(matches, think=0.0, seed=0):
+    """
+    ループバック接続のボット同士で多数の対戦を同時に行う (1プロセスでの負荷試験)。
+
+    Args:
+        matches (int): 同時に行う対戦の数。
+        think (float, optional): 各ボットがカードを選ぶまでに待つ最大の時間 (秒)。
+        seed (int, optional): シード。
+
+    Returns:
+        tuple[MatchServer, list[MatchClient]]: サーバと、決着したクライアント。
+    """
+    server = MatchServer(seed=seed)
+    rng = random.Random(seed)
+    bots = [play_bot(loopback(server), rng=random.Random(rng.getrandbits(64)), think=think)
+            for _ in range(2 * matches)]
+    clients = await asyncio.gather(*bots)
+    return server, clients
+
+
+class NetworkClient:
+    """
+    画面のあるクライアント用に、MatchClient をバックグラウンドのスレッドのイベントループで動かす。
+    pyxel のメインループからは poll で最新の状態を受け取り、select でカードを送る。
+    """
+
+    def __init__(self, host, port, opponent=OPPONENT_PLAYER):
+        """
+        Args:
+            host (str): サーバのホスト名。
+            port (int): サーバのポート番号。
+            opponent (int, optional): 相手の種類。
+        """
+        self.host = host
+        self.port = port
+        self.opponent = opponent
+        self.index = None
+        self.error = None
+        self._updates = queue.Queue()
+        self._loop = None
+        self._client = None
+        threading.Thread(target=lambda: asyncio.run(self._run()), name="NetworkClient", daemon=True).start()
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            client = MatchClient(reader, writer)
+            await client.join(self.opponent)
+            self._client = client
+            self.index = client.index
+            self._updates.put(client.view.copy())
+            while not client.finished:
+                if await client.receive() == DELTA:
+                    self._updates.put(client.view.copy())
+            client.close()
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = e
+
+    def poll(self):
+        """
+        前回の呼び出しから状態が更新されていれば、最新の状態を返す。
+
+        Returns:
+            MatchView | None: 最新の状態。更新がなければ None。
+        """
+        view = None
+        while True:
+            try:
+                view = self._updates.get_nowait()
+            except queue.Empty:
+                return view
+
+    def select(self, index):
+        """出すカードを送る (メインスレッドから呼び出す)。"""
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.select(index), self._loop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="対戦サーバ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="TCP で対戦サーバを起動する")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=NETWORK_PORT)
+    soak_parser = subparsers.add_parser("soak", help="ループバック接続のボット同士で負荷試験をする")
+    soak_parser.add_argument("--matches", type=int, default=1000, help="同時に行う対戦の数")
+    soak_parser.add_argument("--think", type=float, default=0.0, help="ボットがカードを選ぶまでに待つ最大の時間 (秒)")
+    soak_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(MatchServer().serve(args.host, args.port))
+    else:
+        started = time.perf_counter()
+        server, clients = asyncio.run(soak(args.matches, args.think, args.seed))
+        elapsed = time.perf_counter() - started
+        received = sum(client.received for client in clients)
+        print(f"{args.matches} matches, {server.turns} turns in {elapsed:.2f} s "
+              f"({server.turns / elapsed:.0f} turns/s, {received / max(1, server.turns) / 2:.1f} bytes/turn/client)")
@@ -0,0 +1,127 @@
+import pyxel
+from src.settings import *
+from src.DataClass import *
+from src.Scene import Scene
+from src.Hud import HitGrid
+from src.CardAtlas import CardAtlas
+from src.GameScene import FIELD_X, FIELD_Y, GameScene
+from src.Network import NetworkClient, OPPONENT_PLAYER
+
+
+class NetworkScene(Scene):
+    """
+    対戦サーバ (Network.MatchServer) に接続して対戦するシーン。
+    ゲームデータはサーバだけが持ち、このシーンは受け取った状態 (MatchView) を表示して、選んだカードを送るだけにする。
+    相手の手札は枚数しか届かないため、カードの代わりに枚数を表示する。
+    """
+
+    def __init__(self, app, host, port=NETWORK_PORT, opponent=OPPONENT_PLAYER, client=None):
+        """
+        Args:
+            app (App): アプリケーション。
+            host (str): サーバのホスト名。
+            port (int, optional): サーバのポート番号。
+            opponent (int, optional): 相手の種類 (Network.OPPONENT_PLAYER, Network.OPPONENT_AI)。
+            client (NetworkClient, optional): 接続済みのクライアント。省略時は host と port に接続する。
+        """
+        super().__init__(app)
+        self.master_cards = MASTER_CARDS
+        self.cards = {card.id: card for card in self.master_cards}
+        self.client = client or NetworkClient(host, port, opponent)
+        self.view = None            # 最後に受け取った状態
+        self._selected_turn = None  # カードを送ったターン (相手の選択を待っている間は入力を受け付けない)
+        self._input_frame = None    # 最後にキー入力を受け付けたフレーム
+        # リザルト画面が勝者を表示できるように、受け取った状態をゲームデータにも写しておく
+        self.game = GameData()
+        self.atlas = None
+        self.hit_grid = HitGrid(WINDOW_WIDTH, WINDOW_HEIGHT)
+        for i in range(HAND_SIZE):
+            self.hit_grid.add(("hand", i), *GameScene._hand_position(i), CARD_WIDTH, CARD_HEIGHT)
+
+    def update(self):
+        """
+        サーバから届いた最新の状態を反映し、カード選択フェーズなら手札の入力を受け付けてサーバに送る。
+        決着したらリザルト画面へ遷移する。
+        """
+        super().update()
+        view = self.client.poll()
+        if view is not None:
+            self.view = view
+            self._mirror(view)
+        if self.view is None:
+            return
+        if self.view.phase == RESULT_PHASE:
+            self.app.current_scene = self.app.scene["result"]
+        elif self.view.phase == "select" and self._selected_turn != self.view.turn:
+            index = self._read_hand_key()
+            if index is not None:
+                self.client.select(index)
+                self._selected_turn = self.view.turn
+
+    def _mirror(self, view):
+        """受け取った状態を self.game に写す。"""
+        me = self.client.index
+        self.game.turn, self.game.phase, self.game.winner = view.turn, view.phase, view.winner
+        for index, player in enumerate(self.game.players):
+            player.name = "You" if index == me else "Opponent"
+            player.life = view.lives[index]
+            player.soul_point = view.souls[index]
+            player.field_card = None if view.played[index] is None else self.cards[view.played[index]]
+        self.game.players[me].hand = [self.cards[card_id] for card_id in view.hand]
+
+    def _read_hand_key(self):
+        """
+        数字キーの入力と手札のクリックを読み取り、選択された手札の位置を返す。
+
+        Returns:
+            int | None: 選択された手札の位置。入力がなければNone。
+        """
+        if pyxel.frame_count == self._input_frame:
+            return None
+        for i in range(len(self.view.hand)):
+            if pyxel.btnp(pyxel.KEY_1 + i):
+                self._input_frame = pyxel.frame_count
+                return i
+        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            region = self.hit_grid.at(pyxel.mouse_x, pyxel.mouse_y)
+            if region is not None and region[0] == "hand" and region[1] < len(self.view.hand):
+                self._input_frame = pyxel.frame_count
+                return region[1]
+        return None
+
+    def draw(self):
+        """
+        受け取った状態を描画する。
+        接続を待っている間と、接続に失敗したときはその旨だけを表示する。
+        """
+        super().draw()
+        if self.client.error is not None:
+            pyxel.text(10, 10, f"Connection failed: {self.client.error}", 8, self.umplus10)
+            return
+        if self.view is None:
+            pyxel.text(10, 10, "Waiting for an opponent...", 7, self.umplus10)
+            return
+
+        pyxel.text(10, 10, f"Turn: {self.view.turn}", 3, self.umplus10)
+        me = self.client.index
+        for index, x in zip((me, 1 - me), (10, 128)):
+            player = self.game.players[index]
+            pyxel.text(x, 20, f"Life: {player.life}", 3, self.umplus10)
+            pyxel.text(x, 30, player.name, 3, self.umplus10)
+            pyxel.text(x, 44, f"Hand: {self.view.hand_sizes[index]}", 3, self.mg2_8)
+
+        if self.atlas is None:
+            self.atlas = CardAtlas(self.master_cards, self.mg2_8)
+            self.atlas.build()
+
+        # 直前のターンに出したカード (自分を左に描く)
+        for index, x in zip((me, 1 - me), FIELD_X):
+            card = self.game.players[index].field_card
+            if card is not None:
+                self.atlas.draw(card, x, FIELD_Y)
+
+        for i, card in enumerate(self.game.players[me].hand):
+            self.atlas.draw(card, *GameScene._hand_position(i))
+
+        if self.view.phase == "select" and self._selected_turn == self.view.turn:
+            pyxel.text(80, 150, "Waiting...", 7, self.mg2_8)
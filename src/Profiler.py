@@ -0,0 +1,207 @@
+import functools
+import json
+import time
+from collections import deque
+
+import pyxel
+
+from src.settings import *
+
+
+class _Section:
+    """Profiler.section が返す計測区間。with 文で使う。"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullSection:
+    """計測が無効なときに返す、何もしない計測区間。"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class Profiler:
+    """
+    フレームごとの処理時間を計測するプロファイラ。
+    シーンの update/draw や名前をつけた区間の時間を、直近のフレーム分だけリングバッファに保持する。
+    無効のときは計測区間が何もしないため、ほとんど負荷がかからない。
+    """
+
+    def __init__(self, enabled=PROFILE, history=PROFILE_HISTORY, trace_events=PROFILE_TRACE_EVENTS):
+        """
+        Args:
+            enabled (bool, optional): 計測を有効にするかどうか。
+            history (int, optional): 保持するフレーム数。
+            trace_events (int, optional): Chrome トレース用に保持するイベント数。
+        """
+        self.enabled = enabled
+        self.show_overlay = enabled
+        self.history = history
+        self.frames = deque(maxlen=history)         # フレームごとの処理時間 (秒)
+        self.sections = {}                          # 区間名 → フレームごとの合計時間 (秒) のリングバッファ
+        self.events = deque(maxlen=trace_events)    # (区間名, 開始時刻, 終了時刻)
+        self._frame_start = None
+        self._current = {}                          # 処理中のフレームでの区間ごとの合計時間
+        self._origin = time.perf_counter()
+
+    def section(self, name):
+        """
+        名前をつけた区間の計測を始める。with 文で使う。
+
+        Args:
+            name (str): 区間名。
+
+        Returns:
+            計測区間 (コンテキストマネージャ)。
+        """
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def add(self, name, start, end):
+        """計測した区間を記録する。"""
+        self._current[name] = self._current.get(name, 0.0) + (end - start)
+        self.events.append((name, start, end))
+
+    def begin_frame(self):
+        """フレームの計測を始める。"""
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+            self._current = {}
+
+    def end_frame(self):
+        """フレームの計測を終え、フレーム時間と区間ごとの時間をリングバッファに追加する。"""
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frames.append(end - self._frame_start)
+        self.events.append(("frame", self._frame_start, end))
+        for name, total in self._current.items():
+            ring = self.sections.get(name)
+            if ring is None:
+                ring = self.sections[name] = deque(maxlen=self.history)
+            ring.append(total)
+        self._frame_start = None
+
+    def histogram(self, name=None, bins=10):
+        """
+        直近のフレームでの処理時間のヒストグラムを返す。
+
+        Args:
+            name (str, optional): 区間名。省略時はフレーム全体。
+            bins (int, optional): 階級の数。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 各階級の度数と、階級の境界 (ミリ秒)。
+        """
+        import numpy as np      # 起動を速くするため、集計するときまで読み込まない
+        samples = self.frames if name is None else self.sections.get(name, ())
+        return np.histogram(np.array(samples) * 1000, bins=bins)
+
+    def summary(self):
+        """
+        区間ごとの平均時間と99パーセンタイルを返す。
+
+        Returns:
+            dict[str, tuple[float, float]]: 区間名 → (平均, 99パーセンタイル) (ミリ秒)。
+        """
+        import numpy as np
+        result = {}
+        for name, ring in [("frame", self.frames)] + list(self.sections.items()):
+            if ring:
+                samples = np.array(ring) * 1000
+                result[name] = (float(samples.mean()), float(np.percentile(samples, 99)))
+        return result
+
+    def worst_section(self):
+        """直近のフレームで平均時間が最も長い区間の名前と時間 (ミリ秒) を返す。"""
+        worst, worst_time = None, 0.0
+        for name, ring in self.sections.items():
+            if ring:
+                average = sum(ring) / len(ring) * 1000
+                if average > worst_time:
+                    worst, worst_time = name, average
+        return worst, worst_time
+
+    def draw_overlay(self, x=2, y=WINDOW_HEIGHT - 22):
+        """
+        フレーム時間、1フレームの予算、最も重い区間を画面に表示する。
+
+        Args:
+            x (int, optional): 表示するX座標。
+            y (int, optional): 表示するY座標。
+        """
+        if not (self.enabled and self.show_overlay and self.frames):
+            return
+        budget = 1000 / FPS
+        last = self.frames[-1] * 1000
+        average = sum(self.frames) / len(self.frames) * 1000
+        color = 8 if last > budget else 11
+        pyxel.rect(x - 1, y - 1, 160, 21, 0)
+        pyxel.text(x, y, f"frame {last:5.2f}ms avg {average:5.2f}ms / {budget:.1f}ms", color)
+        name, worst_time = self.worst_section()
+        if name is not None:
+            pyxel.text(x, y + 8, f"worst {name} {worst_time:.2f}ms", 7)
+
+    def export_chrome_trace(self, path):
+        """
+        保持しているイベントを Chrome のトレース形式 (chrome://tracing や Perfetto で開ける JSON) で保存する。
+
+        Args:
+            path (str): 保存先のパス。
+        """
+        events = [{
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": 0,
+            "tid": 0,
+        } for name, start, end in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# アプリ全体で共有するプロファイラ
+PROFILER = Profiler()
+
+
+def profiled(name):
+    """
+    メソッドや関数の実行時間を、指定した区間名で計測するデコレータ。
+    プロファイラが無効のときは、フラグを1つ確認するだけで元の関数を呼び出す。
+
+    Args:
+        name (str): 区間名。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.add(name, start, time.perf_counter())
+        return wrapper
+    return decorator
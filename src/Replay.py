@@ -0,0 +1,160 @@
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+
+
+# リプレイファイルの形式
+#   ヘッダ: マジック(4バイト) バージョン(1バイト) シード(8バイト) カードプールのチェックサム(4バイト)
+#   以降、1ターンごとに (プレイヤー1の手札の位置, プレイヤー2の手札の位置) を1バイトずつ追記する
+REPLAY_MAGIC = b"GGRP"
+REPLAY_VERSION = 2     # 2: 有限の山札から引くルールに変更
+HEADER = struct.Struct("<4sBQI")
+TURN = struct.Struct("<BB")
+
+
+def card_pool_checksum(cards):
+    """
+    カードプールの内容からチェックサムを計算する。
+    リプレイを記録したときと異なるカードプールで再生しようとしていないかを確かめるのに使う。
+
+    Args:
+        cards (list[Card]): カードプール。
+
+    Returns:
+        int: CRC32 のチェックサム。
+    """
+    data = ";".join(f"{c.id},{c.attack},{c.defense},{c.speed}" for c in cards)
+    return zlib.crc32(data.encode())
+
+
+@dataclass
+class Replay:
+    """リプレイの内容 (シードと毎ターンのカード選択)。"""
+    seed: int
+    checksum: int = 0
+    turns: List[Tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path):
+        """
+        リプレイファイルを読み込む。記録が途中で途切れている場合は、読めたターンまでを返す。
+
+        Args:
+            path (str): リプレイファイルのパス。
+
+        Returns:
+            Replay: 読み込んだリプレイ。
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, checksum = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a replay file")
+        body = data[HEADER.size:]
+        body = body[:len(body) - len(body) % TURN.size]
+        return cls(seed, checksum, list(TURN.iter_unpack(body)))
+
+
+class ReplayWriter:
+    """
+    対戦を追記専用のリプレイファイルに記録する。
+    ターンごとに2バイトを追記してすぐに書き出すため、途中でクラッシュしてもそこまでの記録は残る。
+    """
+
+    def __init__(self, path, seed, cards=MASTER_CARDS):
+        """
+        Args:
+            path (str): リプレイファイルのパス。
+            seed (int): 対戦のシード (GameData.seed)。
+            cards (list[Card], optional): 対戦で使うカードプール。
+        """
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, card_pool_checksum(cards)))
+        self.file.flush()
+
+    @classmethod
+    def reopen(cls, path, turns):
+        """
+        記録途中のリプレイファイルを開き直し、続きから追記できるようにする (クラッシュからの復帰用)。
+
+        Args:
+            path (str): リプレイファイルのパス。
+            turns (int): 残すターン数。それより後の記録は捨てる。
+
+        Returns:
+            ReplayWriter: 開き直したライター。
+        """
+        writer = cls.__new__(cls)
+        writer.path = path
+        writer.file = open(path, "r+b")
+        writer.rewind(turns)
+        return writer
+
+    def rewind(self, turns):
+        """
+        記録を先頭から turns ターン分だけ残して、それより後を捨てる (巻き戻し用)。
+
+        Args:
+            turns (int): 残すターン数。
+        """
+        end = self.file.seek(0, 2)
+        self.file.seek(min(end, HEADER.size + turns * TURN.size))
+        self.file.truncate()
+        self.file.flush()
+
+    def record(self, index1, index2):
+        """
+        1ターン分のカード選択を追記する。
+
+        Args:
+            index1 (int): プレイヤー1が選んだ手札の位置。
+            index2 (int): プレイヤー2が選んだ手札の位置。
+        """
+        self.file.write(TURN.pack(index1, index2))
+        self.file.flush()
+
+    def close(self):
+        """ファイルを閉じる。"""
+        self.file.close()
+
+
+def replay_game(replay, cards=MASTER_CARDS, names=("Alice", "Bob")):
+    """
+    リプレイと同じシードでゲームを生成する。
+
+    Args:
+        replay (Replay): リプレイ。
+        cards (list[Card], optional): カードプール。
+        names (tuple[str, str], optional): プレイヤー名。
+
+    Returns:
+        GameData: "start" フェーズから始まるゲームデータ。
+    """
+    if replay.checksum and replay.checksum != card_pool_checksum(cards):
+        raise ValueError("replay was recorded with a different card pool")
+    return new_game(names, cards, seed=replay.seed)
+
+
+def play_back(replay, cards=MASTER_CARDS, names=("Alice", "Bob")):
+    """
+    リプレイを画面なしで最後まで一気に再生する。
+
+    Args:
+        replay (Replay): リプレイ。
+        cards (list[Card], optional): カードプール。
+        names (tuple[str, str], optional): プレイヤー名。
+
+    Returns:
+        GameData: 再生し終えたゲームデータ。
+    """
+    game = replay_game(replay, cards, names)
+    for index1, index2 in replay.turns:
+        if game.phase == RESULT_PHASE:
+            break
+        play_turn(game, index1, index2)
+    return game
@@ -0,0 +1,232 @@
+import heapq
+import time
+from collections import deque
+from src.settings import *
+from src.Engine import RESULT_PHASE
+
+
+# 画面上のターン進行で許される遷移 (フェーズ → 次に進めるフェーズ)
+# "effect" から "end" までは resolve_turn でまとめて解決するため、"effect" の次は次のターンか決着になる
+TURN_TRANSITIONS = {
+    "start": ("select",),
+    "select": ("effect",),
+    "effect": ("start", RESULT_PHASE),
+    RESULT_PHASE: (),
+}
+
+
+class PhaseScheduler:
+    """
+    フェーズ遷移とタイマーを管理するスケジューラ。
+
+    フェーズに入ったときの処理 (on_enter) と、そのフェーズの間だけ毎フレーム呼ぶ処理 (while_in) を登録し、
+    遷移は許された遷移の表で検査する。待ち時間はタイマーのヒープで管理するため、
+    タイマーを待つだけのフェーズではフレームごとにヒープの先頭を1回比較するだけで済む。
+    時間の単位はフレーム (tick)。turbo では全ての待ち時間を0とみなし、画面なしの実行や高速再生で使う。
+    """
+
+    def __init__(self, transitions=TURN_TRANSITIONS, turbo=False):
+        """
+        Args:
+            transitions (dict[str, tuple[str, ...]] | None, optional): 許される遷移の表。None なら検査しない。
+            turbo (bool, optional): True の場合、タイマーの待ち時間を全て0にする。
+        """
+        self.transitions = transitions
+        self.turbo = turbo
+        self.phase = None
+        self.clock = 0.0        # 経過時間 (tick)
+        self._timers = []       # (発火時刻, 登録順, コールバック, 引数) のヒープ
+        self._seq = 0
+        self._scheduled = set()  # ヒープにあって、まだ発火も取り消しもしていないタイマーの番号
+        self._cancelled = set()  # 取り消したが、まだヒープに残っているタイマーの番号
+        self._enter = {}        # フェーズ → フェーズに入ったときのコールバックのリスト
+        self._while = {}        # フェーズ → フェーズの間、毎フレーム呼ぶコールバック
+        self._pending = deque()  # まだ呼んでいない on_enter のフェーズ
+
+    def on_enter(self, phase, callback):
+        """フェーズに入ったときに呼ぶコールバックを登録する。"""
+        self._enter.setdefault(phase, []).append(callback)
+
+    def while_in(self, phase, callback):
+        """フェーズの間、update ごとに呼ぶコールバックを登録する (入力待ちなど)。"""
+        self._while[phase] = callback
+
+    def transition(self, phase):
+        """
+        フェーズを遷移させる。登録された on_enter は次の dispatch でまとめて呼ばれる。
+
+        Args:
+            phase (str): 遷移先のフェーズ。
+
+        Raises:
+            ValueError: 遷移の表で許されていない遷移の場合。
+        """
+        if (self.transitions is not None and self.phase is not None
+                and phase not in self.transitions.get(self.phase, ())):
+            raise ValueError(f"invalid phase transition: {self.phase} -> {phase}")
+        self.phase = phase
+        self._pending.append(phase)
+
+    def after(self, delay, callback, *args):
+        """
+        一定時間後にコールバックを呼ぶタイマーを登録する。
+
+        Args:
+            delay (float): 待ち時間 (tick)。turbo のときは0とみなす。
+            callback (Callable): 呼び出す関数。
+            *args: callback に渡す引数。
+
+        Returns:
+            int: タイマーの番号 (cancel で取り消すのに使う)。
+        """
+        due = self.clock if self.turbo else self.clock + delay
+        self._seq += 1
+        heapq.heappush(self._timers, (due, self._seq, callback, args))
+        self._scheduled.add(self._seq)
+        return self._seq
+
+    def cancel(self, timer):
+        """
+        登録したタイマーを取り消す。発火済みや取り消し済みのタイマーなら何もしない。
+
+        Args:
+            timer (int): after が返したタイマーの番号。
+
+        Returns:
+            bool: まだ発火していないタイマーを取り消した場合は True。
+        """
+        if timer not in self._scheduled:
+            return False
+        self._scheduled.discard(timer)
+        self._cancelled.add(timer)
+        return True
+
+    def dispatch(self):
+        """溜まっている on_enter のコールバックを遷移した順にまとめて呼ぶ。コールバック中の遷移も続けて処理する。"""
+        pending = self._pending
+        while pending:
+            phase = pending.popleft()
+            for callback in self._enter.get(phase, ()):
+                callback()
+
+    def advance(self, ticks=1):
+        """
+        時間を進め、発火時刻になったタイマーを順に呼ぶ。
+        タイマーから登録された新しいタイマーも、進めた時間の範囲内なら同じ呼び出しの中で発火する
+        (そのときの現在時刻は発火したタイマーの時刻になるため、高速再生でも間隔がずれない)。
+
+        Args:
+            ticks (float, optional): 進める時間 (tick)。
+
+        Returns:
+            int: 発火したタイマーの数。
+        """
+        target = self.clock + ticks
+        timers = self._timers
+        fired = 0
+        self.dispatch()
+        while timers and timers[0][0] <= target:
+            due, seq, callback, args = heapq.heappop(timers)
+            if seq in self._cancelled:
+                self._cancelled.discard(seq)
+                continue
+            self._scheduled.discard(seq)
+            self.clock = max(self.clock, due)
+            callback(*args)
+            fired += 1
+            self.dispatch()
+        self.clock = target
+        return fired
+
+    def update(self, ticks=1):
+        """
+        1フレーム分の処理を行う。時間を進めてタイマーを発火させ、現在のフェーズの while_in を呼ぶ。
+
+        Args:
+            ticks (float, optional): 進める時間 (tick)。
+        """
+        self.advance(ticks)
+        handler = self._while.get(self.phase)
+        if handler is not None:
+            handler()
+            self.dispatch()
+
+    def next_due(self):
+        """
+        次のタイマーまでの時間を返す。
+
+        Returns:
+            float | None: 次のタイマーまでの時間 (tick)。タイマーがなければ None。
+        """
+        timers = self._timers
+        while timers and timers[0][1] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(timers)[1])
+        return max(0.0, timers[0][0] - self.clock) if timers else None
+
+    def run_until_idle(self, max_steps=None):
+        """
+        タイマーがなくなるまで、次のタイマーの時刻へ時間を飛ばしながら進める (画面なしの実行用)。
+
+        Args:
+            max_steps (int, optional): 発火させるタイマーの数の上限。
+
+        Returns:
+            int: 発火したタイマーの数。
+        """
+        fired = 0
+        self.dispatch()
+        while max_steps is None or fired < max_steps:
+            delay = self.next_due()
+            if delay is None:
+                break
+            fired += self.advance(delay)
+        return fired
+
+
+class FixedStepClock:
+    """
+    固定タイムステップのアキュムレータ。
+
+    実時間の経過を tick に換算して溜め、1フレームで進めるロジックの tick 数を整数で返す。
+    ロジックは常に1 tick ずつ進めるため、描画を間引いたりフレームが落ちたりして1フレームあたりの
+    tick 数が変わっても、ゲームの進行は tick 数だけで決まる。
+    描画が大きく遅れた場合は、1フレームで進める tick 数を max_ticks で打ち切り、残りは捨てる
+    (遅れを取り戻そうとして処理が追いつかなくなるのを防ぐ)。
+    """
+
+    def __init__(self, rate=FPS, speed=1.0, max_ticks=MAX_TICKS_PER_FRAME, time_source=time.perf_counter):
+        """
+        Args:
+            rate (float, optional): 実時間1秒あたりの tick 数 (等速のとき)。
+            speed (float, optional): 実時間の何倍の速さでロジックを進めるか。
+            max_ticks (int, optional): 1フレームで進める tick 数の上限。
+            time_source (Callable[[], float], optional): 現在時刻 (秒) を返す関数。
+        """
+        self.rate = rate
+        self.speed = speed
+        self.max_ticks = max_ticks
+        self.time_source = time_source
+        self.accumulator = 0.0
+        self.dropped = 0        # 上限を超えて捨てた tick 数
+        self._last = None
+
+    def ticks(self):
+        """
+        前回の呼び出しからの経過時間に応じて、このフレームで進める tick 数を返す。
+        最初の呼び出しでは1を返す。
+
+        Returns:
+            int: 進める tick 数。
+        """
+        now = self.time_source()
+        if self._last is None:
+            self._last = now
+            return 1
+        self.accumulator += (now - self._last) * self.rate * self.speed
+        self._last = now
+        count = int(self.accumulator)
+        self.accumulator -= count
+        if count > self.max_ticks:
+            self.dropped += count - self.max_ticks
+            count = self.max_ticks
+        return count
@@ -0,0 +1,357 @@
+import math
+import os
+import random
+import struct
+import sys
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+from src.settings import *
+from src.DataClass import *
+from src.Deck import Deck
+from src.Effects import ATTACK, DAMAGE, HEAL, SOUL, Effect, LingeringEffects
+from src.Engine import play_turn
+from src.Replay import card_pool_checksum
+from src.State import StateCodec
+
+
+# スナップショットファイルの形式 (クラッシュからの復帰用。最新の1つだけを書き出す)
+#   ヘッダ: マジック(4バイト) バージョン(1バイト) シード(8バイト) カードプールのチェックサム(4バイト)
+#           以降の各部の長さ (状態, 並び順, 乱数列の状態, 持続効果の数, 記録の件数)
+#   本体: 状態の整数, 並び順, 乱数列の状態, 山札の構成 (2人分、各カード COUNT_TYPE), 持続効果
+#   数値は全てリトルエンディアン。並び順のカードの位置の幅はカードプールの大きさで決まる (slot_typecode)
+SNAPSHOT_MAGIC = b"GGSS"
+SNAPSHOT_VERSION = 2    # 2: カードの位置と山札の構成を1バイトより広い幅でも書けるようにした
+HEADER = struct.Struct("<4sBQIIIIII")
+LINGERING = struct.Struct("<IBBBiiI")   # 切れるターン, 種類, 発生させた人, 対象, 量, スピード, 元のカードの位置+1
+PILE_SIZES = struct.Struct("<II")       # 並び順の先頭に置く、各プレイヤーの山札の残り枚数
+COUNT_TYPE = "I"                        # 山札の構成の1種類あたりの枚数の型 (array の型コード)
+GAUSS = struct.Struct("<d")             # random.Random の gauss 用の保持値 (None は NaN で表す)
+RNG_WORDS = "I"                         # random.Random の内部状態の1語の型 (array の型コード)
+# 持続効果の種類 → ファイルに書く番号。効果の登録順に依らないよう固定する (変えるときは SNAPSHOT_VERSION を上げる)
+KIND_CODES = {DAMAGE: 0, HEAL: 1, SOUL: 2, ATTACK: 3}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+
+def slot_typecode(n_cards):
+    """カードプールの位置を並べる array の型コード。カードの枚数に収まる最も小さい幅を使う。"""
+    if n_cards <= 1 << 8:
+        return "B"
+    if n_cards <= 1 << 16:
+        return "H"
+    return "I"
+
+
+def _to_bytes(values):
+    """array をリトルエンディアンのバイト列にする。"""
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data):
+    """リトルエンディアンのバイト列から array を作る。"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """
+    ある時点の GameData のスナップショット。
+
+    数値と手札・墓地の枚数は StateCodec の整数 (code) に、手札・山札・墓地の並び順はカードプールの位置を
+    並べたバイト列 (layout) に詰める。位置の幅はカードプールの大きさに合わせる (256枚までなら1バイト)。山札の構成、持続効果、シードは変化しないか滅多に変わらないため、
+    直前のスナップショットと同じオブジェクトを共有する。記録 (GameData.log) は追記専用なので件数だけを持つ。
+    乱数列の状態だけは 2.5KB ほどあるため、探索用のスナップショットでは省略できる。
+    """
+    code: int                   # StateCodec で詰めた状態
+    layout: bytes               # 手札・山札・墓地の並び順
+    rng: Optional[bytes]        # 乱数列の状態 (省略時は None)
+    compositions: tuple         # 各プレイヤーの山札の構成
+    lingering: tuple            # 持続中の効果 (GameData.lingering のヒープの中身)
+    log_length: int             # 記録の件数
+    seed: Optional[int]         # 乱数のシード
+
+
+def _pack_rng(rng):
+    """乱数列の状態をリトルエンディアンのバイト列にする。"""
+    _, internal, gauss = rng.getstate()
+    return _to_bytes(array(RNG_WORDS, internal)) + GAUSS.pack(math.nan if gauss is None else gauss)
+
+
+def _unpack_rng(data):
+    """_pack_rng のバイト列から random.Random.setstate に渡す状態を作る。"""
+    internal = _from_bytes(RNG_WORDS, data[:-GAUSS.size])
+    gauss, = GAUSS.unpack(data[-GAUSS.size:])
+    return (3, tuple(internal), None if math.isnan(gauss) else gauss)
+
+
+class SnapshotBuffer:
+    """
+    スナップショットを一定数だけ保持するリングバッファ。
+
+    UIでの巻き戻し (take で毎ターン記録し、rewind で数ターン前に戻る)、AIの「もしこう選んだら」の分岐
+    (branch / what_if)、クラッシュからの復帰 (save / load) に使う。
+    スナップショットは dataclass の深いコピーを作らずに数百バイトに収まるため、何千個でも保持できる。
+    """
+
+    def __init__(self, capacity=SNAPSHOT_CAPACITY, cards=MASTER_CARDS, names=("Alice", "Bob")):
+        """
+        Args:
+            capacity (int, optional): 保持するスナップショットの数。古いものから捨てる。
+            cards (list[Card], optional): カードプール。
+            names (tuple[str, str], optional): branch で作るゲームのプレイヤー名。
+        """
+        self.cards = cards
+        self.codec = StateCodec(cards, names)
+        self.slot = self.codec.slot
+        self.typecode = slot_typecode(len(cards))   # 並び順のカードの位置の型
+        self.snapshots = deque(maxlen=capacity)
+        self._shared = None     # 直前のスナップショット (変わっていない部分を共有する)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __getitem__(self, index):
+        return self.snapshots[index]
+
+    @property
+    def latest(self):
+        """最新のスナップショット (まだなければ None)。"""
+        return self.snapshots[-1] if self.snapshots else None
+
+    def capture(self, game, rng=True):
+        """
+        リングバッファには入れずに、スナップショットを作る。
+
+        Args:
+            game (GameData): ゲームデータ。
+            rng (bool, optional): 乱数列の状態も保存するかどうか。
+                False なら復元した後のドローは元のゲームと一致しないが、スナップショットは小さくなる。
+
+        Returns:
+            Snapshot: 作成したスナップショット。
+        """
+        slot = self.slot
+        players = game.players
+        slots = array(self.typecode)
+        for player in players:
+            slots.extend(slot[card.id] for card in player.hand)
+            slots.extend(slot[card.id] for card in player.graveyard)
+        for player in players:
+            deck = player.deck
+            slots.extend(slot[card.id] for card in deck.pile[:deck.size])
+        layout = PILE_SIZES.pack(*(player.deck.size for player in players)) + _to_bytes(slots)
+
+        # 変わっていない部分は直前のスナップショットのオブジェクトを使い回す
+        shared = self._shared
+        compositions = tuple(player.deck.composition for player in players)
+        lingering = tuple(game.lingering)
+        if shared is not None:
+            if compositions == shared.compositions:
+                compositions = shared.compositions
+            if lingering == shared.lingering:
+                lingering = shared.lingering
+
+        snapshot = Snapshot(
+            code=self.codec.encode(game),
+            layout=layout,
+            rng=_pack_rng(game.rng) if rng and game.rng is not None else None,
+            compositions=compositions,
+            lingering=lingering,
+            log_length=len(game.log),
+            seed=game.seed,
+        )
+        self._shared = snapshot
+        return snapshot
+
+    def take(self, game, rng=True):
+        """
+        スナップショットを作ってリングバッファに追加する。
+
+        Args:
+            game (GameData): ゲームデータ。
+            rng (bool, optional): 乱数列の状態も保存するかどうか。
+
+        Returns:
+            Snapshot: 作成したスナップショット。
+        """
+        snapshot = self.capture(game, rng)
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def rewind(self, steps=1):
+        """
+        新しい方から steps 個のスナップショットを捨て、残った最新のスナップショットを返す。
+        返したスナップショットは restore でゲームに書き戻す。
+
+        Args:
+            steps (int, optional): 戻る数。
+
+        Returns:
+            Snapshot | None: 戻った先のスナップショット。そこまで保持していなければ None (何も捨てない)。
+        """
+        if steps < 1 or len(self.snapshots) <= steps:
+            return None
+        for _ in range(steps):
+            self.snapshots.pop()
+        return self.snapshots[-1]
+
+    def _unpack_layout(self, snapshot):
+        """並び順のバイト列から、各プレイヤーの (手札, 墓地, 山札) のカードのリストを作る。"""
+        codec, cards, code = self.codec, self.cards, snapshot.code
+        layout = snapshot.layout
+        pile_sizes = PILE_SIZES.unpack_from(layout)
+        layout = _from_bytes(self.typecode, layout[PILE_SIZES.size:])
+        pos = 0
+        result = []
+        for p in range(2):
+            n_hand = sum(codec.hand_counts(code, p))
+            n_graveyard = sum(codec.graveyard_counts(code, p))
+            hand = [cards[i] for i in layout[pos:pos + n_hand]]
+            pos += n_hand
+            graveyard = [cards[i] for i in layout[pos:pos + n_graveyard]]
+            pos += n_graveyard
+            result.append([hand, graveyard, None])
+        for p in range(2):
+            result[p][2] = [cards[i] for i in layout[pos:pos + pile_sizes[p]]]
+            pos += pile_sizes[p]
+        return result
+
+    def restore(self, snapshot, game):
+        """
+        スナップショットの状態をゲームデータに書き戻す。シーンなどが持っている GameData や
+        Player の参照はそのまま使える。記録 (game.log) はスナップショットの時点の件数まで切り詰める。
+
+        Args:
+            snapshot (Snapshot): 書き戻すスナップショット。
+            game (GameData): 書き戻す先のゲームデータ。
+        """
+        codec, code = self.codec, snapshot.code
+        game.turn = codec.turn(code)
+        game.phase = codec.phase(code)
+        game.winner = codec.winner(code)
+        for p, (player, (hand, graveyard, pile)) in enumerate(zip(game.players, self._unpack_layout(snapshot))):
+            player.life = codec.life(code, p)
+            player.soul_point = codec.soul_point(code, p)
+            player.field_card = codec.field_card(code, p)
+            player.hand = hand
+            player.graveyard = graveyard
+            player.deck = self._deck(pile, snapshot.compositions[p])
+        game.lingering = LingeringEffects(snapshot.lingering)
+        del game.log[snapshot.log_length:]
+        game.seed = snapshot.seed
+        if snapshot.rng is not None:
+            if game.rng is None:
+                game.rng = random.Random()
+            game.rng.setstate(_unpack_rng(snapshot.rng))
+
+    def _deck(self, pile, composition):
+        deck = Deck([card.id for card in pile], self.cards)
+        deck.composition = composition
+        return deck
+
+    def branch(self, snapshot, seed=None):
+        """
+        スナップショットから独立したゲームデータを作る (元のゲームには影響しない)。
+
+        Args:
+            snapshot (Snapshot): 元にするスナップショット。
+            seed (int, optional): 乱数列の状態を保存していないスナップショットで使う乱数のシード。
+
+        Returns:
+            GameData: 作成したゲームデータ。記録は空になる。
+        """
+        game = GameData(players=[Player(name=name) for name in self.codec.names],
+                        rng=random.Random(seed), cards=self.cards)
+        self.restore(snapshot, game)
+        return game
+
+    def what_if(self, snapshot, index1, index2, seed=None):
+        """
+        "select" フェーズのスナップショットから、指定したカードを選んだ場合のターンの結果を求める。
+
+        Args:
+            snapshot (Snapshot): "select" フェーズのスナップショット。
+            index1 (int): プレイヤー1が選ぶ手札の位置。
+            index2 (int): プレイヤー2が選ぶ手札の位置。
+            seed (int, optional): 乱数列の状態を保存していないスナップショットで使う乱数のシード。
+
+        Returns:
+            GameData: ターンを進めた後のゲームデータ (次のターンの手札の補充の後、または決着後)。
+        """
+        game = self.branch(snapshot, seed)
+        play_turn(game, index1, index2)
+        return game
+
+    def save(self, path, snapshot=None):
+        """
+        スナップショットをファイルに書き出す。書き出しの途中でクラッシュしても前のファイルが壊れないよう、
+        一時ファイルに書いてから置き換える。
+
+        Args:
+            path (str): 書き出すファイルのパス。
+            snapshot (Snapshot, optional): 書き出すスナップショット。省略時は最新のもの。
+        """
+        snapshot = snapshot or self.latest
+        code = self.codec.to_bytes(snapshot.code)
+        rng = snapshot.rng or b""
+        lingering = b"".join(
+            LINGERING.pack(expires, KIND_CODES[effect.kind], effect.owner, effect.target, effect.amount,
+                           effect.speed, 0 if effect.source is None else self.slot[effect.source.id] + 1)
+            for expires, _, effect in snapshot.lingering)
+        header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, snapshot.seed or 0, card_pool_checksum(self.cards),
+                             len(code), len(snapshot.layout), len(rng), len(snapshot.lingering),
+                             snapshot.log_length)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header + code + snapshot.layout + rng)
+            for composition in snapshot.compositions:
+                f.write(_to_bytes(array(COUNT_TYPE, composition)))
+            f.write(lingering)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        save で書き出したスナップショットを読み込む。読み込んだスナップショットはリングバッファに入れない。
+
+        Args:
+            path (str): スナップショットファイルのパス。
+
+        Returns:
+            Snapshot: 読み込んだスナップショット。
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, version, seed, checksum, code_size, layout_size, rng_size,
+         n_lingering, log_length) = HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a snapshot file")
+        if checksum != card_pool_checksum(self.cards):
+            raise ValueError(f"{path} was saved with a different card pool")
+        pos = HEADER.size
+        code = self.codec.from_bytes(data[pos:pos + code_size])
+        pos += code_size
+        layout = data[pos:pos + layout_size]
+        pos += layout_size
+        rng = data[pos:pos + rng_size] or None
+        pos += rng_size
+        size = len(self.cards) * array(COUNT_TYPE).itemsize
+        compositions = (tuple(_from_bytes(COUNT_TYPE, data[pos:pos + size])),
+                        tuple(_from_bytes(COUNT_TYPE, data[pos + size:pos + 2 * size])))
+        pos += 2 * size
+        lingering = []
+        for i, (expires, kind, owner, target, amount, speed, source) in enumerate(
+                LINGERING.iter_unpack(data[pos:pos + n_lingering * LINGERING.size])):
+            if kind not in KINDS:
+                raise ValueError(f"{path} has an unknown effect kind: {kind}")
+            effect = Effect(KINDS[kind], owner, target, amount, speed,
+                            None if source == 0 else self.cards[source - 1])
+            lingering.append((expires, i, effect))
+        return Snapshot(code, layout, rng, compositions, tuple(lingering), log_length, seed)
@@ -0,0 +1,363 @@
+from src.settings import *
+from src.DataClass import *
+from src.Engine import PHASES, RESULT_PHASE
+from src.Matchup import get_matchup_table
+from src.Deck import Deck
+
+
+# 各項目に割り当てるビット数
+PHASE_BITS = 3
+WINNER_BITS = 2
+TURN_BITS = 16
+LIFE_BITS = 8
+SOUL_BITS = 6
+HAND_BITS = 4           # 手札の同じカードの枚数
+GRAVEYARD_BITS = 10     # 墓地の同じカードの枚数
+LIFE_OFFSET = 1 << (LIFE_BITS - 1)  # ライフはマイナスにもなるため、この値を足して格納する
+
+ALL_PHASES = PHASES + (RESULT_PHASE,)
+
+
+class StateCodec:
+    """
+    GameData を1つの整数に詰め込んで表すための変換器。
+
+    整数は不変でハッシュと比較が速く、メモリも小さいため、探索の置換表やキャッシュ、リプレイの保存に向いている。
+    手札と墓地は「カードプールの各カードが何枚あるか」の多重集合として持つため、手札の並び順は保存されない
+    (復元した手札はカードプールの順に並ぶ)。山札は「山札の構成 - 手札 - 場 - 墓地」で求まるので保存しない。
+
+    整数に入るのはカードプールのカードの枚数と数値だけで、次のものは入らない。
+        - 持続中の効果 (GameData.lingering) と、カードの契約 (Card.contract)
+        - 乱数列の状態 (ドローは draw_outcomes で確率つきの分岐として列挙する)
+        - 修正値を持つカード (DataClass.CardInstance)。encode は ValueError を出す
+    スナップショット (Snapshot.SnapshotBuffer) は、持続効果・乱数列の状態・並び順を整数とは別に保存する。
+    successors と draw_outcomes は契約も持続効果もないゲームだけを正しく進められるため、
+    探索の前に check_searchable で確かめる。
+    """
+
+    def __init__(self, cards=MASTER_CARDS, names=("Alice", "Bob"), composition=None):
+        """
+        Args:
+            cards (list[Card], optional): カードプール。
+            names (tuple[str, str], optional): 復元するときのプレイヤー名。
+            composition (Sequence[int], optional): 山札の構成 (カードプールの位置ごとの枚数)。
+                省略時は各カード DECK_COPIES 枚。
+        """
+        self.cards = cards
+        self.names = names
+        self.composition = tuple(composition or [DECK_COPIES] * len(cards))
+        self.slot = {card.id: i for i, card in enumerate(cards)}  # id → カードプール上の位置
+        n = len(cards)
+        self.field_bits = (n + 1).bit_length()
+
+        # 下位ビットから順に各項目の位置を割り当てる
+        shift = 0
+
+        def allocate(bits):
+            nonlocal shift
+            start = shift
+            shift += bits
+            return start
+
+        self.phase_shift = allocate(PHASE_BITS)
+        self.winner_shift = allocate(WINNER_BITS)
+        self.turn_shift = allocate(TURN_BITS)
+        self.life_shift = []
+        self.soul_shift = []
+        self.field_shift = []
+        self.hand_shift = []
+        self.graveyard_shift = []
+        for _ in range(2):
+            self.life_shift.append(allocate(LIFE_BITS))
+            self.soul_shift.append(allocate(SOUL_BITS))
+            self.field_shift.append(allocate(self.field_bits))
+            self.hand_shift.append([allocate(HAND_BITS) for _ in range(n)])
+            self.graveyard_shift.append([allocate(GRAVEYARD_BITS) for _ in range(n)])
+        self.bits = shift
+
+        # 後続の状態を作るときに使う、カードプール上の位置で引けるダメージ表 (魂の数ごとに必要になったら作る) とスピード
+        self._table = get_matchup_table(cards)
+        self._damage = {}
+        self._speed = [card.speed for card in cards]
+        self.has_contracts = any(card.contract is not None for card in cards)
+
+    def _get(self, code, shift, bits):
+        return (code >> shift) & ((1 << bits) - 1)
+
+    def _put(self, value, shift, bits):
+        if not 0 <= value < (1 << bits):
+            raise ValueError(f"value {value} does not fit in {bits} bits")
+        return value << shift
+
+    def pack(self, hands, lives, soul_points, turn, phase="select",
+             graveyards=((), ()), field_cards=(None, None), winner=None):
+        """
+        カードのidで表した状態を整数に詰め込む。
+
+        Args:
+            hands (tuple[Iterable[int], Iterable[int]]): 各プレイヤーの手札のカードのid。
+            lives (tuple[int, int]): 各プレイヤーのライフ。
+            soul_points (tuple[int, int]): 各プレイヤーの魂の数。
+            turn (int): ターン数。
+            phase (str, optional): フェーズ。
+            graveyards (tuple[Iterable[int], Iterable[int]], optional): 各プレイヤーの墓地のカードのid。
+            field_cards (tuple[int | None, int | None], optional): 各プレイヤーの場のカードのid。
+            winner (int | None, optional): 勝者のプレイヤー番号。
+
+        Returns:
+            int: 状態を表す整数。
+        """
+        code = self._put(ALL_PHASES.index(phase), self.phase_shift, PHASE_BITS)
+        code |= self._put(0 if winner is None else winner + 1, self.winner_shift, WINNER_BITS)
+        code |= self._put(turn, self.turn_shift, TURN_BITS)
+        for p in range(2):
+            code |= self._put(lives[p] + LIFE_OFFSET, self.life_shift[p], LIFE_BITS)
+            code |= self._put(soul_points[p], self.soul_shift[p], SOUL_BITS)
+            field_card = field_cards[p]
+            field_value = 0 if field_card is None else self.slot[field_card] + 1
+            code |= self._put(field_value, self.field_shift[p], self.field_bits)
+            for card_id in hands[p]:
+                code += 1 << self.hand_shift[p][self.slot[card_id]]
+            for card_id in graveyards[p]:
+                code += 1 << self.graveyard_shift[p][self.slot[card_id]]
+        return code
+
+    def encode(self, game):
+        """
+        GameData を整数に変換する。
+
+        Args:
+            game (GameData): ゲームデータ。
+
+        Returns:
+            int: 状態を表す整数。
+
+        Raises:
+            ValueError: 修正値を持つカードがある場合 (整数には修正値を入れられない)。
+        """
+        players = game.players
+        for player in players:
+            if player.field_card is not None and player.field_card.modified:
+                raise ValueError(f"cannot encode modified card {player.field_card!r}")
+            for card in player.hand + player.graveyard:
+                if card.modified:
+                    raise ValueError(f"cannot encode modified card {card!r}")
+        return self.pack(
+            hands=[[card.id for card in player.hand] for player in players],
+            lives=[player.life for player in players],
+            soul_points=[player.soul_point for player in players],
+            turn=game.turn,
+            phase=game.phase,
+            graveyards=[[card.id for card in player.graveyard] for player in players],
+            field_cards=[None if player.field_card is None else player.field_card.id
+                         for player in players],
+            winner=game.winner,
+        )
+
+    def decode(self, code):
+        """
+        整数から GameData を復元する。
+
+        Args:
+            code (int): encode で作った整数。
+
+        Returns:
+            GameData: 復元したゲームデータ。手札と墓地はカードプールの順に並ぶ。
+        """
+        players = []
+        for p in range(2):
+            players.append(Player(
+                name=self.names[p],
+                life=self.life(code, p),
+                hand=self._cards_of(code, self.hand_shift[p], HAND_BITS),
+                deck=self._deck_of(code, p),
+                graveyard=self._cards_of(code, self.graveyard_shift[p], GRAVEYARD_BITS),
+                field_card=self.field_card(code, p),
+                soul_point=self.soul_point(code, p),
+            ))
+        return GameData(
+            turn=self.turn(code),
+            players=players,
+            phase=self.phase(code),
+            winner=self.winner(code),
+            cards=self.cards,
+        )
+
+    def _deck_of(self, code, player):
+        deck = Deck.from_counts(self.deck_counts(code, player), self.cards)
+        deck.composition = self.composition
+        return deck
+
+    def _cards_of(self, code, shifts, bits):
+        cards = []
+        for card, shift in zip(self.cards, shifts):
+            cards.extend([card] * self._get(code, shift, bits))
+        return cards
+
+    def phase(self, code):
+        """フェーズを取り出す。"""
+        return ALL_PHASES[self._get(code, self.phase_shift, PHASE_BITS)]
+
+    def winner(self, code):
+        """勝者のプレイヤー番号を取り出す (未決着・引き分けなら None)。"""
+        value = self._get(code, self.winner_shift, WINNER_BITS)
+        return None if value == 0 else value - 1
+
+    def turn(self, code):
+        """ターン数を取り出す。"""
+        return self._get(code, self.turn_shift, TURN_BITS)
+
+    def life(self, code, player):
+        """指定したプレイヤーのライフを取り出す。"""
+        return self._get(code, self.life_shift[player], LIFE_BITS) - LIFE_OFFSET
+
+    def soul_point(self, code, player):
+        """指定したプレイヤーの魂の数を取り出す。"""
+        return self._get(code, self.soul_shift[player], SOUL_BITS)
+
+    def field_card(self, code, player):
+        """指定したプレイヤーの場のカードを取り出す (場にカードがなければ None)。"""
+        value = self._get(code, self.field_shift[player], self.field_bits)
+        return None if value == 0 else self.cards[value - 1]
+
+    def hand_counts(self, code, player):
+        """指定したプレイヤーの手札を、カードプールの各カードの枚数のリストとして取り出す。"""
+        return [self._get(code, shift, HAND_BITS) for shift in self.hand_shift[player]]
+
+    def graveyard_counts(self, code, player):
+        """指定したプレイヤーの墓地を、カードプールの各カードの枚数のリストとして取り出す。"""
+        return [self._get(code, shift, GRAVEYARD_BITS) for shift in self.graveyard_shift[player]]
+
+    def deck_counts(self, code, player):
+        """指定したプレイヤーの山札の残りを、カードプールの各カードの枚数のリストとして求める。"""
+        counts = list(self.composition)
+        for slot, (hand, graveyard) in enumerate(zip(self.hand_counts(code, player),
+                                                      self.graveyard_counts(code, player))):
+            counts[slot] -= hand + graveyard
+        field_value = self._get(code, self.field_shift[player], self.field_bits)
+        if field_value:
+            counts[field_value - 1] -= 1
+        return counts
+
+    def check_searchable(self, game):
+        """
+        successors と draw_outcomes (と同じ規則で進める探索) で、ゲームの続きを正しく求められるかを確かめる。
+        整数には持続効果も契約も入らないため、それらがあると後続の状態が実際のゲームとずれる。
+
+        Args:
+            game (GameData): ゲームデータ。
+
+        Raises:
+            ValueError: 持続中の効果がある、またはカードプールに契約を持つカードがある場合。
+        """
+        if game.lingering:
+            raise ValueError("cannot search a game with lingering effects")
+        if self.has_contracts:
+            raise ValueError("cannot search a card pool with contracts")
+
+    def to_bytes(self, code):
+        """整数を保存用のバイト列に変換する。"""
+        return code.to_bytes((self.bits + 7) // 8, "little")
+
+    def from_bytes(self, data):
+        """to_bytes で作ったバイト列を整数に戻す。"""
+        return int.from_bytes(data, "little")
+
+    def successors(self, code):
+        """
+        "select" フェーズの状態から、両プレイヤーのカードの選び方ごとに、ターン終了後の状態を作る。
+        ドローの前の状態 ("start" フェーズ、決着した場合は "result") になる。
+        契約と持続効果は扱わないため、契約を持つカードプールでは ValueError を出す (check_searchable)。
+
+        Args:
+            code (int): "select" フェーズの状態。
+
+        Returns:
+            dict[tuple[int, int], int]: (プレイヤー1のカードのid, プレイヤー2のカードのid) → 後続の状態。
+        """
+        hand1 = self.hand_counts(code, 0)
+        hand2 = self.hand_counts(code, 1)
+        soul1 = self._get(code, self.soul_shift[0], SOUL_BITS)
+        soul2 = self._get(code, self.soul_shift[1], SOUL_BITS)
+        life1 = self.life(code, 0)
+        life2 = self.life(code, 1)
+        if self.has_contracts:
+            raise ValueError("cannot search a card pool with contracts")
+        base = code & ~(((1 << PHASE_BITS) - 1) << self.phase_shift)
+
+        result = {}
+        for s1, count1 in enumerate(hand1):
+            if not count1:
+                continue
+            for s2, count2 in enumerate(hand2):
+                if not count2:
+                    continue
+                damage1 = self._damage_of(s1, s2, soul1)
+                damage2 = self._damage_of(s2, s1, soul2)
+                # 選んだカードを手札から墓地へ移し、ライフを減らす
+                next_code = (base
+                             - (1 << self.hand_shift[0][s1]) + (1 << self.graveyard_shift[0][s1])
+                             - (1 << self.hand_shift[1][s2]) + (1 << self.graveyard_shift[1][s2])
+                             - (damage2 << self.life_shift[0]) - (damage1 << self.life_shift[1]))
+                new_life1 = life1 - damage2
+                new_life2 = life2 - damage1
+                if min(new_life1, new_life2) < -LIFE_OFFSET:
+                    raise ValueError("life does not fit in the encoded range")
+                if new_life1 <= 0 or new_life2 <= 0:
+                    if new_life1 <= 0 and new_life2 <= 0:
+                        speed1, speed2 = self._speed[s1], self._speed[s2]
+                        winner = 0 if speed1 > speed2 else 1 if speed1 < speed2 else None
+                    else:
+                        winner = 1 if new_life1 <= 0 else 0
+                    next_code |= ALL_PHASES.index(RESULT_PHASE) << self.phase_shift
+                    if winner is not None:
+                        next_code |= (winner + 1) << self.winner_shift
+                else:
+                    next_code += 1 << self.turn_shift   # 次のターンの "start" フェーズ (番号0)
+                result[(self.cards[s1].id, self.cards[s2].id)] = next_code
+        return result
+
+    def _damage_of(self, attacker, defender, soul_point):
+        rows = self._damage.get(soul_point)
+        if rows is None:
+            rows = self._damage[soul_point] = self._table.matrix(soul_point).tolist()
+        return rows[attacker][defender]
+
+    def draw_outcomes(self, code):
+        """
+        "start" フェーズの状態から、手札の補充で起こりうる結果とその確率を列挙する。
+        カードは山札の残りから引き、山札が空になったら墓地を山札に戻す (Engine.draw_card と同じ)。
+
+        Args:
+            code (int): "start" フェーズの状態。
+
+        Returns:
+            list[tuple[float, int]]: (確率, "select" フェーズの状態) のリスト。
+        """
+        base = code & ~(((1 << PHASE_BITS) - 1) << self.phase_shift)
+        base |= ALL_PHASES.index("select") << self.phase_shift
+        outcomes = [(1.0, base)]
+        for p in range(2):
+            missing = HAND_SIZE - sum(self.hand_counts(code, p))
+            graveyard_mask = sum(((1 << GRAVEYARD_BITS) - 1) << shift for shift in self.graveyard_shift[p])
+            for _ in range(missing):
+                next_outcomes = []
+                for prob, c in outcomes:
+                    counts = self.deck_counts(c, p)
+                    total = sum(counts)
+                    if total == 0:
+                        # 墓地を山札に戻す
+                        c &= ~graveyard_mask
+                        counts = self.deck_counts(c, p)
+                        total = sum(counts)
+                    if total == 0:
+                        next_outcomes.append((prob, c))
+                        continue
+                    next_outcomes.extend((prob * count / total, c + (1 << self.hand_shift[p][slot]))
+                                         for slot, count in enumerate(counts) if count)
+                outcomes = next_outcomes
+        # 同じ結果になる引き方をまとめる
+        merged = {}
+        for prob, c in outcomes:
+            merged[c] = merged.get(c, 0.0) + prob
+        return [(prob, c) for c, prob in merged.items()]
@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.Batch import CardTable, simulate_random_games, DRAW
+
+
+# 1行 = 1回の戦闘。カードと魂の数、ダメージはプレイヤー1から見た値
+COLUMNS = {
+    "card1": np.int16,      # プレイヤー1が出したカードのid
+    "card2": np.int16,      # プレイヤー2が出したカードのid
+    "soul1": np.int8,       # プレイヤー1の魂の数
+    "soul2": np.int8,       # プレイヤー2の魂の数
+    "damage1": np.int16,    # プレイヤー1が与えたダメージ
+    "damage2": np.int16,    # プレイヤー2が与えたダメージ
+    "tiebreak": np.bool_,   # 両者のライフが同時に0以下になり、スピードで勝敗を決めたかどうか
+    "winner": np.int8,      # その試合の勝者 (0, 1, 引き分けは 2)
+}
+AGGREGATES = ("plays", "wins", "draws", "damage", "tiebreaks")
+SOUL_BINS = MAX_SOUL_POINT + 1  # 魂の数の集計区分 (最後の区分は MAX_SOUL_POINT 以上をまとめる)
+SCAN_CHUNK = 1 << 22            # 列を走査するときに一度に読む行数
+
+
+class StatsStore:
+    """
+    対戦の統計を列形式で追記保存するストア。
+
+    行は列ごとのファイル (<列名>.bin) に追記するだけで、書き直すことはない。
+    同時に (自分のカード, 相手のカード, 自分の魂の数) ごとの集計を差分で更新しておくため、
+    「魂が2以上のときのカード9のカード5に対する勝率」のような問い合わせは、行数に関係なく集計表を引くだけで済む。
+    集計表にない条件は、列ファイルをメモリマップしてチャンクごとに走査する (scan)。
+    """
+
+    def __init__(self, path, cards=MASTER_CARDS):
+        """
+        Args:
+            path (str): ストアのディレクトリ。なければ作成する。
+            cards (list[Card], optional): カードプール。集計表はカードプールの位置で引く。
+        """
+        self.path = path
+        self.cards = cards
+        self.slot = np.full(max(card.id for card in cards) + 1, -1, dtype=np.int64)
+        self.slot[[card.id for card in cards]] = np.arange(len(cards))
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        if meta and meta["cards"] != [card.id for card in cards]:
+            raise ValueError(f"{path} was created with a different card pool")
+        self.rows = meta["rows"] if meta else 0
+        # 行数の記録より後ろに残っている書きかけの行は捨てる
+        for name, dtype in COLUMNS.items():
+            column = self._column_path(name)
+            size = self.rows * np.dtype(dtype).itemsize
+            if not os.path.exists(column):
+                open(column, "wb").close()
+            elif os.path.getsize(column) != size:
+                os.truncate(column, size)
+
+        shape = (len(cards), len(cards), SOUL_BINS)
+        self.aggregates = {name: np.zeros(shape, dtype=np.int64) for name in AGGREGATES}
+        aggregate_file = os.path.join(path, "aggregates.npz")
+        if os.path.exists(aggregate_file):
+            with np.load(aggregate_file) as saved:
+                if int(saved["rows"]) == self.rows:
+                    for name in AGGREGATES:
+                        self.aggregates[name] = saved[name].copy()
+                    return
+        # 集計表が古ければ、列ファイルから一度だけ作り直す
+        self.rebuild()
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _read_meta(self):
+        meta_file = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_file):
+            return None
+        with open(meta_file) as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        meta_file = os.path.join(self.path, "meta.json")
+        with open(meta_file + ".tmp", "w") as f:
+            json.dump({"rows": self.rows, "cards": [card.id for card in self.cards]}, f)
+        os.replace(meta_file + ".tmp", meta_file)
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, batch):
+        """
+        戦闘の記録をまとめて追記し、集計表を差分で更新する。
+
+        Args:
+            batch (dict[str, np.ndarray]): 列名 → 値の配列 (全ての列が同じ長さ)。
+        """
+        columns = {name: np.asarray(batch[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        n = len(columns["card1"])
+        if any(len(values) != n for values in columns.values()):
+            raise ValueError("all columns must have the same length")
+        if n == 0:
+            return
+        for name, values in columns.items():
+            with open(self._column_path(name), "ab") as f:
+                f.write(values.tobytes())
+        self.rows += n
+        self._write_meta()
+        self._aggregate(columns)
+
+    def _aggregate(self, columns):
+        """行の集計を集計表に足し込む。両プレイヤーの視点の両方から数える。"""
+        card1 = self.slot[columns["card1"]]
+        card2 = self.slot[columns["card2"]]
+        soul1 = np.minimum(columns["soul1"], MAX_SOUL_POINT)
+        soul2 = np.minimum(columns["soul2"], MAX_SOUL_POINT)
+        winner = columns["winner"]
+        tiebreak = columns["tiebreak"]
+        draw = winner == DRAW
+        n = len(self.cards)
+        size = n * n * SOUL_BINS
+        for me, other, soul, damage, player in ((card1, card2, soul1, columns["damage1"], 0),
+                                                (card2, card1, soul2, columns["damage2"], 1)):
+            # (自分のカード, 相手のカード, 魂の数) を1つの番号にして bincount でまとめて数える
+            index = (me * n + other) * SOUL_BINS + soul
+            for name, weights in (("plays", None),
+                                  ("wins", winner == player),
+                                  ("draws", draw),
+                                  ("damage", damage),
+                                  ("tiebreaks", tiebreak)):
+                counts = np.bincount(index, weights, minlength=size)
+                self.aggregates[name] += counts.astype(np.int64).reshape(n, n, SOUL_BINS)
+
+    def flush(self):
+        """集計表を保存する (次に開いたときに列ファイルを走査し直さずに済む)。"""
+        aggregate_file = os.path.join(self.path, "aggregates.npz")
+        with open(aggregate_file + ".tmp", "wb") as f:
+            np.savez(f, rows=self.rows, **self.aggregates)
+        os.replace(aggregate_file + ".tmp", aggregate_file)
+
+    def column(self, name):
+        """列ファイルをメモリマップした配列を返す。"""
+        if self.rows == 0:
+            return np.zeros(0, dtype=COLUMNS[name])
+        return np.memmap(self._column_path(name), dtype=COLUMNS[name], mode="r", shape=(self.rows,))
+
+    def scan(self, names=tuple(COLUMNS)):
+        """
+        列をチャンクごとに読み出す。集計表にない条件で調べるときに使う。
+
+        Args:
+            names (Iterable[str], optional): 読み出す列名。
+
+        Yields:
+            dict[str, np.ndarray]: 列名 → チャンク分の値。
+        """
+        columns = {name: self.column(name) for name in names}
+        for start in range(0, self.rows, SCAN_CHUNK):
+            yield {name: values[start:start + SCAN_CHUNK] for name, values in columns.items()}
+
+    def rebuild(self):
+        """列ファイルを走査して集計表を作り直す。"""
+        for values in self.aggregates.values():
+            values[:] = 0
+        for chunk in self.scan():
+            self._aggregate(chunk)
+
+    def _slot_of(self, card_id):
+        """
+        カードの id をカードプール上の位置に変換する。
+
+        Raises:
+            ValueError: カードプールにない id の場合。
+        """
+        if not 0 <= card_id < len(self.slot) or self.slot[card_id] < 0:
+            ids = ", ".join(str(card.id) for card in self.cards)
+            raise ValueError(f"card {card_id} is not in the card pool (ids: {ids})")
+        return int(self.slot[card_id])
+
+    def _select(self, name, card, opponent, soul_min, soul_max):
+        """集計表から、条件に合う区分の合計を求める。"""
+        if soul_min < 0 or (soul_max is not None and soul_max < soul_min):
+            raise ValueError(f"invalid soul range: {soul_min}..{soul_max}")
+        soul_max = MAX_SOUL_POINT if soul_max is None else min(soul_max, MAX_SOUL_POINT)
+        values = self.aggregates[name][:, :, min(soul_min, MAX_SOUL_POINT):soul_max + 1]
+        if card is not None:
+            values = values[self._slot_of(card)]
+        else:
+            values = values.sum(axis=0)
+        if opponent is not None:
+            values = values[self._slot_of(opponent)]
+        return int(values.sum())
+
+    def count(self, card=None, opponent=None, soul_min=0, soul_max=None):
+        """
+        条件に合う、カードを出した回数を返す。
+
+        Args:
+            card (int, optional): 自分が出したカードのid。省略時は全てのカード。
+            opponent (int, optional): 相手が出したカードのid。省略時は全てのカード。
+            soul_min (int, optional): 自分の魂の数の下限。
+            soul_max (int, optional): 自分の魂の数の上限 (MAX_SOUL_POINT 以上は1つの区分にまとめている)。
+
+        Raises:
+            ValueError: カードプールにない id や、不正な魂の数の範囲を指定した場合。
+        """
+        return self._select("plays", card, opponent, soul_min, soul_max)
+
+    def win_rate(self, card=None, opponent=None, soul_min=0, soul_max=None):
+        """カードを出した試合での勝率を返す (引数は count と同じ)。"""
+        plays = self.count(card, opponent, soul_min, soul_max)
+        return self._select("wins", card, opponent, soul_min, soul_max) / plays if plays else 0.0
+
+    def average_damage(self, card=None, opponent=None, soul_min=0, soul_max=None):
+        """カードを出したときに与えたダメージの平均を返す (引数は count と同じ)。"""
+        plays = self.count(card, opponent, soul_min, soul_max)
+        return self._select("damage", card, opponent, soul_min, soul_max) / plays if plays else 0.0
+
+    def tiebreak_rate(self, card=None, opponent=None, soul_min=0, soul_max=None):
+        """カードを出した戦闘のうち、スピードで勝敗を決めた割合を返す (引数は count と同じ)。"""
+        plays = self.count(card, opponent, soul_min, soul_max)
+        return self._select("tiebreaks", card, opponent, soul_min, soul_max) / plays if plays else 0.0
+
+
+def record_match(strategy1, strategy2, rng, game=None):
+    """
+    2つの戦略で1試合対戦させ、戦闘ごとの記録を StatsStore.append に渡せる形で返す。
+
+    Args:
+        strategy1 (Callable): プレイヤー1の戦略。
+        strategy2 (Callable): プレイヤー2の戦略。
+        rng (random.Random): 乱数生成器。
+        game (GameData, optional): 対戦させるゲームデータ。省略時は rng からシードを取り出して生成する。
+
+    Returns:
+        dict[str, np.ndarray]: 戦闘ごとの記録。
+    """
+    if game is None:
+        game = new_game(seed=rng.getrandbits(64))
+    rows = {name: [] for name in COLUMNS}
+    player1, player2 = game.players
+    while game.phase != RESULT_PHASE and game.turn <= MAX_TURNS:
+        if game.phase == "start":
+            start_phase(game)
+        select_phase(game, strategy1(game, 0, rng), strategy2(game, 1, rng))
+        rows["card1"].append(player1.field_card.id)
+        rows["card2"].append(player2.field_card.id)
+        rows["soul1"].append(player1.soul_point)
+        rows["soul2"].append(player2.soul_point)
+        life1, life2 = player1.life, player2.life
+        resolve_turn(game)
+        rows["damage1"].append(life2 - player2.life)
+        rows["damage2"].append(life1 - player1.life)
+        rows["tiebreak"].append(player1.life <= 0 and player2.life <= 0)
+    winner = DRAW if game.winner is None else game.winner
+    rows["winner"] = [winner] * len(rows["card1"])
+    return rows
+
+
+def simulate_to_store(store, n_games, rng=None, table=None):
+    """
+    Batch.simulate_random_games でランダム戦略同士の対戦をまとめてシミュレートし、全ての戦闘をストアに追記する。
+
+    Args:
+        store (StatsStore): 追記先のストア。
+        n_games (int): 試合数。
+        rng (np.random.Generator, optional): 乱数生成器。
+        table (CardTable, optional): カードのテーブル。省略時はストアのカードプールから作る。
+    """
+    if table is None:
+        table = CardTable.from_cards(store.cards)
+    turn_log = []
+    winner, _ = simulate_random_games(table, n_games, rng, turn_log=turn_log)
+    games = np.concatenate([active for active, _, _, _, _, _ in turn_log])
+    card1 = np.concatenate([c1 for _, c1, _, _, _, _ in turn_log])
+    card2 = np.concatenate([c2 for _, _, c2, _, _, _ in turn_log])
+    soul1 = np.concatenate([s1 for _, _, _, s1, _, _ in turn_log])
+    soul2 = np.concatenate([s2 for _, _, _, _, s2, _ in turn_log])
+    damage1 = np.concatenate([result.damage1 for *_, result in turn_log])
+    damage2 = np.concatenate([result.damage2 for *_, result in turn_log])
+    tiebreak = np.concatenate([(result.life1 <= 0) & (result.life2 <= 0) for *_, result in turn_log])
+    store.append({
+        "card1": table.id[card1],
+        "card2": table.id[card2],
+        "soul1": soul1,
+        "soul2": soul2,
+        "damage1": damage1,
+        "damage2": damage2,
+        "tiebreak": tiebreak,
+        "winner": winner[games],
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="対戦の統計の蓄積と問い合わせ")
+    parser.add_argument("path", help="ストアのディレクトリ")
+    parser.add_argument("--simulate", type=int, default=0, help="ランダム戦略同士でシミュレートして追記する試合数")
+    parser.add_argument("--card", type=int, default=None, help="問い合わせる自分のカードのid")
+    parser.add_argument("--opponent", type=int, default=None, help="問い合わせる相手のカードのid")
+    parser.add_argument("--soul-min", type=int, default=0)
+    parser.add_argument("--soul-max", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    store = StatsStore(args.path)
+    if args.simulate:
+        rng = np.random.default_rng(args.seed)
+        for start in range(0, args.simulate, 100000):
+            simulate_to_store(store, min(100000, args.simulate - start), rng)
+        store.flush()
+
+    query = (args.card, args.opponent, args.soul_min, args.soul_max)
+    try:
+        store.count(*query)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"rows: {len(store)}")
+    print(f"plays: {store.count(*query)}")
+    print(f"win rate: {store.win_rate(*query):.4f}")
+    print(f"average damage: {store.average_damage(*query):.4f}")
+    print(f"tiebreak rate: {store.tiebreak_rate(*query):.4f}")
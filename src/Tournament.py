@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.settings import *
+from src.DataClass import *
+from src.Engine import *
+from src.AI import STRATEGIES, create_strategy
+
+
+@dataclass
+class MatchStats:
+    """ある戦略の組み合わせ (プレイヤー1 vs プレイヤー2) の対戦成績を集計する。"""
+    games: int = 0                          # 試合数
+    wins: list = field(default_factory=lambda: [0, 0])  # 各プレイヤーの勝利数
+    draws: int = 0                          # 引き分けの数
+    total_turns: int = 0                    # 全試合のターン数の合計
+    card_usage: list = field(default_factory=lambda: [Counter(), Counter()])  # 各プレイヤーが使ったカードのidごとの回数
+
+    def add_play(self, game, index1, index2):
+        """
+        カードを場に出すたびに、使ったカードを数える (Engine.play_match の on_select に渡す)。
+        墓地は山札に戻されると空になるため、終了後の墓地からではなく出した時点で数える。
+
+        Args:
+            game (GameData): "select" フェーズのゲームデータ。
+            index1 (int): プレイヤー1が選んだ手札の位置。
+            index2 (int): プレイヤー2が選んだ手札の位置。
+        """
+        for usage, player, index in zip(self.card_usage, game.players, (index1, index2)):
+            usage[player.hand[index].id] += 1
+
+    def add_game(self, game):
+        """
+        終了した1試合の結果を集計に加える。カードの使用回数は add_play で数える。
+
+        Args:
+            game (GameData): 対戦終了後のゲームデータ。
+        """
+        self.games += 1
+        self.total_turns += turns_played(game)
+        if game.winner is None:
+            self.draws += 1
+        else:
+            self.wins[game.winner] += 1
+
+    def merge(self, other):
+        """
+        別の集計結果をこの集計に足し合わせる。
+
+        Args:
+            other (MatchStats): 足し合わせる集計結果。
+        """
+        self.games += other.games
+        self.wins[0] += other.wins[0]
+        self.wins[1] += other.wins[1]
+        self.draws += other.draws
+        self.total_turns += other.total_turns
+        for usage, other_usage in zip(self.card_usage, other.card_usage):
+            usage.update(other_usage)
+
+    def win_rate(self, player_index=0):
+        """指定したプレイヤーの勝率を返す。"""
+        return self.wins[player_index] / self.games if self.games else 0.0
+
+    def draw_rate(self):
+        """引き分けの割合を返す。"""
+        return self.draws / self.games if self.games else 0.0
+
+    def average_turns(self):
+        """1試合あたりの平均ターン数を返す。"""
+        return self.total_turns / self.games if self.games else 0.0
+
+
+def chunk_seed(seed, pair_index, chunk_index):
+    """
+    チャンクごとに独立した乱数列のシードを生成する。
+    シードはチャンクの番号だけで決まるため、ワーカー数や処理順に関わらず結果が再現できる。
+
+    Args:
+        seed (int): トーナメント全体のシード。
+        pair_index (int): 戦略の組み合わせの番号。
+        chunk_index (int): チャンクの番号。
+
+    Returns:
+        int: チャンク用のシード。
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=(pair_index, chunk_index))
+    return int(sequence.generate_state(2, dtype=np.uint64)[0])
+
+
+def run_chunk(name1, name2, n_games, seed):
+    """
+    1チャンク分の試合を実行して集計する。ワーカープロセスで呼び出される。
+
+    Args:
+        name1 (str): プレイヤー1の戦略名 (STRATEGIES のキー)。
+        name2 (str): プレイヤー2の戦略名。
+        n_games (int): 試合数。
+        seed (int): このチャンク用のシード。
+
+    Returns:
+        MatchStats: このチャンクの集計結果。
+    """
+    rng = random.Random(seed)
+    strategy1 = create_strategy(name1, rng.getrandbits(64))
+    strategy2 = create_strategy(name2, rng.getrandbits(64))
+    stats = MatchStats()
+    for _ in range(n_games):
+        stats.add_game(play_match(strategy1, strategy2, rng, on_select=stats.add_play))
+    return stats
+
+
+def run_tournament(names, n_games, seed=0, workers=None, chunk_size=2000, on_chunk=None):
+    """
+    戦略同士の総当たり戦を、プロセスプールで全コアに分散して実行する。
+    試合はチャンク単位で配られ、終わったチャンクから順に集計に足し合わされる。
+
+    Args:
+        names (list[str]): 参加する戦略名のリスト (STRATEGIES のキー)。
+        n_games (int): 組み合わせ1つあたりの試合数。
+        seed (int, optional): トーナメント全体のシード。
+        workers (int, optional): ワーカープロセス数。省略時はCPUのコア数。
+        chunk_size (int, optional): 1チャンクあたりの試合数。
+        on_chunk (Callable, optional): チャンクが終わるたびに (組み合わせ, 途中までの集計) を受け取る関数。
+
+    Returns:
+        dict[tuple[str, str], MatchStats]: 組み合わせごとの集計結果。
+    """
+    pairs = list(itertools.permutations(names, 2)) + [(name, name) for name in names]
+    results = {pair: MatchStats() for pair in pairs}
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {}
+        for pair_index, pair in enumerate(pairs):
+            for chunk_index, start in enumerate(range(0, n_games, chunk_size)):
+                size = min(chunk_size, n_games - start)
+                future = executor.submit(
+                    run_chunk, *pair, size, chunk_seed(seed, pair_index, chunk_index))
+                futures[future] = pair
+
+        for future in as_completed(futures):
+            pair = futures[future]
+            results[pair].merge(future.result())
+            if on_chunk is not None:
+                on_chunk(pair, results[pair])
+
+    return results
+
+
+def print_results(results):
+    """
+    総当たり戦の集計結果を表形式で表示する。
+
+    Args:
+        results (dict[tuple[str, str], MatchStats]): run_tournament の戻り値。
+    """
+    print(f"{'P1':>8} {'P2':>8} {'games':>9} {'P1 win':>7} {'P2 win':>7} {'draw':>6} {'turns':>6}")
+    for (name1, name2), stats in results.items():
+        print(f"{name1:>8} {name2:>8} {stats.games:>9} "
+              f"{stats.win_rate(0):>7.3f} {stats.win_rate(1):>7.3f} "
+              f"{stats.draw_rate():>6.3f} {stats.average_turns():>6.2f}")
+
+    # カードごとの使用率 (全ての組み合わせ・両プレイヤーの合計)
+    usage = Counter()
+    for stats in results.values():
+        for player_usage in stats.card_usage:
+            usage.update(player_usage)
+    total = sum(usage.values()) or 1
+    names = {card.id: card.name for card in MASTER_CARDS}
+    for card_id, count in sorted(usage.items()):
+        print(f"{card_id:>3} {names.get(card_id, '?')}: {count / total:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI戦略同士のモンテカルロ総当たり戦")
+    parser.add_argument("strategies", nargs="*", default=list(STRATEGIES))
+    parser.add_argument("--games", type=int, default=100000, help="組み合わせ1つあたりの試合数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    print_results(run_tournament(
+        args.strategies, args.games, args.seed, args.workers, args.chunk_size))
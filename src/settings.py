@@ -2,4 +2,41 @@ WINDOW_WIDTH = 256
 WINDOW_HEIGHT = 256
 FPS = 30
 TITLE = "Goetic Gambit"
+RESOURCE_FILE = "../assets/my_resource.pyxres"  # pyxel のリソースファイル (起動後にバックグラウンドで読み込む)
+ASSET_LOAD_BUDGET = 0.5 / FPS  # 1フレームでアセットの読み込みに使ってよい時間 (秒)
+REPORT_STARTUP = False  # 起動から最初のフレームを描画するまでの時間を標準エラー出力に表示するかどうか (--report-startup でも有効にできる)
 
+HAND_SIZE = 5           # 手札の上限枚数
+INITIAL_LIFE = 15       # プレイヤーの初期体力
+DECK_COPIES = 3         # 山札に入れる1種類あたりのカードの枚数
+MAX_TURNS = 200         # ヘッドレス対戦で引き分けとみなすターン数の上限
+BATTLE_WAIT_FRAMES = 90  # 戦闘演出の待機フレーム数 (FPS=30で3秒)
+CARD_WIDTH = 50         # カードの絵柄 (カード1枚の画像) の幅
+CARD_HEIGHT = 64        # カードの絵柄の高さ
+CARD_ART_BANK = 0       # カードのイラストを置くイメージバンク (カードプールの順に CARD_ART_WIDTH x CARD_ART_HEIGHT で左上から並べる)
+CARD_ART_WIDTH = 48     # カードのイラストの幅
+CARD_ART_HEIGHT = 22    # カードのイラストの高さ
+CARD_ATLAS_SPARE = 10   # 絵柄のアトラスで、修正値を持つカードのために空けておく枠の数
+HIT_GRID_CELL = 32      # マウスの当たり判定に使う格子の1マスの大きさ (ピクセル)
+TURBO_SPEED = 1.0       # ロジックを実時間の何倍の速さで進めるか (1フレームあたりの tick 数の目安)
+RENDER_EVERY = 1        # 何フレームに1回描画するか (ターボモードで描画を間引く)
+MAX_TICKS_PER_FRAME = 1000  # 描画が遅れたときに、1フレームでまとめて進める tick 数の上限
+AI_TICK_ITERATIONS = 50  # ターボモードなどで AI が1 tick あたりに行う探索の反復回数 (時間でなく回数で区切り、結果を再現できるようにする)
+AI_VS_AI_STRATEGY = "greedy"  # AI同士の対戦でプレイヤー1が使う戦略 (AI.STRATEGIES のキー)
+MAX_SOUL_POINT = 10     # マッチアップ表で事前計算する魂の数の上限
+MATCHUP_TABLE_MAX_CARDS = 1024  # マッチアップ表を使うカードプールの枚数の上限 (より大きいプールではその場で計算する)
+AI_FRAME_BUDGET = 0.005  # プレイヤー2(AI)が1フレームあたりに探索に使う時間 (秒)
+AI_POLICY_FILE = None   # Equilibrium.py で事前計算した局面の価値のファイル (指定するとプレイヤー2は探索せずに、毎ターンその局面の行列ゲームを解いて選ぶ)
+NETWORK_PORT = 8765      # 対戦サーバ (Network.py) のポート番号
+REPLAY_FILE = None      # 対戦を記録するリプレイファイルのパス (None なら記録しない)
+REPLAY_SPEED = 1.0      # リプレイ再生時の速度 (実時間の何倍で再生するか)
+SNAPSHOT_CAPACITY = 256  # 巻き戻し用に保持するスナップショットの数 (1ターンに1つ)
+SNAPSHOT_FILE = None    # クラッシュからの復帰用に最新のスナップショットを書き出すパス (None なら書き出さない)
+PROFILE = False         # フレームプロファイラを有効にするかどうか (F1キーでオーバーレイの表示を切り替え)
+PROFILE_HISTORY = 300   # プロファイラが保持するフレーム数
+PROFILE_TRACE_EVENTS = 100000  # Chrome トレースとして書き出すために保持するイベント数
+PROFILE_TRACE_FILE = "trace.json"  # F2キーで Chrome トレースを書き出す先
+LOG_FILE = None         # 対戦の記録を JSON Lines で書き出すファイルのパス (None なら書き出さない)
+LOG_QUEUE_SIZE = 1024   # 記録の書き込みスレッドへ渡すキューの上限 (あふれた記録は捨てる)
+LOG_RICH = False        # 対戦の記録を rich でコンソールにも表示するかどうか
+LOG_RICH_RATE = 10      # コンソールに表示する1秒あたりの行数の上限
@@ -5,6 +5,15 @@ from typing import List
 import random
 
 
+DEBUG_PRINT = False     # True ならフェーズの進行と手札をコンソールに表示する
+
+
+def debug_print(*values):
+    """DEBUG_PRINT が True のときだけ表示する (フレームごとの処理でコンソールへの出力を待たないため)。"""
+    if DEBUG_PRINT:
+        rprint(*values)
+
+
 @dataclass
 class Card:
     """カードのデータを保持"""
@@ -142,19 +151,20 @@ class GameScene(Scene):
     def update(self):
         if self.current_phase == "start":
             """ターン開始"""
-            rprint(f"Turn: {self.turn}")
-            rprint(f"Current Phase: {self.current_phase}")
-            print(f"p1 hp: {self.players[0].hp}")
-            print(f"p2 hp: {self.players[1].hp}")
+            debug_print(f"Turn: {self.turn}")
+            debug_print(f"Current Phase: {self.current_phase}")
+            debug_print(f"p1 hp: {self.players[0].hp}")
+            debug_print(f"p2 hp: {self.players[1].hp}")
             self.turn += 1
             for player in self.players:
                 self._draw_card(player)
+            # 手札は補充したときに1度だけ表示する (入力待ちの毎フレーム表示しない)
+            debug_print(self.players[0].hand)
 
             self.current_phase = self.phases[1]
 
         elif self.current_phase == "select":
             """カード選択"""
-            rprint(self.players[0].hand)
             hand_size = len(self.players[0].hand)
             for i in range(hand_size):
                 if pyxel.btnp(pyxel.KEY_1 + i):
@@ -169,8 +179,8 @@ class GameScene(Scene):
         elif self.current_phase == "effect":
             """効果解決"""
             # print(f"Current Phase: {self.current_phase}")
-            rprint(self.players[0].selected_card)
-            rprint(self.players[1].selected_card)
+            debug_print(self.players[0].selected_card)
+            debug_print(self.players[1].selected_card)
 
             # TODO: 惑星バフ、契約の利益
 
@@ -198,12 +208,12 @@ class GameScene(Scene):
 
         elif self.current_phase == "contract":
             """契約解決"""
-            print(f"Current Phase: {self.current_phase}")
+            debug_print(f"Current Phase: {self.current_phase}")
             self.current_phase = self.phases[5]
 
         elif self.current_phase == "end":
             """ターン終了"""
-            print(f"Current Phase: {self.current_phase}")
+            debug_print(f"Current Phase: {self.current_phase}")
             if self.players[0].hp <= 0 and self.players[1].hp <= 0:
                 if self.p1_speed > self.p2_speed:
                     self.winner = "Player1"
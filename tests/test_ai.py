@@ -0,0 +1,77 @@
+import random
+
+from src.AI import STRATEGIES, create_strategy, greedy_strategy
+from src.Engine import new_game, play_match, start_phase
+from src.MCTS import MCTSAgent
+from src.settings import MAX_TURNS
+
+
+def test_stateful_strategies_are_created_per_seat():
+    assert create_strategy("greedy") is greedy_strategy
+    first, second = create_strategy("mcts", seed=1), create_strategy("mcts", seed=1)
+    assert isinstance(first, MCTSAgent) and first is not second
+    assert set(STRATEGIES) >= {"random", "attack", "greedy", "mcts"}
+
+
+def test_mcts_call_leaves_agent_and_caller_rng_untouched():
+    agent = MCTSAgent(player_index=1, iterations=20, seed=1)
+    own_rng = agent.rng
+    caller_rng = random.Random(5)
+    before = caller_rng.getstate()
+    game = new_game(seed=3)
+    start_phase(game)
+    index = agent(game, 0, caller_rng)
+    assert 0 <= index < len(game.players[0].hand)
+    assert agent.player_index == 1 and agent.rng is own_rng
+    assert caller_rng.getstate() == before
+
+
+def _packed(agent, state):
+    """墓地を山札の構成から求め直して、キーを最初から詰め込む。"""
+    hand1, hand2, life1, life2, soul1, soul2, turn, deck1, deck2, _ = state
+    graveyards = []
+    for player, (hand, deck) in enumerate(((hand1, deck1), (hand2, deck2))):
+        counts = list(agent.composition[player])
+        for card_id in hand:
+            counts[agent.slot[card_id]] -= 1
+        graveyards.append([card_id for card_id, n, left in zip(agent.deck_ids, counts, deck)
+                           for _ in range(n - left)])
+    return agent.codec.pack((hand1, hand2), (life1, life2), (soul1, soul2), turn, graveyards=graveyards)
+
+
+def test_incremental_key_matches_full_packing_across_recycles():
+    agent = MCTSAgent(seed=1)
+    rng = random.Random(0)
+    game = new_game(seed=4)
+    start_phase(game)
+    for player in game.players:
+        player.life = 120   # 山札を何周もするまで続ける
+    state = agent.state_of(game)
+    for _ in range(100):
+        state, value = agent._step(state, rng.choice(state[0]), rng.choice(state[1]))
+        if value is not None:
+            break
+        assert state[-1] == _packed(agent, state)
+
+
+def test_seeded_mcts_tournament_is_reproducible():
+    results = []
+    for _ in range(2):
+        rng = random.Random(9)
+        game = play_match(create_strategy("mcts", 1), create_strategy("greedy"), rng, new_game(seed=9))
+        results.append((game.winner, game.turn))
+    assert results[0] == results[1]
+
+
+def test_search_and_engine_stop_at_the_same_turn():
+    game = new_game(seed=4)
+    start_phase(game)
+    game.turn = MAX_TURNS
+    for player in game.players:
+        player.life = 100
+    agent = MCTSAgent(seed=1)
+    hand1, hand2 = game.players[0].hand, game.players[1].hand
+    _, value = agent._step(agent.state_of(game), hand1[0].id, hand2[0].id)
+    assert value == 0.5
+    played = play_match(lambda game, index, rng: 0, lambda game, index, rng: 0, game=game)
+    assert played.turn == MAX_TURNS + 1 and played.winner is None
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from src.CardDB import CARD_FILE, CardDatabase
+from src.DataClass import Card, Contract, card_from_record
+
+ROWS = [
+    (3, "バエル", ["king"], 1, 5, 72),
+    (7, "アガレス", ["Duke"], 2, 4, 71),
+    (12, "ウァサゴ", ["prince"], 3, 3, 60),
+    (40, "ガミジン", ["marquis", "Duke"], 4, 2, 65),
+]
+
+
+@pytest.fixture
+def database():
+    return CardDatabase.from_rows(ROWS, Card)
+
+
+def test_indexes_by_id_title_and_stats(database):
+    assert database.get(12).name == "ウァサゴ"
+    assert database.get(4) is None and database.get(1000) is None and database.get(-1) is None
+    assert database.get(7) is database.get(7)
+    assert [card.id for card in database.by_title("Duke")] == [7, 40]
+    assert database.by_title("none") == []
+    assert [card.id for card in database.filter(attack=(2, None), speed=(None, 65))] == [12, 40]
+    assert [card.id for card in database.filter(defense=(3, 3))] == [12]
+    with pytest.raises(ValueError, match="unknown stat"):
+        database.filter(life=(0, 1))
+
+
+def test_compiled_binary_round_trips(database, tmp_path):
+    path = str(tmp_path / "cards.bin")
+    database.compile(path)
+    compiled = CardDatabase.load(path, Card)
+    assert compiled.cards() == database.cards()
+    assert compiled.get(40).title == ("marquis", "Duke")
+    (tmp_path / "broken.bin").write_bytes(b"XXXX" + bytes(12))
+    with pytest.raises(ValueError, match="not a compiled card database"):
+        CardDatabase.open_compiled(str(tmp_path / "broken.bin"), Card)
+
+
+def test_csv_matches_its_compiled_form(tmp_path):
+    source = CardDatabase.from_csv(CARD_FILE, Card)
+    path = str(tmp_path / "cards.bin")
+    source.compile(path)
+    assert CardDatabase.open_compiled(path, Card).cards() == source.cards()
+
+
+def test_sample_draws_from_the_pool(database):
+    cards = database.sample(50, random.Random(0))
+    assert len(cards) == 50
+    assert {card.id for card in cards} <= {row[0] for row in ROWS}
+
+
+def test_contract_columns_round_trip(tmp_path):
+    source = tmp_path / "cards.csv"
+    source.write_text("id,name,title,attack,defense,speed,benefit,cost,soul,duration\n"
+                      "1,バエル,king,1,5,72,,,,\n"
+                      "2,アガレス,Duke,2,4,71,3,1,,2\n"
+                      "3,ウァサゴ,prince,3,3,60,,,1,\n", encoding="utf-8")
+    database = CardDatabase.from_csv(str(source), card_from_record)
+    assert [card.contract for card in database.cards()] == [
+        None, Contract(benefit=3, cost=1, duration=2), Contract(soul=1)]
+    path = str(tmp_path / "cards.bin")
+    database.compile(path)
+    assert CardDatabase.open_compiled(path, card_from_record).cards() == database.cards()
+    with pytest.raises(ValueError, match="duration"):
+        CardDatabase.from_rows([(1, "バエル", ["king"], 1, 5, 72, (1, 0, 0, 0))], card_from_record)
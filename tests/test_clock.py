@@ -0,0 +1,15 @@
+from src.Scheduler import FixedStepClock
+
+
+def test_fixed_step_clock_accumulates_and_caps_ticks():
+    now = [0.0]
+    clock = FixedStepClock(rate=30, speed=2.0, max_ticks=10, time_source=lambda: now[0])
+    assert clock.ticks() == 1
+    now[0] = 0.05           # 0.05秒 × 30 × 2 = 3 tick
+    assert clock.ticks() == 3
+    now[0] = 0.06           # 0.6 tick は次のフレームに持ち越す
+    assert clock.ticks() == 0
+    now[0] = 0.07
+    assert clock.ticks() == 1
+    now[0] = 10.0
+    assert clock.ticks() == 10 and clock.dropped > 0
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from src.DataClass import MASTER_CARDS
+from src.Deck import Deck
+
+
+def test_draw_empties_the_deck_and_tracks_counts():
+    deck = Deck.standard(copies=2)
+    rng = random.Random(0)
+    drawn = [deck.draw(rng) for _ in range(len(MASTER_CARDS) * 2)]
+    assert deck.draw(rng) is None and len(deck) == 0
+    assert sorted(card.id for card in drawn) == sorted(card.id for card in MASTER_CARDS for _ in range(2))
+    assert deck.counts == [0] * len(MASTER_CARDS)
+    assert deck.probabilities() == [0.0] * len(MASTER_CARDS) and deck.expected([1] * len(MASTER_CARDS)) == 0.0
+
+
+def test_recycled_cards_can_be_drawn_again():
+    deck = Deck.standard(copies=1)
+    rng = random.Random(1)
+    first = deck.draw(rng)
+    assert deck.count(first.id) == 0
+    deck.recycle([first])
+    assert deck.count(first.id) == 1 and len(deck) == len(MASTER_CARDS)
+    assert deck.composition == (1,) * len(MASTER_CARDS)
+
+
+def test_probabilities_follow_the_remaining_cards():
+    counts = [3] + [1] * (len(MASTER_CARDS) - 1)
+    deck = Deck.from_counts(counts)
+    total = sum(counts)
+    assert deck.probability(MASTER_CARDS[0].id) == pytest.approx(3 / total)
+    assert sum(deck.probabilities()) == pytest.approx(1.0)
+    values = list(range(len(MASTER_CARDS)))
+    assert deck.expected(values) == pytest.approx(sum(c * v for c, v in zip(counts, values)) / total)
+
+    copy = deck.copy()
+    deck.draw(random.Random(2))
+    assert copy.counts == counts and copy.composition == deck.composition
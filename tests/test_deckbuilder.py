@@ -0,0 +1,23 @@
+from src.DataClass import Card
+from src.DeckBuilder import DeckBuilder, evaluate_chunk
+
+
+def _pool():
+    return [Card(100 + i, f"card{i}", ("king",), 1 + i, 4 - i, 60 + i) for i in range(4)]
+
+
+def test_deck_size_follows_the_card_pool():
+    builder = DeckBuilder(cards=_pool())
+    assert builder.deck_size == 12
+    deck = builder.random_deck()
+    assert len(deck) == 4 and sum(deck) == 12
+
+
+def test_custom_pools_are_evaluated_with_their_own_cards():
+    cards = _pool()
+    builder = DeckBuilder(cards=cards, opponents=(("random", None),))
+    deck = (6, 6, 0, 0)
+    assert builder.evaluate([deck], 4, workers=1, chunk_size=2) == 4
+    assert builder.cache[deck].games == 4
+    fitness = evaluate_chunk(deck, "greedy", (("random", None),), 3, seed=1, cards=cards)
+    assert fitness.games == 3
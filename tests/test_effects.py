@@ -0,0 +1,64 @@
+import dataclasses
+
+from src.DataClass import Contract, GameData, MASTER_CARDS
+from src.Effects import ATTACK, DAMAGE, SOUL, Effect, EffectQueue, LingeringEffects, add_lingering
+from src.Engine import lookup_damage, new_game, play_turn, start_phase
+
+
+def _contract_game(contract, seed=0):
+    cards = [dataclasses.replace(card, contract=contract) for card in MASTER_CARDS]
+    game = new_game(cards=cards, seed=seed)
+    start_phase(game)
+    return game
+
+
+def test_contract_resolves_now_and_lingers_for_its_duration():
+    game = _contract_game(Contract(soul=1, duration=2))
+    souls = []
+    for _ in range(3):
+        play_turn(game, 0, 0)
+        souls.append([player.soul_point for player in game.players])
+    # 1ターン目は出したカードの分だけ、2ターン目以降は前のターンの持続効果も重なる (2ターンで切れる)
+    assert souls == [[1, 1], [3, 3], [5, 5]]
+    # 切れた効果は次の契約解決で取り除くため、2・3ターン目に登録した効果が残っている
+    assert sorted(expires for expires, _, _ in game.lingering) == [4, 4, 5, 5]
+
+
+def test_contract_benefit_and_cost_change_life():
+    game = _contract_game(Contract(benefit=3, cost=1))
+    card1, card2 = game.players[0].hand[0], game.players[1].hand[0]
+    damage1 = lookup_damage(card1, card2, 0, game.cards)
+    damage2 = lookup_damage(card2, card1, 0, game.cards)
+    play_turn(game, 0, 0)
+    assert [player.life for player in game.players] == [15 - damage2 + 2, 15 - damage1 + 2]
+    assert not game.lingering
+
+
+def test_attack_damage_uses_soul_count_at_resolve_time():
+    game = new_game(seed=3)
+    start_phase(game)
+    player1, player2 = game.players
+    player1.field_card, player2.field_card = player1.hand.pop(0), player2.hand.pop(0)
+    queue = EffectQueue()
+    # 戦闘より速い効果で魂の数が増えると、その後に解決する攻撃のダメージに反映される
+    queue.push(Effect(SOUL, 0, 0, 4, 10 ** 6))
+    queue.push(Effect(ATTACK, 0, 1, None, player1.field_card.speed, player1.field_card))
+    resolved = queue.resolve(game)
+    expected = lookup_damage(player1.field_card, player2.field_card, 4, game.cards)
+    assert resolved[-1].amount == expected
+    assert player2.life == 15 - expected
+
+
+def test_lingering_order_is_per_game():
+    games = [GameData(), GameData()]
+    for game in games:
+        add_lingering(game, Effect(DAMAGE, 0, 1, 1, 50), 1)
+        add_lingering(game, Effect(DAMAGE, 1, 0, 1, 50), 1)
+    assert [seq for _, seq, _ in games[0].lingering] == [0, 1]
+    assert [seq for _, seq, _ in games[1].lingering] == [0, 1]
+
+    restored = LingeringEffects(games[0].lingering)
+    restored.push(Effect(DAMAGE, 0, 1, 2, 50), 3)
+    assert sorted(seq for _, seq, _ in restored) == [0, 1, 2]
+    restored.expire(3)
+    assert not restored
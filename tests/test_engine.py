@@ -0,0 +1,51 @@
+import random
+
+from src.AI import greedy_strategy
+from src.DataClass import GameData, MASTER_CARDS
+from src.Engine import RESULT_PHASE, lookup_damage, new_game, play_match, play_turn, random_strategy, start_phase
+
+
+def test_players_without_deck_draw_nothing():
+    game = GameData()
+    start_phase(game)
+    assert game.phase == "select"
+    assert [len(player.hand) for player in game.players] == [0, 0]
+
+
+def test_players_without_deck_can_battle():
+    game = GameData()
+    for player, cards in zip(game.players, (MASTER_CARDS[:5], MASTER_CARDS[5:])):
+        player.hand = list(cards)
+    start_phase(game)
+    index = greedy_strategy(game, 0)
+    play_turn(game, index, 0)
+    assert game.turn == 2 and len(game.players[0].hand) == 4
+
+
+def test_new_game_deals_full_hands():
+    game = new_game(seed=1)
+    assert [len(player.hand) for player in game.players] == [5, 5]
+    assert all(len(player.deck) == 3 * len(MASTER_CARDS) - 5 for player in game.players)
+
+
+def test_same_seed_replays_same_match():
+    results = []
+    for _ in range(2):
+        game = play_match(random_strategy, random_strategy, random.Random(7))
+        results.append((game.winner, game.turn, [player.life for player in game.players]))
+    assert results[0] == results[1]
+    assert game.phase == RESULT_PHASE
+
+
+def test_slower_attack_resolves_after_a_lethal_one():
+    game = new_game(seed=9)
+    start_phase(game)
+    card1, card2 = game.players[0].hand[0], game.players[1].hand[0]
+    assert card1.speed < card2.speed
+    assert lookup_damage(card1, card2, 0) > 0 and lookup_damage(card2, card1, 0) > 0
+    for player in game.players:
+        player.life = 1
+    play_turn(game, 0, 0)
+    # 速い方の攻撃で決着していても遅い方の攻撃は解決され、相打ちはスピードで決まる
+    assert all(player.life <= 0 for player in game.players)
+    assert game.winner == 1
@@ -0,0 +1,68 @@
+import dataclasses
+import random
+
+import numpy as np
+import pytest
+
+from src.AI import greedy_strategy
+from src.DataClass import Contract, MASTER_CARDS
+from src.Engine import play_match
+from src.Equilibrium import EquilibriumPolicy, EquilibriumSolver, hand_multisets, solve_matrix_games
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return EquilibriumSolver(iterations=50, samples=128).solve(workers=1)
+
+
+def test_hand_multisets_prior_sums_to_one():
+    hands, prior = hand_multisets((3, 3, 1), 3)
+    assert (hands.sum(axis=1) == 3).all()
+    assert prior.sum() == pytest.approx(1.0)
+    # 3種類を1枚ずつ引く確率は 3*3*1 / C(7, 3)
+    assert prior[hands.tolist().index([1, 1, 1])] == pytest.approx(9 / 35)
+
+
+def test_matrix_game_is_solved_to_the_mixed_equilibrium():
+    # じゃんけんの均衡は一様で価値は0
+    payoff = np.array([[[0, -1, 1], [1, 0, -1], [-1, 1, 0]]], dtype=float)
+    mask = np.ones((1, 3), dtype=bool)
+    strategy, values = solve_matrix_games(payoff, mask, mask, 2000)
+    assert strategy[0] == pytest.approx([1 / 3] * 3, abs=0.02)
+    assert values[0] == pytest.approx(0.0, abs=0.02)
+
+
+def test_policy_round_trips_and_rejects_other_card_pools(policy, tmp_path):
+    path = str(tmp_path / "policy.npz")
+    policy.save(path)
+    loaded = EquilibriumPolicy.load(path)
+    assert np.array_equal(loaded.values, policy.values)
+    with pytest.raises(ValueError, match="different card pool"):
+        EquilibriumPolicy.load(path, cards=MASTER_CARDS[:-1])
+
+
+def test_unsupported_contracts_are_rejected():
+    cards = [dataclasses.replace(card, contract=Contract(benefit=1)) for card in MASTER_CARDS]
+    with pytest.raises(ValueError, match="contracts"):
+        EquilibriumSolver(cards)
+
+
+def test_policy_is_not_weaker_than_greedy(policy):
+    rng = random.Random(0)
+    games = 40
+    score = 0.0
+    for i in range(games):
+        # 先手・後手を入れ替えながら対戦する
+        me = i % 2
+        strategies = (policy, greedy_strategy) if me == 0 else (greedy_strategy, policy)
+        game = play_match(*strategies, rng)
+        score += 1.0 if game.winner == me else 0.5 if game.winner is None else 0.0
+    assert score / games >= 0.5
+
+
+def test_each_turn_is_solved_once_and_cached(policy):
+    hand, opponent_hand = MASTER_CARDS[:5], MASTER_CARDS[5:]
+    kinds, probabilities = policy.strategy(hand, opponent_hand, 10, 12)
+    assert len(kinds) == 5 and sum(probabilities) == pytest.approx(1.0)
+    assert policy.strategy(hand, opponent_hand, 10, 12)[1] is probabilities
+    assert not hasattr(policy, "search")     # フレームごとの探索はしない
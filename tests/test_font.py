@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from src.Font import FONT_FILES, FontRegistry
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+FILES = {name: os.path.normpath(os.path.join(FONT_DIR, path)) for name, path in FONT_FILES.items()}
+
+
+def test_warm_step_stays_within_budget_after_first_font():
+    fonts = FontRegistry(FILES)
+    fonts.prefetch(["mg2_8", "umplus10", "umplus12"])
+    assert fonts.estimate("mg2_8") is None
+
+    # 見積もりがない状態では、予算を守るなら何も読み込まない
+    assert fonts.warm_step(budget=0, force=False)
+    assert not fonts.is_loaded("mg2_8")
+
+    # force なら予算を超えても1つは読み込み、見積もりができる
+    assert fonts.warm_step(budget=0)
+    assert fonts.is_loaded("mg2_8") and not fonts.is_loaded("umplus10")
+    assert fonts.estimate("umplus10") > 0
+
+    assert not fonts.warm_step(budget=60)
+    assert fonts.is_loaded("umplus12")
+
+
+def test_peek_does_not_load():
+    fonts = FontRegistry(FILES)
+    assert fonts.peek("umplus10") is None
+    assert not fonts.is_loaded("umplus10")
+    assert fonts.peek("umplus10") is None
+    assert fonts.get("umplus10") is fonts.peek("umplus10")
+
+
+def test_every_font_ships_and_missing_files_are_reported():
+    assert all(os.path.exists(path) for path in FILES.values())
+    fonts = FontRegistry(dict(FILES, missing=os.path.join(FONT_DIR, "missing.bdf")))
+    fonts.prefetch(["missing", "mg2_8"])
+    with pytest.raises(FileNotFoundError, match="missing"):
+        fonts.warm_step()
+    assert not fonts.warm_step()
+    assert fonts.is_loaded("mg2_8")
@@ -0,0 +1,40 @@
+import pytest
+
+from src.DataClass import Card, CardInstance, MASTER_CARDS
+from src.Matchup import calc_damage, get_matchup_table, lookup_damage
+from src.settings import MAX_SOUL_POINT
+
+
+def test_lookup_matches_formula_for_every_pair():
+    for attacker in MASTER_CARDS:
+        for defender in MASTER_CARDS:
+            for soul_point in range(MAX_SOUL_POINT + 3):
+                assert lookup_damage(attacker, defender, soul_point) == calc_damage(attacker, defender, soul_point)
+
+
+def test_table_is_indexed_by_position_and_built_per_soul():
+    cards = [Card(1000 * (i + 1), f"c{i}", ("king",), i + 3, i, i) for i in range(4)]
+    table = get_matchup_table(cards)
+    assert table.matrix(0).shape == (4, 4)
+    assert [table.built(soul_point) for soul_point in range(2)] == [True, False]
+    assert lookup_damage(cards[3], cards[0], 1, cards) == calc_damage(cards[3], cards[0], 1)
+
+
+def test_cards_outside_the_pool_are_computed_directly():
+    attacker, defender = MASTER_CARDS[4], MASTER_CARDS[0]
+    impostor = Card(attacker.id, attacker.name, attacker.title, 20, 0, 0)
+    assert lookup_damage(impostor, defender, 0) == calc_damage(impostor, defender, 0)
+    buffed = CardInstance(attacker, {"attack": 3})
+    assert lookup_damage(buffed, defender, 2) == calc_damage(buffed, defender, 2)
+    with pytest.raises(ValueError):
+        get_matchup_table().expected_damage(impostor)
+
+
+def test_editing_the_pool_in_place_rebuilds_the_table():
+    cards = [Card(2000 + i, f"c{i}", ("king",), i + 3, i, i) for i in range(4)]
+    before = get_matchup_table(cards).matrix(0).copy()
+    cards[0] = Card(cards[0].id, cards[0].name, cards[0].title, 20, 0, 0)
+    after = get_matchup_table(cards).matrix(0)
+    assert after[0, 1] == calc_damage(cards[0], cards[1], 0) != before[0, 1]
+    assert lookup_damage(cards[0], cards[1], 0, cards) == calc_damage(cards[0], cards[1], 0)
+    assert get_matchup_table(list(cards)) is get_matchup_table(cards)
@@ -0,0 +1,123 @@
+import asyncio
+import dataclasses
+import random
+
+from src.DataClass import Card, MASTER_CARDS
+from src.Engine import new_game, play_turn, start_phase
+from src.Network import ERROR, MatchServer, MatchView, OPPONENT_AI, _get_varint, _put_varint, loopback, soak
+from src.NetworkScene import NetworkScene
+
+
+def _large_id_cards():
+    # 1バイトに収まらないidと、以前は「カードなし」と衝突していた 255 を含める
+    ids = [255, 256, 300, 1000, 70000] + list(range(1, 6))
+    return [dataclasses.replace(card, id=card_id) for card, card_id in zip(MASTER_CARDS, ids)]
+
+
+def test_varint_round_trip():
+    body = bytearray()
+    values = [0, 1, 127, 128, 255, 256, 70000, 2 ** 40]
+    for value in values:
+        _put_varint(body, value)
+    pos = 0
+    for value in values:
+        decoded, pos = _get_varint(body, pos)
+        assert decoded == value
+    assert pos == len(body)
+
+
+def test_deltas_reproduce_each_players_view():
+    cards = _large_id_cards()
+    rng = random.Random(0)
+    for index in range(2):
+        sent, received = MatchView(), MatchView()
+        replay = new_game(cards=cards, seed=3)
+        start_phase(replay)
+        played = (None, None)
+        while True:
+            new = MatchView.of(replay, index, played)
+            received.apply(sent.diff(new))
+            sent = new
+            for name in MatchView.__slots__:
+                assert getattr(received, name) == getattr(new, name)
+            if replay.phase == "result" or replay.turn > 30:
+                break
+            choices = [rng.randrange(len(player.hand)) for player in replay.players]
+            played = tuple(player.hand[i].id for player, i in zip(replay.players, choices))
+            play_turn(replay, *choices)
+            if replay.phase == "start":
+                start_phase(replay)
+    assert 255 in {card.id for card in cards}
+
+
+def test_deltas_do_not_leak_the_opponent_hand():
+    cards = [Card(i, f"card{i}", ("king",), 1, 1, i) for i in range(1000, 1010)]
+    game = new_game(cards=cards, seed=1)
+    start_phase(game)
+    for index in range(2):
+        view = MatchView.of(game, index)
+        delta = MatchView().diff(view)
+        own = {card.id for card in game.players[index].hand}
+        hidden = {card.id for card in game.players[1 - index].hand} - own
+        received = MatchView()
+        received.apply(delta)
+        assert set(received.hand) == own
+        assert received.hand_sizes == [len(player.hand) for player in game.players]
+        for card_id in hidden:
+            encoded = bytearray()
+            _put_varint(encoded, card_id)
+            assert bytes(encoded) not in delta
+
+
+def test_loopback_matches_finish():
+    server, clients = asyncio.run(soak(4, seed=2))
+    assert server.turns > 0 and not server.matches
+    assert all(client.finished for client in clients)
+    # 同じ対戦の2人は同じ勝者を受け取る
+    by_match = {}
+    for client in clients:
+        by_match.setdefault(client.match_id, set()).add(client.view.winner)
+    assert all(len(winners) == 1 for winners in by_match.values())
+
+
+def test_invalid_selection_is_rejected():
+    async def run():
+        server = MatchServer(seed=0)
+        client = loopback(server)
+        await client.join(OPPONENT_AI)
+        await client.select(len(client.view.hand))
+        while await client.receive() != ERROR:
+            pass
+        turn = client.view.turn
+        client.close()
+        return client, turn
+
+    client, turn = asyncio.run(run())
+    assert client.errors == ["invalid card"]
+    assert turn == 1
+
+
+def test_network_scene_mirrors_only_the_visible_state():
+    class FakeClient:
+        index = 1
+        error = None
+
+        def __init__(self, view):
+            self.view = view
+
+        def poll(self):
+            view, self.view = self.view, None
+            return view
+
+    game = new_game(seed=4)
+    start_phase(game)
+    play_turn(game, 0, 0)
+    start_phase(game)
+    view = MatchView.of(game, 1, (game.players[0].graveyard[-1].id, game.players[1].graveyard[-1].id))
+    scene = NetworkScene(app=None, host=None, client=FakeClient(view))
+    scene._mirror(scene.client.poll())
+    you, opponent = scene.game.players[1], scene.game.players[0]
+    assert [card.id for card in you.hand] == [card.id for card in game.players[1].hand]
+    assert opponent.hand == []
+    assert (you.life, opponent.life) == (game.players[1].life, game.players[0].life)
+    assert opponent.field_card.id == game.players[0].graveyard[-1].id
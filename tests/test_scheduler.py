@@ -0,0 +1,73 @@
+import pytest
+
+from src.Scheduler import PhaseScheduler
+
+
+def test_transitions_are_checked_and_dispatched_in_order():
+    scheduler = PhaseScheduler()
+    entered = []
+    scheduler.on_enter("start", lambda: (entered.append("start"), scheduler.transition("select")))
+    scheduler.on_enter("select", lambda: entered.append("select"))
+    scheduler.transition("start")
+    scheduler.dispatch()
+    assert entered == ["start", "select"] and scheduler.phase == "select"
+    with pytest.raises(ValueError, match="invalid phase transition"):
+        scheduler.transition("start")
+
+
+def test_timers_fire_in_order_and_can_be_cancelled():
+    scheduler = PhaseScheduler(transitions=None)
+    fired = []
+    scheduler.after(5, fired.append, "late")
+    scheduler.after(2, fired.append, "early")
+    cancelled = scheduler.after(3, fired.append, "cancelled")
+    scheduler.cancel(cancelled)
+    assert scheduler.advance(2) == 1 and fired == ["early"]
+    assert scheduler.next_due() == 3
+    scheduler.advance(3)
+    assert fired == ["early", "late"] and scheduler.next_due() is None
+
+
+def test_chained_timers_keep_their_interval_within_one_advance():
+    scheduler = PhaseScheduler(transitions=None)
+    times = []
+
+    def tick():
+        times.append(scheduler.clock)
+        if len(times) < 4:
+            scheduler.after(10, tick)
+
+    scheduler.after(10, tick)
+    scheduler.advance(100)
+    assert times == [10, 20, 30, 40]
+
+
+def test_turbo_and_run_until_idle_skip_waiting():
+    scheduler = PhaseScheduler(transitions=None, turbo=True)
+    fired = []
+    scheduler.after(90, fired.append, 1)
+    assert scheduler.run_until_idle() == 1 and fired == [1] and scheduler.clock == 0
+
+
+def test_while_in_runs_only_in_its_phase():
+    scheduler = PhaseScheduler()
+    calls = []
+    scheduler.while_in("select", lambda: calls.append(scheduler.phase))
+    scheduler.transition("start")
+    scheduler.update()
+    scheduler.transition("select")
+    scheduler.update()
+    assert calls == ["select"]
+
+
+
+def test_cancelling_a_fired_timer_leaves_nothing_behind():
+    scheduler = PhaseScheduler(transitions=None)
+    fired = []
+    timer = scheduler.after(1, fired.append, 1)
+    scheduler.advance(1)
+    assert not scheduler.cancel(timer)
+    pending = scheduler.after(1, fired.append, 2)
+    assert scheduler.cancel(pending) and not scheduler.cancel(pending)
+    scheduler.advance(1)
+    assert fired == [1] and not scheduler._cancelled and not scheduler._scheduled
@@ -0,0 +1,82 @@
+import dataclasses
+import random
+import struct
+
+from src.DataClass import Card
+from src.Effects import ATTACK, DAMAGE, HEAL, SOUL
+from src.Engine import new_game, play_turn, start_phase
+from src.GameScene import GameScene
+from src.Replay import ReplayWriter
+from src.Snapshot import KIND_CODES, SnapshotBuffer, _pack_rng, _unpack_rng
+
+
+def _played(cards=None, seed=5, turns=3):
+    game = new_game(seed=seed) if cards is None else new_game(cards=cards, seed=seed)
+    start_phase(game)
+    for _ in range(turns):
+        play_turn(game, 0, 0)
+    return game
+
+
+def _same(game, other):
+    for player, restored in zip(game.players, other.players):
+        assert [card.id for card in restored.hand] == [card.id for card in player.hand]
+        assert [card.id for card in restored.graveyard] == [card.id for card in player.graveyard]
+        assert [card.id for card in restored.deck.pile[:restored.deck.size]] == \
+            [card.id for card in player.deck.pile[:player.deck.size]]
+        assert restored.life == player.life and restored.soul_point == player.soul_point
+    assert (other.turn, other.phase) == (game.turn, game.phase)
+
+
+def test_save_load_branch_continues_the_same_game(tmp_path):
+    game = _played()
+    buffer = SnapshotBuffer()
+    snapshot = buffer.take(game)
+    path = str(tmp_path / "snapshot.bin")
+    buffer.save(path)
+    branch = buffer.branch(buffer.load(path))
+    _same(game, branch)
+    play_turn(game, 1, 2)
+    play_turn(branch, 1, 2)
+    _same(game, branch)
+    assert len(snapshot.layout) < 200
+
+
+def test_large_pools_and_compositions_round_trip(tmp_path):
+    cards = [Card(i, f"card{i}", ("king",), i % 6, i % 5, i) for i in range(1, 301)]
+    game = _played(cards)
+    buffer = SnapshotBuffer(cards=cards)
+    assert buffer.typecode == "H"
+    snapshot = dataclasses.replace(buffer.capture(game), compositions=((300,) * 300, (1000,) * 300))
+    path = str(tmp_path / "snapshot.bin")
+    buffer.save(path, snapshot)
+    loaded = buffer.load(path)
+    assert loaded.compositions == snapshot.compositions
+    _same(game, buffer.branch(loaded))
+
+
+def test_resume_requires_a_matching_replay(tmp_path):
+    game = _played(seed=9, turns=2)
+    path = str(tmp_path / "replay.bin")
+    assert not GameScene._can_resume_replay(path, game)
+
+    writer = ReplayWriter(path, game.seed)
+    writer.record(0, 0)
+    writer.file.flush()
+    assert not GameScene._can_resume_replay(path, game)     # 2ターン分の記録が必要
+    writer.record(0, 0)
+    writer.close()
+    assert GameScene._can_resume_replay(path, game)
+    assert not GameScene._can_resume_replay(path, dataclasses.replace(game, seed=game.seed + 1))
+
+
+def test_file_encoding_does_not_depend_on_the_platform():
+    rng = random.Random(3)
+    rng.gauss(0, 1)
+    data = _pack_rng(rng)
+    _, internal, gauss = rng.getstate()
+    assert data == struct.pack(f"<{len(internal)}Id", *internal, gauss)
+    restored = random.Random()
+    restored.setstate(_unpack_rng(data))
+    assert restored.random() == rng.random()
+    assert KIND_CODES == {DAMAGE: 0, HEAL: 1, SOUL: 2, ATTACK: 3}
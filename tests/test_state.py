@@ -0,0 +1,67 @@
+import dataclasses
+
+import pytest
+
+from src.DataClass import CardInstance, Contract, MASTER_CARDS
+from src.Effects import DAMAGE, Effect, add_lingering
+from src.Engine import new_game, play_turn, start_phase
+from src.State import StateCodec
+
+
+def _select_game(seed):
+    game = new_game(seed=seed)
+    start_phase(game)
+    return game
+
+
+def test_encode_decode_round_trip():
+    codec = StateCodec()
+    game = _select_game(4)
+    play_turn(game, 0, 1)
+    start_phase(game)
+    code = codec.encode(game)
+    restored = codec.decode(code)
+    assert codec.encode(restored) == code
+    for original, player in zip(game.players, restored.players):
+        assert sorted(card.id for card in player.hand) == sorted(card.id for card in original.hand)
+        assert player.life == original.life and player.soul_point == original.soul_point
+        assert player.deck.counts == original.deck.counts
+    assert codec.from_bytes(codec.to_bytes(code)) == code
+
+
+def test_successors_match_engine():
+    codec = StateCodec()
+    game = _select_game(7)
+    successors = codec.successors(codec.encode(game))
+    for index1, card1 in enumerate(game.players[0].hand):
+        for index2, card2 in enumerate(game.players[1].hand):
+            branch = new_game(seed=7)
+            start_phase(branch)
+            play_turn(branch, index1, index2)
+            expected = successors[(card1.id, card2.id)]
+            assert codec.life(expected, 0) == branch.players[0].life
+            assert codec.life(expected, 1) == branch.players[1].life
+            assert codec.graveyard_counts(expected, 0) == codec.graveyard_counts(codec.encode(branch), 0)
+
+
+def test_modified_cards_are_rejected():
+    codec = StateCodec()
+    game = _select_game(1)
+    game.players[0].hand[0] = CardInstance(game.players[0].hand[0], {"attack": 1})
+    with pytest.raises(ValueError, match="modified"):
+        codec.encode(game)
+
+
+def test_lingering_effects_and_contracts_are_not_searchable():
+    codec = StateCodec()
+    game = _select_game(2)
+    codec.check_searchable(game)
+    add_lingering(game, Effect(DAMAGE, 0, 0, 1, 50), 2)
+    with pytest.raises(ValueError, match="lingering"):
+        codec.check_searchable(game)
+
+    cards = list(MASTER_CARDS)
+    cards[0] = dataclasses.replace(cards[0], contract=Contract(benefit=1))
+    contract_codec = StateCodec(cards)
+    with pytest.raises(ValueError, match="contracts"):
+        contract_codec.successors(contract_codec.encode(_select_game(2)))
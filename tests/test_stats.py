@@ -0,0 +1,43 @@
+import dataclasses
+import random
+
+import numpy as np
+import pytest
+
+from src.DataClass import Contract, MASTER_CARDS
+from src.Engine import random_strategy
+from src.Stats import StatsStore, record_match, simulate_to_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StatsStore(str(tmp_path / "stats"))
+    rng = random.Random(0)
+    for _ in range(20):
+        store.append(record_match(random_strategy, random_strategy, rng))
+    store.flush()
+    return store
+
+
+@pytest.mark.parametrize("card", [0, 11, -1])
+def test_unknown_card_ids_are_rejected(store, card):
+    with pytest.raises(ValueError, match=f"card {card} is not in the card pool"):
+        store.count(card=card)
+    with pytest.raises(ValueError, match="not in the card pool"):
+        store.win_rate(card=1, opponent=card)
+
+
+def test_invalid_soul_range_is_rejected(store):
+    with pytest.raises(ValueError, match="soul range"):
+        store.count(soul_min=-1)
+    with pytest.raises(ValueError, match="soul range"):
+        store.count(soul_min=2, soul_max=1)
+
+
+def test_simulated_rows_record_the_soul_at_each_battle(tmp_path):
+    cards = [dataclasses.replace(card, contract=Contract(soul=1)) if card.id == 1 else card for card in MASTER_CARDS]
+    store = StatsStore(str(tmp_path / "stats"), cards=cards)
+    simulate_to_store(store, 200, np.random.default_rng(0))
+    store.flush()
+    assert store.count(soul_min=1) > 0
+    assert store.count() == store.count(soul_max=0) + store.count(soul_min=1)
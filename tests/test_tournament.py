@@ -0,0 +1,42 @@
+import random
+
+from src.DataClass import Card
+from src.Engine import new_game, play_match, random_strategy, turns_played
+from src.Tournament import MatchStats, print_results, run_chunk
+
+
+def test_card_usage_counts_every_play_even_after_recycling():
+    # 誰にもダメージが入らないカードプールで、山札を何度も使い切るまで対戦させる
+    cards = [Card(i + 1, f"wall{i}", ("Duke",), 0, 5, i) for i in range(3)]
+    stats = MatchStats()
+    game = play_match(random_strategy, random_strategy, random.Random(1), game=new_game(cards=cards, seed=1),
+                      max_turns=40, on_select=stats.add_play)
+    stats.add_game(game)
+    assert stats.total_turns == 40
+    assert [sum(usage.values()) for usage in stats.card_usage] == [40, 40]
+
+
+def test_run_chunk_counts_one_play_per_turn():
+    stats = run_chunk("random", "random", 20, seed=3)
+    for usage in stats.card_usage:
+        assert sum(usage.values()) == stats.total_turns
+
+
+def test_turns_played_for_a_match_cut_off_at_the_limit():
+    game = play_match(random_strategy, random_strategy, random.Random(1), max_turns=3)
+    assert game.winner is None
+    assert turns_played(game) == 3
+    stats = MatchStats()
+    stats.add_game(game)
+    assert stats.total_turns == 3
+
+
+def test_finished_match_counts_the_deciding_turn():
+    game = play_match(random_strategy, random_strategy, random.Random(2), game=new_game(seed=2))
+    assert min(player.life for player in game.players) <= 0
+    assert turns_played(game) == game.turn
+
+
+def test_print_results_with_no_games(capsys):
+    print_results({("random", "random"): MatchStats()})
+    assert "0.000" in capsys.readouterr().out